@@ -4,11 +4,18 @@ from flask_cors import CORS
 from werkzeug.security import generate_password_hash, check_password_hash
 import secrets
 import json
+import os
+import sys
 from datetime import datetime
 
+# Shared helpers (compression.py) live in the app folder one level up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from compression import Compression
+
 app = Flask(_name_)
 app.secret_key = secrets.token_hex(16)
 CORS(app)
+Compression(app)  # ETags, 304s and gzip/brotli for large responses (the disease catalog)
 
 # In-memory databases (use PostgreSQL/MySQL in production)
 users_db = {}
@@ -21,6 +21,7 @@ function renderMarket(rows) {
     }
     empty.classList.add('hidden');
 
+    // `updated` is the mandi's price date (YYYY-MM-DD); prices are reported per day
     rows.forEach(r => {
         const tr = document.createElement('tr');
         tr.innerHTML = `
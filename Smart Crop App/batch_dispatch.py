@@ -0,0 +1,101 @@
+"""In-process dispatch of batched API sub-requests.
+
+`run_batch()` runs each sub-request of `/api/batch` through the Flask app's
+normal routing inside its own request context, with no extra HTTP round-trip.
+Reads between two writes run in parallel; writes run alone and in order.
+"""
+import json
+
+from werkzeug.test import EnvironBuilder
+
+READ_METHODS = ('GET', 'HEAD')
+ALLOWED_METHODS = READ_METHODS + ('POST',)
+# Response headers copied into each sub-response
+FORWARDED_HEADERS = ('ETag', 'Cache-Control', 'Last-Modified', 'Location')
+# Request headers never passed to a sub-request: sub-responses are embedded
+# uncompressed in the batch response, and connection-level headers belong to
+# the outer request
+DROPPED_REQUEST_HEADERS = {
+    'accept-encoding', 'host', 'connection', 'keep-alive', 'proxy-connection', 'te', 'trailer',
+    'transfer-encoding', 'upgrade', 'content-length', 'content-encoding'
+}
+
+
+class BatchRequestError(ValueError):
+    """A sub-request description is malformed"""
+
+
+def parse_sub_request(raw, index, prefix='/api/', blocked=()):
+    """Validate one sub-request dict; returns (id, method, path, params, body, headers)"""
+    if not isinstance(raw, dict):
+        raise BatchRequestError(f"requests[{index}] must be an object")
+    path = raw.get('path')
+    if not isinstance(path, str) or not path.startswith(prefix):
+        raise BatchRequestError(f"requests[{index}].path must start with {prefix}")
+    if path.split('?', 1)[0].rstrip('/') in blocked:
+        raise BatchRequestError(f"requests[{index}].path {path} cannot be batched")
+    method = str(raw.get('method', 'GET')).upper()
+    if method not in ALLOWED_METHODS:
+        raise BatchRequestError(f"requests[{index}].method must be one of {', '.join(ALLOWED_METHODS)}")
+    params = raw.get('params') or {}
+    headers = raw.get('headers') or {}
+    if not isinstance(params, dict) or not isinstance(headers, dict):
+        raise BatchRequestError(f"requests[{index}].params and headers must be objects")
+    return raw.get('id', index), method, path, params, raw.get('body'), headers
+
+
+def dispatch(app, method, path, params=None, body=None, headers=None):
+    """Run one request through the app in-process; returns (status, headers, body)"""
+    headers = {k: v for k, v in (headers or {}).items() if k.lower() not in DROPPED_REQUEST_HEADERS}
+    builder = EnvironBuilder(
+        path=path, method=method, query_string=params or None,
+        json=body, headers=headers or None
+    )
+    try:
+        with app.request_context(builder.get_environ()):
+            response = app.full_dispatch_request()
+            data = response.get_data()
+            status = response.status_code
+            forwarded = {h: response.headers[h] for h in FORWARDED_HEADERS if h in response.headers}
+            mimetype = response.mimetype
+            response.close()
+    finally:
+        builder.close()
+
+    if not data:
+        return status, forwarded, None
+    if mimetype == 'application/json':
+        return status, forwarded, json.loads(data)
+    return status, forwarded, data.decode('utf-8', errors='replace')
+
+
+def run_batch(app, sub_requests, executor):
+    """Dispatch parsed sub-requests, reads in parallel between writes; returns results in order"""
+    results = [None] * len(sub_requests)
+
+    def run(i):
+        request_id, method, path, params, body, headers = sub_requests[i]
+        try:
+            status, out_headers, out_body = dispatch(app, method, path, params, body, headers)
+            results[i] = {'id': request_id, 'status': status, 'headers': out_headers, 'body': out_body}
+        except Exception as e:
+            results[i] = {'id': request_id, 'status': 500, 'headers': {}, 'body': {'error': str(e)}}
+
+    pending_reads = []
+    for i, sub in enumerate(sub_requests):
+        if sub[1] in READ_METHODS:
+            pending_reads.append(i)
+            continue
+        _run_parallel(executor, run, pending_reads)
+        pending_reads = []
+        run(i)
+    _run_parallel(executor, run, pending_reads)
+    return results
+
+
+def _run_parallel(executor, run, indexes):
+    if len(indexes) == 1:
+        run(indexes[0])
+    else:
+        for future in [executor.submit(run, i) for i in indexes]:
+            future.result()
@@ -0,0 +1,90 @@
+"""Streaming CSV / NDJSON helpers for the batch API endpoints.
+
+Uploads are read row by row and results written one line at a time, so
+memory does not grow with the number of rows.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+CSV_MIMETYPE = 'text/csv'
+
+
+def detect_format(content_type, filename=None, default='ndjson'):
+    """Guess 'csv' or 'ndjson' from a Content-Type header or file name"""
+    content_type = (content_type or '').lower()
+    filename = (filename or '').lower()
+    if 'csv' in content_type or filename.endswith('.csv'):
+        return 'csv'
+    if 'ndjson' in content_type or 'jsonl' in content_type or 'json-lines' in content_type \
+            or filename.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return default
+
+
+def iter_records(stream, fmt, required=()):
+    """Yield one dict per row from a binary stream of CSV or NDJSON.
+
+    Rows that cannot be parsed are yielded as {'_error': message} so the
+    caller can report them in place instead of aborting the whole upload.
+    Undecodable bytes, and a CSV header lacking any of the `required`
+    columns, end the upload with one such error record.
+    The stream is closed once it has been read.
+    """
+    with io.TextIOWrapper(stream, encoding='utf-8-sig', newline='') as text:
+        try:
+            yield from (_iter_csv(text, required) if fmt == 'csv' else _iter_ndjson(text))
+        except UnicodeDecodeError as e:
+            yield {'_error': f'Upload is not valid UTF-8 text ({e.reason})'}
+        except csv.Error as e:
+            yield {'_error': f'Invalid CSV: {e}'}
+
+
+def _iter_csv(text, required):
+    reader = csv.DictReader(text)
+    if reader.fieldnames is None:
+        return
+    header = {name.strip() for name in reader.fieldnames if name}
+    missing = [column for column in required if column not in header]
+    if missing:
+        yield {'_error': f"CSV header is missing columns: {', '.join(missing)}"}
+        return
+    for row in reader:
+        yield {k.strip(): (v or '').strip() for k, v in row.items() if k}
+
+
+def _iter_ndjson(text):
+    for line in text:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield {'_error': f'Invalid JSON: {e}'}
+            continue
+        yield record if isinstance(record, dict) else {'_error': 'Each line must be a JSON object'}
+
+
+def chunked(iterable, size):
+    """Yield lists of up to `size` items from an iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def ndjson_line(record):
+    """Serialize one record as an NDJSON line"""
+    return json.dumps(record, default=str) + '\n'
+
+
+def csv_line(values):
+    """Serialize one list of values as a CSV line"""
+    buf = io.StringIO()
+    csv.writer(buf).writerow(values)
+    return buf.getvalue()
@@ -0,0 +1,136 @@
+"""Response compression and conditional GET for the Flask apps.
+
+`Compression(app)` gives successful GET/HEAD responses an ETag, answers
+If-None-Match with 304 and compresses text bodies with brotli (if installed)
+or gzip. Streamed responses and views decorated with `no_compression` are
+left alone.
+"""
+import gzip
+import hashlib
+import threading
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/javascript', 'application/x-ndjson', 'image/svg+xml')
+DEFAULT_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def no_compression(view):
+    """Route decorator: skip ETags, conditional GET and compression for this view"""
+    view._skip_compression = True
+    return view
+
+
+def is_compressible(mimetype):
+    return bool(mimetype) and (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES)
+
+
+def choose_encoding(accept_encodings):
+    """Pick 'br' or 'gzip' from the client's Accept-Encoding (None if neither is acceptable)"""
+    if brotli is not None and accept_encodings['br'] > 0:
+        return 'br'
+    if accept_encodings['gzip'] > 0:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class Compression:
+    """after_request middleware adding ETags, 304s and gzip/brotli to an app"""
+
+    def __init__(self, app=None, min_size=DEFAULT_MIN_SIZE):
+        self.min_size = min_size
+        self._lock = threading.Lock()
+        self._counters = {
+            'responses': 0,
+            'compressed': 0,
+            'not_modified': 0,
+            'bytes_in': 0,
+            'bytes_out': 0,
+            'bytes_saved_compression': 0,
+            'bytes_saved_not_modified': 0,
+            'by_encoding': {}
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.after_request(self.process_response)
+        app.extensions['compression'] = self
+
+    def _skipped(self, response):
+        func = current_app.view_functions.get(request.endpoint)
+        return (
+            getattr(func, '_skip_compression', False)
+            or request.method not in ('GET', 'HEAD')
+            or response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+        )
+
+    def process_response(self, response):
+        if self._skipped(response):
+            return response
+
+        body = response.get_data()
+        etag, _ = response.get_etag()
+        if etag is None:
+            etag = hashlib.sha1(body).hexdigest()
+            response.set_etag(etag)
+
+        if request.if_none_match.contains_weak(etag):
+            self._count(len(body), 0, not_modified=True)
+            return response.make_conditional(request)
+
+        compressible = is_compressible(response.mimetype)
+        if compressible:
+            response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.accept_encodings) if compressible and len(body) >= self.min_size else None
+        if encoding is None:
+            self._count(len(body), len(body))
+            return response
+
+        compressed = compress(body, encoding)
+        if len(compressed) >= len(body):
+            self._count(len(body), len(body))
+            return response
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag, weak=True)
+        self._count(len(body), len(compressed), encoding=encoding)
+        return response
+
+    def _count(self, bytes_in, bytes_out, encoding=None, not_modified=False):
+        with self._lock:
+            c = self._counters
+            c['responses'] += 1
+            c['bytes_in'] += bytes_in
+            c['bytes_out'] += bytes_out
+            if not_modified:
+                c['not_modified'] += 1
+                c['bytes_saved_not_modified'] += bytes_in
+            elif encoding:
+                c['compressed'] += 1
+                c['bytes_saved_compression'] += bytes_in - bytes_out
+                c['by_encoding'][encoding] = c['by_encoding'].get(encoding, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            out = dict(self._counters, by_encoding=dict(self._counters['by_encoding']))
+        out['bytes_saved'] = out['bytes_saved_compression'] + out['bytes_saved_not_modified']
+        out['brotli_available'] = brotli is not None
+        out['min_size'] = self.min_size
+        return out
@@ -0,0 +1,117 @@
+"""Compiled lookup table for crop recommendations.
+
+`CropIndex` flattens `CROP_DATABASE` into one (region, season, soil) table of
+`CropGroup`s holding NumPy columns for yield, price, water and pH, so scoring
+a request is a few array operations.
+"""
+import numpy as np
+
+# Water requirement / availability encoded as ordered levels. A crop is
+# suitable when the farm's availability level is >= the crop's requirement.
+WATER_LEVELS = {'low': 0, 'medium': 1, 'high': 2}
+UNKNOWN_WATER = -1
+
+DEFAULT_YIELD = {"yield": 10, "price_per_quintal": 2000}
+
+
+def encode_water(value):
+    """Encode 'High'/'medium'/... as a water level (-1 when unknown)"""
+    return WATER_LEVELS.get((value or '').strip().lower(), UNKNOWN_WATER)
+
+
+class CropGroup:
+    """Candidate crops for one (region, season, soil) combination, stored column-wise"""
+
+    def __init__(self, names, yields, prices, water, ph_low, ph_high):
+        self.names = names
+        self.yields = np.asarray(yields, dtype=np.int64)
+        self.prices = np.asarray(prices, dtype=np.int64)
+        self.water = np.asarray(water, dtype=np.int8)
+        self.ph_low = np.asarray(ph_low, dtype=np.float64)
+        self.ph_high = np.asarray(ph_high, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.names)
+
+
+class CropIndex:
+    """Flat (region, season, soil) -> CropGroup table compiled from CROP_DATABASE"""
+
+    def __init__(self, crop_database, crop_yields):
+        self.groups = {}
+        for region, seasons in crop_database.items():
+            for season, soils in seasons.items():
+                for soil, soil_data in soils.items():
+                    crops = soil_data.get('crops', [])
+                    ph_range = soil_data.get('ph_range', [6.0, 7.5])
+                    water = WATER_LEVELS.get(soil_data.get('water', 'medium'), WATER_LEVELS['medium'])
+                    yield_rows = [crop_yields.get(crop, DEFAULT_YIELD) for crop in crops]
+                    self.groups[(region, season, soil)] = CropGroup(
+                        names=list(crops),
+                        yields=[row['yield'] for row in yield_rows],
+                        prices=[row['price_per_quintal'] for row in yield_rows],
+                        water=[water] * len(crops),
+                        ph_low=[ph_range[0]] * len(crops),
+                        ph_high=[ph_range[1]] * len(crops)
+                    )
+
+    def lookup(self, region, season, soil):
+        """Return the CropGroup for a combination, or None when nothing is known"""
+        return self.groups.get((region, season, soil))
+
+    def recommend(self, region, season, soil, water_availability, ph, acres, budget):
+        """Return suitable crops with yield/revenue/profit/ROI, sorted by ROI (best first)"""
+        return self.recommend_many([(region, season, soil, water_availability, ph, acres, budget)])[0]
+
+    def recommend_many(self, profiles, limit=None):
+        """Score many farm profiles at once.
+
+        `profiles` is a sequence of (region, season, soil, water_availability,
+        ph, acres, budget) tuples. Profiles sharing a (region, season, soil)
+        group are scored together as (profiles x crops) arrays. Returns one
+        recommendation list per profile, in input order, each cut to `limit`
+        entries when given.
+        """
+        results = [[] for _ in profiles]
+        by_group = {}
+        for i, profile in enumerate(profiles):
+            by_group.setdefault(tuple(profile[:3]), []).append(i)
+
+        for key, rows in by_group.items():
+            group = self.groups.get(key)
+            if group is None or not len(group):
+                continue
+
+            # Column vectors so every operation broadcasts to (profiles, crops)
+            water = np.array([encode_water(profiles[i][3]) for i in rows], dtype=np.int8)[:, None]
+            ph = np.array([profiles[i][4] for i in rows], dtype=np.float64)[:, None]
+            acres = np.array([profiles[i][5] for i in rows], dtype=np.float64)[:, None]
+            budget = np.array([profiles[i][6] for i in rows], dtype=np.float64)[:, None]
+
+            mask = (group.ph_low <= ph) & (ph <= group.ph_high) & (group.water <= water)
+            total_yield = group.yields * acres
+            revenue = total_yield * group.prices
+            profit = revenue - budget
+            with np.errstate(divide='ignore', invalid='ignore'):
+                roi = np.where(budget > 0, profit / budget * 100, 0.0)
+            # Stable sort on the rounded ROI keeps database order for ties
+            order = np.argsort(-np.round(np.where(mask, roi, -np.inf), 2), axis=1, kind='stable')
+
+            yields, prices = group.yields.tolist(), group.prices.tolist()
+            for r, i in enumerate(rows):
+                has_budget = profiles[i][6] > 0
+                row_yield, row_revenue, row_profit, row_roi = (
+                    total_yield[r].tolist(), revenue[r].tolist(), profit[r].tolist(), roi[r].tolist()
+                )
+                picked = [c for c in order[r].tolist() if mask[r, c]][:limit]
+                results[i] = [{
+                    "name": group.names[c],
+                    "yield_per_acre": yields[c],
+                    "total_yield": row_yield[c],
+                    "price_per_quintal": prices[c],
+                    "estimated_revenue": row_revenue[c],
+                    "profit": row_profit[c],
+                    "roi": round(row_roi[c], 2) if has_budget else 0,
+                    "suitability_score": round(85 + (row_roi[c] / 100), 2) if has_budget else 85.0
+                } for c in picked]
+        return results
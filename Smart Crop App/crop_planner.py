@@ -1,16 +1,48 @@
 # app.py - Flask Backend
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 import os
+import io
 from werkzeug.utils import secure_filename
+from werkzeug.datastructures import MultiDict
 import base64
 import json
-import requests
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
 import heatmap as heatmap_module
+from weather_cache import WeatherCache
+from http_client import CircuitBreaker, make_session
+from crop_index import CropIndex
+import batch_io
+from upload_queue import QueueFullError, UploadQueue
+from image_store import ImageStore
+from symptom_matcher import SymptomMatcher
+from json_payload import JsonPayload, payload_response, version_etag, conditional_json
+from zone_store import RecordStore, MAX_PAGE_SIZE, parse_filters, parse_fields
+from heatmap_grid import HeatmapGrid, parse_bbox
+from risk_engine import RiskEngine, load_disease_catalog
+from heatmap_layer import HeatmapLayer
+from trend_store import TrendStore, parse_date, months_ago
+from region_views import MaterializedViews
+from batch_dispatch import BatchRequestError, parse_sub_request, run_batch
+from compression import Compression, no_compression
+from static_assets import StaticAssets
+from mandi_query import MandiPriceIndex, DEFAULT_PAGE_SIZE as MANDI_DEFAULT_PAGE_SIZE
 
 app = Flask(__name__)
 CORS(app)
+# ETags, If-None-Match 304s and gzip/brotli for JSON/text responses above 1 KB
+compression = Compression(app)
+
+if not hasattr(heatmap_module, 'get_heatmap_data'):
+    # An installed package named "heatmap" shadowed the local heatmap.py;
+    # load the local file explicitly (once, at startup)
+    import importlib.util
+    _heatmap_spec = importlib.util.spec_from_file_location('local_heatmap', os.path.join(os.path.dirname(__file__), 'heatmap.py'))
+    heatmap_module = importlib.util.module_from_spec(_heatmap_spec)
+    _heatmap_spec.loader.exec_module(heatmap_module)
 
 # Configuration
 UPLOAD_FOLDER = 'uploads'
@@ -21,8 +53,68 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
 # Create upload folder if it doesn't exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Pages, CSS and JS are read, fingerprinted and precompressed once at startup
+static_assets = StaticAssets(os.path.dirname(os.path.abspath(__file__))).build()
+
+# Uploaded images are stored by content hash in sharded folders (duplicates are
+# kept once); files past the retention age, then the oldest beyond the size cap,
+# are removed by a periodic sweep
+UPLOAD_RETENTION_DAYS = 90
+UPLOAD_MAX_BYTES = 5 * 1024 * 1024 * 1024  # 5GB
+UPLOAD_SWEEP_INTERVAL = 60 * 60
+image_store = ImageStore(
+    UPLOAD_FOLDER,
+    max_bytes=UPLOAD_MAX_BYTES,
+    max_age_days=UPLOAD_RETENTION_DAYS,
+    sweep_interval=UPLOAD_SWEEP_INTERVAL
+)
+
+# Uploaded images are saved by a small background pool instead of inside the
+# request; with UPLOAD_MAX_PENDING files queued, an upload waits at most
+# UPLOAD_MAX_WAIT seconds for a slot and is then answered with 503
+UPLOAD_WORKERS = 4
+UPLOAD_MAX_PENDING = 64
+UPLOAD_MAX_WAIT = 1.0
+UPLOAD_RETRY_AFTER = 5
+upload_queue = UploadQueue(
+    image_store.save,
+    max_workers=UPLOAD_WORKERS,
+    max_pending=UPLOAD_MAX_PENDING,
+    max_wait=UPLOAD_MAX_WAIT,
+    retry_after=UPLOAD_RETRY_AFTER
+)
+
 # Weather API Key (OpenWeatherMap - Free tier)
 WEATHER_API_KEY = "your_api_key_here"  # Get free key from openweathermap.org
+OWM_BASE_URL = "https://api.openweathermap.org/data/2.5"
+OWM_TIMEOUT = 5
+
+# One pooled keep-alive session for all OpenWeatherMap calls. The breaker opens
+# after this many consecutive failures (timeouts, 5xx, rejected API key) and
+# sends callers straight to the mock fallback for the cool-down period.
+WEATHER_BREAKER_FAILURES = 5
+WEATHER_BREAKER_COOLDOWN = 30
+weather_session = make_session(pool_maxsize=32)
+weather_breaker = CircuitBreaker('openweathermap', failure_threshold=WEATHER_BREAKER_FAILURES, reset_timeout=WEATHER_BREAKER_COOLDOWN)
+
+# Weather cache: TTL (seconds) per payload type, how long an expired entry may
+# still be served while it refreshes in the background, and max cached entries
+WEATHER_CACHE_TTLS = {"current": 10 * 60, "forecast": 30 * 60, "alerts": 15 * 60, "coords": 7 * 24 * 60 * 60}
+WEATHER_CACHE_STALE_SECONDS = 60 * 60
+WEATHER_CACHE_MAX_ENTRIES = 2048
+
+weather_cache = WeatherCache(
+    WEATHER_CACHE_TTLS,
+    stale_ttl=WEATHER_CACHE_STALE_SECONDS,
+    max_entries=WEATHER_CACHE_MAX_ENTRIES
+)
+
+# Overall time budget (seconds) for one /api/weather lookup. The current,
+# forecast and alerts calls run concurrently on this pool, each with a timeout
+# cut to what is left of the deadline. Whatever has not arrived by the deadline
+# is left out of the response; calls still queued for a worker are cancelled.
+WEATHER_REQUEST_DEADLINE = 6
+weather_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='weather')
 
 # Crop recommendation database based on soil type, pH, season, and region
 CROP_DATABASE = {
@@ -93,9 +185,102 @@ DISEASE_SYMPTOMS = {
     "holes_in_leaves": ["Pest infestation", "Apply organic pesticide", "Use neem oil"]
 }
 
+# Symptom vocabulary compiled once into a keyword automaton
+symptom_matcher = SymptomMatcher(DISEASE_SYMPTOMS)
+
+# Flattened (region, season, soil) -> crop rows table, built once at startup
+crop_index = CropIndex(CROP_DATABASE, CROP_YIELDS)
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def owm_get(path, params, timeout=OWM_TIMEOUT):
+    """GET an OpenWeatherMap endpoint through the pooled session and circuit breaker"""
+    def do_get():
+        r = weather_session.get(f"{OWM_BASE_URL}/{path}", params=dict(params, appid=WEATHER_API_KEY, units='metric'), timeout=timeout)
+        # A rejected key or a server error means the upstream is unusable; a
+        # 404 for an unknown city is a normal answer and must not trip the breaker
+        if r.status_code == 401 or r.status_code >= 500:
+            raise Exception(f'OpenWeatherMap returned {r.status_code}')
+        return r
+    return weather_breaker.call(do_get)
+
+def fetch_current_weather(city, timeout=OWM_TIMEOUT):
+    """Fetch the raw current-weather payload for a city from OpenWeatherMap"""
+    r = owm_get('weather', {'q': city}, timeout=timeout)
+    if r.status_code != 200:
+        raise Exception('City not found')
+    return r.json()
+
+def fetch_forecast(city, timeout=OWM_TIMEOUT):
+    """Fetch the raw 5 day / 3 hour forecast payload for a city"""
+    r = owm_get('forecast', {'q': city}, timeout=timeout)
+    if r.status_code != 200:
+        raise Exception('Forecast not available')
+    return r.json()
+
+def fetch_onecall(lat, lon, timeout=OWM_TIMEOUT):
+    """Fetch the raw OneCall payload (used for weather alerts) for a coordinate"""
+    r = owm_get('onecall', {'lat': lat, 'lon': lon}, timeout=timeout)
+    if r.status_code != 200:
+        raise Exception('Alerts not available')
+    return r.json()
+
+def _coords_from(payload):
+    """Extract (lat, lon) from a current-weather or forecast payload"""
+    coord = (payload or {}).get('coord') or (payload or {}).get('city', {}).get('coord')
+    if coord and 'lat' in coord and 'lon' in coord:
+        return coord['lat'], coord['lon']
+    return None
+
+def fetch_weather_bundle(city, deadline=WEATHER_REQUEST_DEADLINE):
+    """Fetch current, forecast and alerts payloads for a city concurrently.
+
+    Returns a dict with 'current', 'forecast' and 'alerts' raw payloads; any
+    part that failed or missed the deadline is None.
+    """
+    end = time.monotonic() + deadline
+
+    def timeout():
+        # A call that only gets a worker after the deadline is not made at all
+        remaining = end - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError('Weather request deadline passed')
+        return min(OWM_TIMEOUT, remaining)
+
+    current_f = weather_executor.submit(weather_cache.get_or_load, 'current', city, lambda: fetch_current_weather(city, timeout()))
+    forecast_f = weather_executor.submit(weather_cache.get_or_load, 'forecast', city, lambda: fetch_forecast(city, timeout()))
+
+    def submit_alerts(coords):
+        lat, lon = coords
+        return weather_executor.submit(weather_cache.get_or_load, 'alerts', city, lambda: fetch_onecall(lat, lon, timeout()))
+
+    # OneCall needs coordinates: use remembered ones so all three calls start
+    # together, otherwise start it as soon as current or forecast returns them
+    coords = weather_cache.peek('coords', city)
+    alerts_f = submit_alerts(coords) if coords else None
+    pending = {current_f, forecast_f}
+    while alerts_f is None and pending:
+        done, pending = wait(pending, timeout=max(0, end - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for f in done:
+            coords = _coords_from(f.result()) if f.exception() is None else None
+            if coords:
+                weather_cache.put('coords', city, coords)
+                alerts_f = submit_alerts(coords)
+                break
+
+    futures = {'current': current_f, 'forecast': forecast_f, 'alerts': alerts_f}
+    wait([f for f in futures.values() if f is not None], timeout=max(0, end - time.monotonic()))
+
+    bundle = {}
+    for name, f in futures.items():
+        bundle[name] = f.result() if f is not None and f.done() and f.exception() is None else None
+        if f is not None and not f.done():
+            f.cancel()
+    return bundle
+
 def get_weather_data(region):
     """Fetch weather data from OpenWeatherMap API"""
     try:
@@ -107,16 +292,12 @@ def get_weather_data(region):
         }
         city = city_map.get(region, "Delhi")
         
-        url = f"http://api.openweathermap.org/data/2.5/weather?q={city},IN&appid={WEATHER_API_KEY}&units=metric"
-        response = requests.get(url, timeout=5)
-        
-        if response.status_code == 200:
-            data = response.json()
-            return {
-                "temperature": data["main"]["temp"],
-                "humidity": data["main"]["humidity"],
-                "description": data["weather"][0]["description"]
-            }
+        data = weather_cache.get_or_load('current', city, lambda: fetch_current_weather(f"{city},IN"))
+        return {
+            "temperature": data["main"]["temp"],
+            "humidity": data["main"]["humidity"],
+            "description": data["weather"][0]["description"]
+        }
     except:
         pass
     
@@ -137,57 +318,31 @@ def analyze_crop_recommendation(data):
     acres = float(data.get('acres', 1))
     budget = float(data.get('budget', 10000))
     
-    # Get suitable crops based on region, season, and soil type
-    suitable_crops = []
-    
-    if region in CROP_DATABASE and season in CROP_DATABASE[region]:
-        soil_data = CROP_DATABASE[region][season].get(soil_type, {})
-        crops = soil_data.get('crops', [])
-        ph_range = soil_data.get('ph_range', [6.0, 7.5])
-        required_water = soil_data.get('water', 'medium')
-        
-        # Filter crops based on pH
-        for crop in crops:
-            ph_suitable = ph_range[0] <= ph <= ph_range[1]
-            water_suitable = (
-                (water_availability == 'High' and required_water in ['high', 'medium', 'low']) or
-                (water_availability == 'Medium' and required_water in ['medium', 'low']) or
-                (water_availability == 'Low' and required_water == 'low')
-            )
-            
-            if ph_suitable and water_suitable:
-                yield_data = CROP_YIELDS.get(crop, {"yield": 10, "price_per_quintal": 2000})
-                total_yield = yield_data['yield'] * acres
-                estimated_revenue = total_yield * yield_data['price_per_quintal']
-                cost_per_acre = budget / acres if acres > 0 else budget
-                profit = estimated_revenue - budget
-                roi = (profit / budget * 100) if budget > 0 else 0
-                
-                suitable_crops.append({
-                    "name": crop,
-                    "yield_per_acre": yield_data['yield'],
-                    "total_yield": total_yield,
-                    "price_per_quintal": yield_data['price_per_quintal'],
-                    "estimated_revenue": estimated_revenue,
-                    "profit": profit,
-                    "roi": round(roi, 2),
-                    "suitability_score": round(85 + (roi / 100), 2)
-                })
-    
-    # Sort by ROI
-    suitable_crops.sort(key=lambda x: x['roi'], reverse=True)
-    
-    return suitable_crops
+    # Suitable crops come from the table compiled at startup (see crop_index.py)
+    return crop_index.recommend(region, season, soil_type, water_availability, ph, acres, budget)
+
+def analyze_ph(ph):
+    """Classify soil pH and give liming/acidifying advice"""
+    ph_status = "Optimal" if 6.5 <= ph <= 7.5 else "Needs Adjustment"
+    if ph < 6.5:
+        ph_advice = "Soil is acidic. Add lime to increase pH."
+    elif ph > 7.5:
+        ph_advice = "Soil is alkaline. Add organic matter or sulfur to decrease pH."
+    else:
+        ph_advice = "Soil pH is in optimal range for most crops."
+    return {
+        "value": ph,
+        "status": ph_status,
+        "advice": ph_advice
+    }
 
 def analyze_disease(description, image_path=None):
     """Analyze disease symptoms from description and image"""
     recommendations = []
-    description_lower = description.lower()
     
-    # Check for symptoms in description
-    for symptom, advice in DISEASE_SYMPTOMS.items():
-        if any(word in description_lower for word in symptom.split('_')):
-            recommendations.extend(advice)
+    # Check for symptoms in description (one pass over the text, see symptom_matcher.py)
+    for symptom in symptom_matcher.match(description):
+        recommendations.extend(DISEASE_SYMPTOMS[symptom])
     
     if not recommendations:
         recommendations = [
@@ -196,102 +351,143 @@ def analyze_disease(description, image_path=None):
             "Monitor crop regularly"
         ]
     
-    return list(set(recommendations))  # Remove duplicates
+    return list(dict.fromkeys(recommendations))  # Remove duplicates, keep hit order
 
 @app.route('/')
+@no_compression
 def index():
     # Serve the dashboard HTML directly from the project root
-    return send_from_directory('.', 'main.html')
+    return static_assets.send('main.html')
 
 
 @app.route('/planner')
+@no_compression
 def planner():
     # Serve the crop planner HTML
-    return send_from_directory('.', 'crop_planner.html')
+    return static_assets.send('crop_planner.html')
 
 
 @app.route('/heatmap')
+@no_compression
 def heatmap_page():
     # Serve the full heatmap page as its own route
-    return send_from_directory('.', 'heatmap.html')
+    return static_assets.send('heatmap.html')
 
 
 @app.route('/weather')
+@no_compression
 def weather_page():
     # Serve the weather HTML page (static HTML in project root)
-    # The supplied weather.html uses relative static links so we can send the file directly.
-    return send_from_directory('.', 'weather.html')
+    # The supplied weather.html uses relative static links, rewritten to fingerprinted names at startup.
+    return static_assets.send('weather.html')
 
 
 @app.route('/schemes')
+@no_compression
 def schemes_page():
     # Serve the government schemes page
-    return send_from_directory('.', 'schemes.html')
+    return static_assets.send('schemes.html')
 
 
 @app.route('/advisory')
+@no_compression
 def advisory_page():
     # Serve market/advisory page
-    return send_from_directory('.', 'advisory.html')
+    return static_assets.send('advisory.html')
 
 
 @app.route('/disease')
+@no_compression
 def disease_page():
     # Serve the disease detection UI
-    return send_from_directory('.', 'disease.html')
+    return static_assets.send('disease.html')
+
+
+# Mandi prices are bulk-loaded into this SQLite store by mandi_ingest.py and
+# served from the in-memory index in mandi_query.py
+MANDI_DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mandi_prices.db')
+MANDI_FILTER_FIELDS = ('commodity', 'state', 'mandi')
+
+# Served while the store is missing or empty (PRICE_COLUMNS order). They keep
+# a fixed sample date so they never pass for today's prices
+MANDI_SAMPLE_DATE = '2024-01-01'
+MANDI_SAMPLE_PRICES = [
+    (MANDI_SAMPLE_DATE, 'Punjab', 'Ludhiana', 'Ludhiana Mandi', 'Wheat', '', 2150, 2150, 2150),
+    (MANDI_SAMPLE_DATE, 'Maharashtra', 'Pune', 'Pune Mandi', 'Rice', '', 1950, 1950, 1950),
+    (MANDI_SAMPLE_DATE, 'Uttar Pradesh', 'Lucknow', 'Lucknow Mandi', 'Maize', '', 1800, 1800, 1800),
+    (MANDI_SAMPLE_DATE, 'Punjab', 'Amritsar', 'Amritsar Mandi', 'Wheat', '', 2120, 2120, 2120),
+    (MANDI_SAMPLE_DATE, 'Maharashtra', 'Nagpur', 'Nagpur Mandi', 'Cotton', '', 5600, 5600, 5600)
+]
+
+mandi_prices = MandiPriceIndex(MANDI_DB_FILE, fallback=MANDI_SAMPLE_PRICES)
+
+
+def market_prices_view(args):
+    """Return (etag, build) for the market prices described by request args"""
+    filters = {f: args[f].strip() for f in MANDI_FILTER_FIELDS if (args.get(f) or '').strip() not in ('', 'all', 'All')}
+    start = parse_date(args.get('start'))
+    end = parse_date(args.get('end'))
+    # Latest price per mandi unless asked otherwise or a date range is given
+    latest = args.get('latest', 'false' if start or end else 'true').lower() not in ('0', 'false', 'no')
+    limit = int(args.get('limit', MANDI_DEFAULT_PAGE_SIZE))
+    # table() checks the store for new ingests, so revalidating clients see them too
+    table = mandi_prices.table()
+
+    def build():
+        prices, next_cursor, total = mandi_prices.query(
+            filters, start=start, end=end, latest=latest,
+            sort=args.get('sort', 'date'), order=args.get('order'),
+            cursor=args.get('cursor'), limit=limit, table=table
+        )
+        return {'prices': prices, 'next_cursor': next_cursor, 'total': total}
+
+    return version_etag(table.version, args.to_dict()), build
 
 
 @app.route('/api/market-prices', methods=['GET'])
 def api_market_prices():
-    """Return mocked market prices. Supports optional ?commodity= and ?state="""
+    """Return mandi prices. Filters: ?commodity= (prefix/substring), ?state=, ?mandi=, ?start=&end= (ISO dates),
+    ?latest=true|false, ?sort=date|price|commodity|mandi|state, ?order=asc|desc, ?limit=, ?cursor="""
     try:
-        commodity = (request.args.get('commodity') or '').strip().lower()
-        state = (request.args.get('state') or '').strip()
-
-        # Mocked dataset
-        base = [
-            {'commodity': 'Wheat', 'mandi': 'Ludhiana Mandi', 'state': 'Punjab', 'price': 2150, 'unit': 'quintal', 'updated': datetime.now().strftime('%Y-%m-%d %H:%M')},
-            {'commodity': 'Rice', 'mandi': 'Pune Mandi', 'state': 'Maharashtra', 'price': 1950, 'unit': 'quintal', 'updated': datetime.now().strftime('%Y-%m-%d %H:%M')},
-            {'commodity': 'Maize', 'mandi': 'Lucknow Mandi', 'state': 'Uttar Pradesh', 'price': 1800, 'unit': 'quintal', 'updated': datetime.now().strftime('%Y-%m-%d %H:%M')},
-            {'commodity': 'Wheat', 'mandi': 'Amritsar Mandi', 'state': 'Punjab', 'price': 2120, 'unit': 'quintal', 'updated': datetime.now().strftime('%Y-%m-%d %H:%M')},
-            {'commodity': 'Cotton', 'mandi': 'Nagpur Mandi', 'state': 'Maharashtra', 'price': 5600, 'unit': 'quintal', 'updated': datetime.now().strftime('%Y-%m-%d %H:%M')}
-        ]
-
-        filtered = []
-        for r in base:
-            if commodity and commodity not in r['commodity'].lower():
-                continue
-            if state and state.lower() != 'all' and state != r['state']:
-                continue
-            filtered.append(r)
-
-        # If nothing matched and no filters, return base
-        out = filtered if (commodity or state) else base
-        return jsonify({'prices': out})
+        etag, build = market_prices_view(request.args)
+        return conditional_json(request, etag, build)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
-# Static file route (serve CSS/JS/images from project root)
+@app.route('/api/market-prices/stats', methods=['GET'])
+@no_compression
+def api_market_prices_stats():
+    """Return mandi price index statistics"""
+    return jsonify(mandi_prices.stats())
+
+
+# Static file route (serve CSS/JS/images from memory, fingerprinted names are cached forever)
 @app.route('/<path:filename>')
+@no_compression
 def static_files(filename):
-    return send_from_directory('.', filename)
+    return static_assets.send(filename)
 
 @app.route('/api/analyze', methods=['POST'])
 def analyze():
     try:
         data = request.form.to_dict()
         
-        # Handle image upload
-        image_path = None
+        # Handle image upload: the file is written by a background worker and
+        # the response carries an upload handle that can be polled for the
+        # stored (content-addressed) path
+        upload = None
         if 'image' in request.files:
             file = request.files['image']
             if file and allowed_file(file.filename):
                 filename = secure_filename(file.filename)
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f"{timestamp}_{filename}"
-                image_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(image_path)
+                # request.close() would shut the file once this view returns,
+                # so hand the underlying file object over to the upload queue
+                stream, file.stream = file.stream, io.BytesIO()
+                upload = upload_queue.submit(stream, filename)
+                upload['status_url'] = f"/api/uploads/{upload['id']}"
         
         # Get weather data
         weather = get_weather_data(data.get('region'))
@@ -302,212 +498,616 @@ def analyze():
         # Analyze disease symptoms
         disease_analysis = []
         if data.get('symptoms'):
-            disease_analysis = analyze_disease(data.get('symptoms'), image_path)
-        
-        # pH analysis
-        ph = float(data.get('ph', 7.0))
-        ph_status = "Optimal" if 6.5 <= ph <= 7.5 else "Needs Adjustment"
-        ph_advice = ""
-        if ph < 6.5:
-            ph_advice = "Soil is acidic. Add lime to increase pH."
-        elif ph > 7.5:
-            ph_advice = "Soil is alkaline. Add organic matter or sulfur to decrease pH."
-        else:
-            ph_advice = "Soil pH is in optimal range for most crops."
+            disease_analysis = analyze_disease(data.get('symptoms'))
         
         result = {
             "success": True,
             "weather": weather,
             "crop_recommendations": crop_recommendations[:5],  # Top 5 crops
             "disease_analysis": disease_analysis,
-            "ph_analysis": {
-                "value": ph,
-                "status": ph_status,
-                "advice": ph_advice
-            },
+            "ph_analysis": analyze_ph(float(data.get('ph', 7.0))),
             "planting_calendar": generate_planting_calendar(data.get('season'), crop_recommendations[:3])
         }
+        if upload is not None:
+            result["upload"] = upload
         
         return jsonify(result)
     
+    except QueueFullError as e:
+        response = jsonify({"success": False, "error": str(e)})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 400
 
 
+# Batch analysis: rows are scored this many at a time so memory stays bounded
+BATCH_CHUNK_SIZE = 2000
+BATCH_CSV_COLUMNS = [
+    'row', 'success', 'region', 'season', 'soil_type', 'ph', 'ph_status',
+    'top_crop', 'top_roi', 'crops', 'planting_time', 'harvest_time',
+    'temperature', 'humidity', 'weather', 'error'
+]
+BATCH_REQUIRED_FIELDS = ('region', 'season', 'soil_type', 'water_availability')
+BATCH_OUTPUT_FORMATS = ('ndjson', 'csv')
+
+def _parse_batch_profile(record):
+    """Turn one uploaded row into a CropIndex profile tuple (raises ValueError on bad numbers)"""
+    if '_error' in record:
+        raise ValueError(record['_error'])
+    for field in BATCH_REQUIRED_FIELDS:
+        if record.get(field) is None:
+            raise ValueError(f"missing {field}")
+        if not isinstance(record.get(field), str):
+            raise ValueError(f"{field} must be a string")
+    return (
+        record.get('region'),
+        record.get('season'),
+        record.get('soil_type'),
+        record.get('water_availability'),
+        float(record.get('ph') or 7.0),
+        float(record.get('acres') or 1),
+        float(record.get('budget') or 10000)
+    )
+
+def iter_batch_results(records):
+    """Yield one analysis dict per uploaded record, scoring each chunk in one vectorized pass"""
+    weather_by_region = {}
+    row_number = 0
+    for chunk in batch_io.chunked(records, BATCH_CHUNK_SIZE):
+        profiles, errors = [], {}
+        for i, record in enumerate(chunk):
+            try:
+                profiles.append(_parse_batch_profile(record))
+            except (TypeError, ValueError) as e:
+                profiles.append(None)
+                errors[i] = str(e)
+
+        valid = [p for p in profiles if p is not None]
+        recommendations = iter(crop_index.recommend_many(valid, limit=5))
+
+        for i, profile in enumerate(profiles):
+            row_number += 1
+            if profile is None:
+                yield {'row': row_number, 'success': False, 'error': errors[i]}
+                continue
+
+            region, season, soil_type = profile[:3]
+            # Weather is fetched once per region for the whole upload
+            if region not in weather_by_region:
+                weather_by_region[region] = get_weather_data(region)
+            crops = next(recommendations)
+            yield {
+                'row': row_number,
+                'success': True,
+                'region': region,
+                'season': season,
+                'soil_type': soil_type,
+                'weather': weather_by_region[region],
+                'crop_recommendations': crops,
+                'ph_analysis': analyze_ph(profile[4]),
+                'planting_calendar': generate_planting_calendar(season, crops[:3])
+            }
+
+def _batch_csv_values(result):
+    """Flatten one batch result into the BATCH_CSV_COLUMNS order"""
+    if not result['success']:
+        return [result['row'], False] + [''] * (len(BATCH_CSV_COLUMNS) - 3) + [result['error']]
+    crops = result['crop_recommendations']
+    calendar = result['planting_calendar'][0] if result['planting_calendar'] else {}
+    weather = result['weather']
+    return [
+        result['row'], True, result['region'], result['season'], result['soil_type'],
+        result['ph_analysis']['value'], result['ph_analysis']['status'],
+        crops[0]['name'] if crops else '', crops[0]['roi'] if crops else '',
+        ';'.join(c['name'] for c in crops),
+        calendar.get('planting_time', ''), calendar.get('harvest_time', ''),
+        weather.get('temperature'), weather.get('humidity'), weather.get('description'), ''
+    ]
+
+@app.route('/api/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """Analyze many farm profiles uploaded as CSV or NDJSON.
+
+    The upload is either the raw request body (Content-Type text/csv or
+    application/x-ndjson) or a multipart file field named 'file'. Results are
+    streamed back as NDJSON (default) or CSV with ?format=csv.
+    """
+    try:
+        out_format = (request.args.get('format') or 'ndjson').lower()
+        if out_format not in BATCH_OUTPUT_FORMATS:
+            return jsonify({"success": False, "error": f"format must be one of: {', '.join(BATCH_OUTPUT_FORMATS)}"}), 400
+        upload = request.files.get('file')
+        if upload is not None:
+            # request.close() shuts uploaded files as soon as this view returns,
+            # before the streamed response is generated, so take ownership of
+            # the file object here (iter_records closes it when done)
+            stream, upload.stream = upload.stream, io.BytesIO()
+            in_format = batch_io.detect_format(upload.mimetype, upload.filename)
+        else:
+            stream = request.stream
+            in_format = batch_io.detect_format(request.content_type)
+
+        results = iter_batch_results(batch_io.iter_records(stream, in_format, required=BATCH_REQUIRED_FIELDS))
+
+        if out_format == 'csv':
+            def generate():
+                yield batch_io.csv_line(BATCH_CSV_COLUMNS)
+                for result in results:
+                    yield batch_io.csv_line(_batch_csv_values(result))
+            mimetype = batch_io.CSV_MIMETYPE
+        else:
+            def generate():
+                for result in results:
+                    yield batch_io.ndjson_line(result)
+            mimetype = batch_io.NDJSON_MIMETYPE
+
+        return Response(stream_with_context(generate()), mimetype=mimetype)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+
+@app.route('/api/uploads/stats', methods=['GET'])
+@no_compression
+def upload_stats():
+    """Return upload queue and image store counters (dedup hits, swept files)"""
+    return jsonify({"queue": upload_queue.stats(), "store": image_store.stats()})
+
+
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+def upload_status(upload_id):
+    """Return the save status of an image uploaded through /api/analyze"""
+    status = upload_queue.status(upload_id)
+    if status is None:
+        return jsonify({"success": False, "error": "Upload not found"}), 404
+    return jsonify({"success": True, "upload": status})
+
+
+# Heatmap layer: everything derived from heatmap.get_heatmap_data() is built
+# once per data refresh (serialized /api/heatmap body, indexed zone and alert
+# stores) instead of on every request
+HEATMAP_FILTER_FIELDS = ('state', 'district', 'crop', 'season')
+heatmap_payload = None
+zone_store = RecordStore(indexed_fields=HEATMAP_FILTER_FIELDS, wildcard_fields=('season',))
+alert_store = RecordStore(indexed_fields=HEATMAP_FILTER_FIELDS + ('severity',), wildcard_fields=('season',))
+heatmap_grid = HeatmapGrid()
+
+# Zones are scored from district weather against the disease catalog
+# (CSS/disease.py) for every crop shown on the heatmap page
+HEATMAP_CROPS = ['Rice', 'Wheat', 'Cotton', 'Sugarcane', 'Soybean', 'Onion']
+disease_catalog = load_disease_catalog(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'CSS', 'disease.py'))
+# Districts reported without coordinates are placed at their state's centroid
+risk_engine = RiskEngine(disease_catalog, HEATMAP_CROPS, centroids=heatmap_module.STATE_CENTROIDS)
+# Keeps zones, grid and per-state versions up to date as district weather changes
+heatmap_layer = HeatmapLayer(risk_engine, zone_store, heatmap_grid)
+# Daily risk history per state x crop, rolled up for /api/trend-data
+trend_store = TrendStore()
+TREND_DEFAULT_MONTHS = 12
+TREND_DEFAULT_POINTS = 12
+
+# Side-panel details per (state, district, crop, season), rebuilt only when the
+# state's risk layer version changes
+REGION_DEFAULT_SEASON = 'Kharif'
+REGION_MAX_RECOMMENDATIONS = 4
+REGION_ROUTINE_RECOMMENDATIONS = [
+    'Continue routine field scouting for early symptoms',
+    'Maintain field sanitation and balanced fertilization'
+]
+REGION_VIEWS_MAX_ENTRIES = 4096
+disease_treatments = {d.get('name', key): d.get('treatment', []) for key, d in disease_catalog.items()}
+
+def build_alerts(src):
+    """Build alert records from heatmap entries"""
+    now = datetime.now().isoformat()
+    alerts = []
+    for i, item in enumerate(src):
+        alerts.append({
+            'id': i + 1,
+            'disease': item.get('description', 'Unknown Disease'),
+            'crop': item.get('crop', 'Mixed'),
+            'state': item.get('region', 'Unknown'),
+            'district': item.get('district', f"District {i+1}"),
+            'season': item.get('season'),
+            'severity': item.get('level', 'Medium').capitalize(),
+            'affected_area': item.get('affected_area', (i + 1) * 10),
+            'message': f"{item.get('description', 'Reported issue')} in {item.get('region', 'region')}",
+            'date': now
+        })
+    return alerts
+
+def refresh_heatmap_data():
+    """Rebuild every cached heatmap view from heatmap.get_heatmap_data()"""
+    global heatmap_payload
+    try:
+        data = heatmap_module.get_heatmap_data()
+    except Exception:
+        data = []
+    heatmap_payload = JsonPayload(data)
+    try:
+        districts = heatmap_module.get_district_weather()
+    except Exception:
+        districts = []
+    heatmap_layer.rebuild(districts)
+    record_risk_trends({d['state'] for d in districts})
+    materialize_region_details({(d['state'], d['district']) for d in districts})
+    alert_store.load(build_alerts(data))
+    return heatmap_payload
+
+
+def record_risk_trends(states):
+    """Set today's mean zone risk per crop for each state in the trend store (replacing earlier values)"""
+    today = datetime.now().date()
+    observations = []
+    for state in states:
+        for crop in HEATMAP_CROPS:
+            zones, _, total = zone_store.query({'state': state, 'crop': crop}, fields=['risk_score'])
+            if total:
+                observations.append((state, crop, today, sum(z['risk_score'] for z in zones) / total))
+    trend_store.set(observations)
+
+
+def build_region_details(key):
+    """Join the risk zone and catalog treatments for one (state, district, crop, season)"""
+    state, district, crop, season = key
+    zones, _, total = zone_store.query({'state': state, 'district': district, 'crop': crop, 'season': season}, limit=1)
+    if not total:
+        return None
+    zone = zones[0]
+    treatments = [t for name in zone['diseases'] for t in disease_treatments.get(name, [])]
+    recommendations = list(dict.fromkeys(treatments))[:REGION_MAX_RECOMMENDATIONS] or REGION_ROUTINE_RECOMMENDATIONS
+    return {
+        'state': state,
+        'district': district,
+        'crop': crop,
+        'season': season,
+        'risk_level': zone['risk_level'],
+        'risk_score': zone['risk_score'],
+        'humidity': zone['humidity'],
+        'temperature': zone['temperature'],
+        'rainfall': zone['rainfall'],
+        'diseases': zone['diseases'],
+        'recommendations': recommendations,
+        'affected_area': zone['affected_area'],
+        'last_updated': datetime.now().isoformat()
+    }
+
+
+region_views = MaterializedViews(
+    build_region_details,
+    stamp=lambda key: heatmap_layer.version(key[0]),
+    max_entries=REGION_VIEWS_MAX_ENTRIES
+)
+
+
+def materialize_region_details(districts):
+    """Pre-build the default-season details of every crop in the given (state, district) pairs"""
+    region_views.materialize(
+        (state, district, crop, REGION_DEFAULT_SEASON) for state, district in districts for crop in HEATMAP_CROPS
+    )
+
+trend_store.extend(heatmap_module.get_trend_history(HEATMAP_CROPS))
+refresh_heatmap_data()
+
+
 @app.route('/api/heatmap', methods=['GET'])
 def api_heatmap():
-    """Return heatmap data as JSON by calling heatmap.get_heatmap_data()."""
+    """Return heatmap data as JSON (serialized once per data version, supports If-None-Match)."""
     try:
-        # First try the imported module
-        try:
-            data = heatmap_module.get_heatmap_data()
-        except Exception:
-            data = None
-
-        # If data looks like a requests.Response or not serializable, load local file directly
-        def _is_serializable(val):
-            try:
-                json.dumps(val)
-                return True
-            except Exception:
-                return isinstance(val, (dict, list, str, int, float, type(None)))
-
-        if not _is_serializable(data):
-            # load the local heatmap.py explicitly to avoid package shadowing
-            import importlib.util
-            base = os.path.dirname(__file__)
-            heatmap_path = os.path.join(base, 'heatmap.py')
-            spec = importlib.util.spec_from_file_location('local_heatmap', heatmap_path)
-            local_heatmap = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(local_heatmap)
-            data = local_heatmap.get_heatmap_data()
-
-        # Use json.dumps with default=str to avoid serialization errors for unknown objects
-        return app.response_class(json.dumps(data, default=str), mimetype='application/json')
+        return payload_response(heatmap_payload, request)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/alerts', methods=['GET'])
-def api_alerts():
-    """Return a short list of recent alerts (mocked). Accepts optional ?limit=N"""
-    try:
-        limit = int(request.args.get('limit', 6))
-        base = []
-        # Build alerts from heatmap data if available
-        try:
-            src = heatmap_module.get_heatmap_data()
-        except Exception:
-            src = []
-
-        for i, item in enumerate(src):
-            base.append({
-                'id': i + 1,
-                'disease': item.get('description', 'Unknown Disease'),
-                'crop': item.get('crop', 'Mixed'),
-                'state': item.get('region', 'Unknown'),
-                'district': item.get('district', f"District {i+1}"),
-                'severity': item.get('level', 'Medium').capitalize(),
-                'affected_area': item.get('affected_area', (i + 1) * 10),
-                'message': f"{item.get('description', 'Reported issue')} in {item.get('region', 'region')}",
-                'date': datetime.now().isoformat()
-            })
+def alerts_view(args):
+    """Return (etag, build) for the alerts list described by request args"""
+    # Clamped once so the mock padding below is bounded like the store query
+    limit = max(0, min(int(args.get('limit', 6)), MAX_PAGE_SIZE))
+    filters = parse_filters(args, alert_store.indexed_fields)
+    fields = parse_fields(args)
+
+    def build():
+        alerts, next_cursor, total = alert_store.query(
+            filters, cursor=args.get('cursor'), limit=limit, fields=fields
+        )
 
         # Add some extra mock alerts if heatmap source is small
-        while len(base) < limit:
-            idx = len(base) + 1
-            base.append({
-                'id': idx,
-                'disease': 'Leaf Blight',
-                'crop': 'Rice',
-                'state': 'Punjab',
-                'district': f'District {idx}',
-                'severity': 'High' if idx % 2 == 0 else 'Medium',
-                'affected_area': idx * 5,
-                'message': 'Field reports of rapid leaf blight spread',
-                'date': datetime.now().isoformat()
-            })
+        if not filters and not args.get('cursor'):
+            while len(alerts) < limit:
+                idx = len(alerts) + 1
+                alert = {
+                    'id': idx,
+                    'disease': 'Leaf Blight',
+                    'crop': 'Rice',
+                    'state': 'Punjab',
+                    'district': f'District {idx}',
+                    'severity': 'High' if idx % 2 == 0 else 'Medium',
+                    'affected_area': idx * 5,
+                    'message': 'Field reports of rapid leaf blight spread',
+                    'date': datetime.now().isoformat()
+                }
+                alerts.append({k: alert[k] for k in fields if k in alert} if fields else alert)
+        return {'alerts': alerts, 'next_cursor': next_cursor, 'total': total}
 
-        return jsonify({'alerts': base[:limit]})
+    # Alerts are rebuilt together with the heatmap payload
+    return version_etag(heatmap_payload.etag, args.to_dict()), build
+
+
+@app.route('/api/alerts', methods=['GET'])
+def api_alerts():
+    """Return recent alerts. Accepts ?limit=N, ?cursor=, ?fields=a,b and filters: state, district, crop, season, severity"""
+    try:
+        etag, build = alerts_view(request.args)
+        return conditional_json(request, etag, build)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def heatmap_data_view(args):
+    """Return (etag, build) for the heatmap zones described by request args"""
+    filters = parse_filters(args, HEATMAP_FILTER_FIELDS)
+    limit = args.get('limit')
+    limit = int(limit) if limit else None
+
+    def build():
+        zones, next_cursor, total = zone_store.query(
+            filters, cursor=args.get('cursor'), limit=limit, fields=parse_fields(args)
+        )
+        return {'data': zones, 'next_cursor': next_cursor, 'total': total}
+
+    # A state-filtered view only changes when that state's zones change
+    version = heatmap_layer.version(filters.get('state'))
+    return version_etag(version, args.to_dict()), build
+
+
 @app.route('/api/heatmap-data', methods=['GET'])
 def api_heatmap_data():
-    """Return detailed heatmap zones, supports filters: state, district, crop, season"""
+    """Return detailed heatmap zones, supports filters: state, district, crop, season; ?limit=, ?cursor=, ?fields="""
     try:
-        state = request.args.get('state', 'all')
-        district = request.args.get('district', 'all')
-        crop = request.args.get('crop', 'all')
-        season = request.args.get('season', None)
-
-        try:
-            src = heatmap_module.get_heatmap_data()
-        except Exception:
-            src = []
-
-        zones = []
-        # Convert simple heatmap entries into richer zone objects
-        for i, item in enumerate(src):
-            zone = {
-                'state': item.get('region', 'Unknown'),
-                'district': item.get('district', f'District {i+1}'),
-                'crop': item.get('crop', 'Rice'),
-                'risk_level': item.get('level', 'medium').capitalize(),
-                'risk_score': 80 if item.get('level') == 'high' else (55 if item.get('level') == 'medium' else 20),
-                'diseases': [item.get('description', 'Unknown')],
-                'humidity': 60 + i,
-                'temperature': 25 + i,
-                'affected_area': 10 * (i + 1),
-                'description': item.get('description', ''),
-            }
+        etag, build = heatmap_data_view(request.args)
+        return conditional_json(request, etag, build)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-            # Apply simple filters
-            if (state != 'all' and zone['state'] != state):
-                continue
-            if (district != 'all' and zone['district'] != district):
-                continue
-            if (crop != 'all' and zone['crop'] != crop):
-                continue
 
-            zones.append(zone)
+@app.route('/api/heatmap-grid', methods=['GET'])
+def api_heatmap_grid():
+    """Return pre-aggregated risk cells for a viewport: ?bbox=min_lon,min_lat,max_lon,max_lat&zoom=N
+
+    Cells are equirectangular lat/lon cells (see heatmap_grid.py). The dashboard
+    renders zone cards, not a map, so this endpoint is for API clients only.
+    """
+    try:
+        bbox = parse_bbox(request.args.get('bbox', '-180,-90,180,90'))
+        zoom = int(request.args.get('zoom', heatmap_grid.min_zoom))
+
+        def build():
+            zoom_used, cells = heatmap_grid.query(bbox, zoom)
+            return {'zoom': zoom_used, 'bbox': bbox, 'cells': cells}
 
-        return jsonify({'data': zones})
+        return conditional_json(request, version_etag(heatmap_layer.version(), request.args.to_dict()), build)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+DISTRICT_NUMERIC_FIELDS = ('temperature', 'humidity', 'rainfall', 'cropped_area', 'lat', 'lon')
+
+
+@app.route('/api/district-weather', methods=['POST'])
+def api_district_weather():
+    """Accept district weather observations and re-score only the districts that changed.
+
+    Body: a JSON list (or {"districts": [...]}) of objects with state, district,
+    temperature, humidity and optionally rainfall, cropped_area, season, lat, lon.
+    """
+    try:
+        payload = request.get_json(silent=True)
+        observations = payload.get('districts') if isinstance(payload, dict) else payload
+        if not isinstance(observations, list):
+            return jsonify({'success': False, 'error': 'Expected a list of district observations'}), 400
+        for obs in observations:
+            missing = [f for f in ('state', 'district', 'temperature', 'humidity') if not isinstance(obs, dict) or obs.get(f) is None]
+            if missing:
+                return jsonify({'success': False, 'error': f"Observation missing {', '.join(missing)}"}), 400
+            for f in DISTRICT_NUMERIC_FIELDS:
+                if obs.get(f) is not None:
+                    try:
+                        obs[f] = float(obs[f])
+                    except (TypeError, ValueError):
+                        obs[f] = None
+                    if obs[f] is None or not math.isfinite(obs[f]):
+                        return jsonify({'success': False, 'error': f"Observation {f} must be a number"}), 400
+            # Without coordinates or a known state centroid the zone could not be placed on the grid
+            if (obs.get('lat') is None or obs.get('lon') is None) and obs['state'] not in risk_engine.centroids:
+                return jsonify({'success': False, 'error': f"Observation for {obs['state']} needs lat and lon"}), 400
+
+        changed = heatmap_layer.update_districts(observations)
+        record_risk_trends({s for s, _ in changed})
+        materialize_region_details(changed)
+        return jsonify({
+            'success': True,
+            'changed': [{'state': s, 'district': d} for s, d in changed],
+            'versions': heatmap_layer.versions()
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def region_details_key(args):
+    return (
+        args.get('state'),
+        args.get('district'),
+        args.get('crop') or 'Rice',
+        args.get('season') or REGION_DEFAULT_SEASON
+    )
+
+
+def placeholder_region_details(key):
+    """Mocked details for requests that do not name a state and district"""
+    state, district, crop, season = key
+    return {
+        'state': state or 'Unknown',
+        'district': district or 'Unknown District',
+        'crop': crop,
+        'season': season,
+        'risk_level': 'High',
+        'risk_score': 82,
+        'humidity': 72,
+        'temperature': 29,
+        'diseases': ['Leaf Blight', 'Rust'],
+        'recommendations': [
+            'Apply recommended fungicide (follow label instructions)',
+            'Remove heavily infected plants and burn debris',
+            'Rotate crop and improve drainage'
+        ],
+        'affected_area': 45,
+        'last_updated': datetime.now().isoformat()
+    }
+
+
+def region_details_view(args):
+    """Return (etag, build) for one region's materialized details (build returns None if unknown)"""
+    key = region_details_key(args)
+    if not key[0] or not key[1]:
+        return version_etag('placeholder', {'key': repr(key)}), lambda: placeholder_region_details(key)
+    return version_etag(heatmap_layer.version(key[0]), {'key': repr(key)}), lambda: region_views.get(key)
+
+
 @app.route('/api/region-details', methods=['GET'])
 def api_region_details():
-    """Return a detailed payload for one region/district/crop combination"""
-    try:
-        state = request.args.get('state', None)
-        district = request.args.get('district', None)
-        crop = request.args.get('crop', None)
-
-        # For this dev version return a mocked detail object
-        details = {
-            'state': state or 'Unknown',
-            'district': district or 'Unknown District',
-            'crop': crop or 'Rice',
-            'season': request.args.get('season', 'Kharif'),
-            'risk_level': 'High',
-            'risk_score': 82,
-            'humidity': 72,
-            'temperature': 29,
-            'diseases': ['Leaf Blight', 'Rust'],
-            'recommendations': [
-                'Apply recommended fungicide (follow label instructions)',
-                'Remove heavily infected plants and burn debris',
-                'Rotate crop and improve drainage'
-            ],
-            'affected_area': 45,
-            'last_updated': datetime.now().isoformat()
-        }
+    """Return the materialized detail view for one state/district/crop/season combination.
 
-        return jsonify(details)
+    Without a state and district the old mocked details are returned; a combination
+    with no risk zone is a 404.
+    """
+    try:
+        etag, build = region_details_view(request.args)
+        details = build()
+        if details is None:
+            return jsonify({'error': 'No risk data for this region'}), 404
+        return conditional_json(request, etag, lambda: details)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/region-details/stats', methods=['GET'])
+@no_compression
+def api_region_details_stats():
+    """Return materialized region view cache statistics"""
+    return jsonify(region_views.stats())
+
+
+def trend_data_view(args):
+    """Return (etag, build) for the risk trend described by request args"""
+    # The dashboard sends 'all' for unfiltered selects; trends have an All-states series but no all-crops one
+    state = args.get('state') if args.get('state') not in (None, '', 'all', 'All') else 'All'
+    crop = args.get('crop') if args.get('crop') not in (None, '', 'all', 'All') else 'Rice'
+    end = parse_date(args.get('end'))
+    start = parse_date(args.get('start'))
+    if start is None and end is None:
+        start = months_ago(datetime.now().date(), TREND_DEFAULT_MONTHS - 1)
+    points = args.get('points')
+    points = int(points) if points else TREND_DEFAULT_POINTS
+
+    def build():
+        trend = trend_store.query(
+            state, crop, start=start, end=end,
+            resolution=args.get('resolution', 'auto'),
+            points=points,
+            agg=args.get('agg', 'mean')
+        )
+        trend.update({'crop': crop, 'state': state})
+        return trend
+
+    return version_etag(trend_store.version, args.to_dict()), build
+
+
 @app.route('/api/trend-data', methods=['GET'])
 def api_trend_data():
-    """Return monthly trend data for a crop in a state (mocked)"""
+    """Return a disease-risk trend for a crop in a state from the trend store.
+
+    Optional: ?start=&end= (ISO dates, default the last 12 months),
+    ?resolution=auto|daily|weekly|monthly, ?points= (default 12, LTTB downsampled)
+    and ?agg=mean|max|sum|count.
+    """
     try:
-        state = request.args.get('state', 'All')
-        crop = request.args.get('crop', 'Rice')
-
-        labels = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-        # Simple synthetic data that varies by crop
-        base = {
-            'Rice': [30, 28, 35, 40, 55, 70, 85, 78, 60, 50, 35, 30],
-            'Wheat': [20, 18, 22, 30, 45, 50, 40, 35, 30, 25, 22, 20]
-        }
+        etag, build = trend_data_view(request.args)
+        return conditional_json(request, etag, build)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# Sections of /api/heatmap-bootstrap: name -> (view, request args its standalone endpoint is called with)
+BOOTSTRAP_SECTIONS = {
+    'heatmap-data': (heatmap_data_view, HEATMAP_FILTER_FIELDS),
+    'alerts': (alerts_view, ('limit',)),
+    'trend-data': (trend_data_view, ('state', 'crop')),
+    'region-details': (region_details_view, HEATMAP_FILTER_FIELDS)
+}
+# region-details describes one district and crop, so it needs both selected
+REGION_DETAILS_REQUIRED = ('district', 'crop')
+bootstrap_executor = ThreadPoolExecutor(max_workers=len(BOOTSTRAP_SECTIONS), thread_name_prefix='bootstrap')
+
+
+def parse_section_etags(raw):
+    """Parse ?have=section:etag,section:etag into a dict"""
+    have = {}
+    for part in (raw or '').split(','):
+        name, sep, etag = part.strip().partition(':')
+        if sep and etag:
+            have[name] = etag
+    return have
+
+
+def build_section(name, args, have):
+    """Build one bootstrap section, or mark it not_modified when the client's ETag matches"""
+    view, fields = BOOTSTRAP_SECTIONS[name]
+    # Same args (empty ones included) as the standalone call, so the section ETag matches that endpoint's
+    section_args = MultiDict([(f, args[f]) for f in fields if f in args])
+    try:
+        etag, build = view(section_args)
+        if have.get(name) == etag:
+            return {'etag': etag, 'not_modified': True}
+        data = build()
+        if data is None:
+            return {'error': f'No {name} for these filters', 'status': 404}
+        return {'etag': etag, 'data': data}
+    except ValueError as e:
+        return {'error': str(e), 'status': 400}
+    except Exception as e:
+        return {'error': str(e), 'status': 500}
 
-        data = base.get(crop, [25 + (i % 6) * 5 for i in range(12)])
 
-        return jsonify({'labels': labels, 'data': data, 'crop': crop})
+@app.route('/api/heatmap-bootstrap', methods=['GET'])
+def api_heatmap_bootstrap():
+    """Return heatmap-data, alerts, trend-data and region-details for the dashboard in one response.
+
+    Takes the dashboard filters (state, district, crop, season) and ?have=section:etag,...
+    listing sections the client already holds; those come back as not_modified.
+    region-details is only included when a district and a crop are selected.
+    ?sections=a,b limits the response to some sections.
+    """
+    try:
+        args = request.args
+        have = parse_section_etags(args.get('have'))
+        names = [n.strip() for n in args.get('sections', '').split(',') if n.strip()] or list(BOOTSTRAP_SECTIONS)
+        unknown = [n for n in names if n not in BOOTSTRAP_SECTIONS]
+        if unknown:
+            return jsonify({'error': f"Unknown sections: {', '.join(unknown)}"}), 400
+        if len(parse_filters(args, REGION_DETAILS_REQUIRED)) < len(REGION_DETAILS_REQUIRED):
+            names = [n for n in names if n != 'region-details']
+
+        futures = {n: bootstrap_executor.submit(build_section, n, args, have) for n in names}
+        sections = {n: f.result() for n, f in futures.items()}
+        return jsonify({'sections': sections})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -541,15 +1141,12 @@ def api_weather():
         # If a real API key is configured, attempt to fetch live data
         if WEATHER_API_KEY and WEATHER_API_KEY != 'your_api_key_here':
             try:
-                current_url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={WEATHER_API_KEY}&units=metric"
-                r = requests.get(current_url, timeout=5)
-                if r.status_code != 200:
+                bundle = fetch_weather_bundle(city)
+                current = bundle['current']
+                if current is None:
                     raise Exception('City not found')
-                current = r.json()
-
-                forecast_url = f"http://api.openweathermap.org/data/2.5/forecast?q={city}&appid={WEATHER_API_KEY}&units=metric"
-                rf = requests.get(forecast_url, timeout=5)
-                forecast_raw = rf.json()
+                forecast_raw = bundle['forecast'] or {}
+                onecall = bundle['alerts'] or {}
 
                 # Build simplified payload
                 current_weather = {
@@ -589,28 +1186,24 @@ def api_weather():
                         if len(daily_forecast) >= 5:
                             break
 
-                # Try to fetch alerts via OneCall (optional)
+                # Alerts come from OneCall (optional)
                 alerts = []
-                try:
-                    lat = current['coord']['lat']
-                    lon = current['coord']['lon']
-                    onecall = requests.get(f"https://api.openweathermap.org/data/2.5/onecall?lat={lat}&lon={lon}&appid={WEATHER_API_KEY}&units=metric", timeout=5).json()
-                    for a in onecall.get('alerts', []):
-                        alerts.append({
-                            'event': a.get('event'),
-                            'description': a.get('description'),
-                            'start': datetime.fromtimestamp(a.get('start')).strftime('%Y-%m-%d %H:%M') if a.get('start') else '',
-                            'end': datetime.fromtimestamp(a.get('end')).strftime('%Y-%m-%d %H:%M') if a.get('end') else ''
-                        })
-                except Exception:
-                    # ignore onecall failures
-                    pass
+                for a in onecall.get('alerts', []):
+                    alerts.append({
+                        'event': a.get('event'),
+                        'description': a.get('description'),
+                        'start': datetime.fromtimestamp(a.get('start')).strftime('%Y-%m-%d %H:%M') if a.get('start') else '',
+                        'end': datetime.fromtimestamp(a.get('end')).strftime('%Y-%m-%d %H:%M') if a.get('end') else ''
+                    })
 
                 recommendations = [
                     {'type': 'info', 'title': 'Live Data', 'message': 'Recommendations based on current conditions.'}
                 ]
 
-                return jsonify({'current': current_weather, 'forecast': daily_forecast, 'alerts': alerts, 'recommendations': recommendations, 'source': 'live'})
+                # Parts that failed or missed the deadline are listed so the UI can tell
+                missing = [name for name in ('forecast', 'alerts') if bundle[name] is None]
+
+                return jsonify({'current': current_weather, 'forecast': daily_forecast, 'alerts': alerts, 'recommendations': recommendations, 'source': 'live', 'missing': missing})
             except Exception:
                 # If live fetch fails, fall back to mocked data below
                 pass
@@ -657,6 +1250,48 @@ def api_weather():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/weather/stats', methods=['GET'])
+@no_compression
+def api_weather_stats():
+    """Return weather cache counters and the upstream circuit breaker state"""
+    return jsonify({'cache': weather_cache.stats(), 'breaker': weather_breaker.stats()})
+
+
+@app.route('/api/compression/stats', methods=['GET'])
+@no_compression
+def api_compression_stats():
+    """Return response compression and 304 counters (bytes saved)"""
+    return jsonify(compression.stats())
+
+
+# /api/batch: sub-requests per call, and routes that cannot be batched
+API_BATCH_MAX_REQUESTS = 20
+API_BATCH_BLOCKED = ('/api/batch',)
+api_batch_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='api-batch')
+
+
+@app.route('/api/batch', methods=['POST'])
+def api_batch():
+    """Run several API requests in one round-trip.
+
+    Body: {"requests": [{"id": ..., "method": "GET", "path": "/api/...", "params": {...},
+    "body": {...}, "headers": {...}}, ...]}. Returns {"responses": [...]} in the
+    same order, each with id, status, headers and body.
+    """
+    try:
+        payload = request.get_json(silent=True)
+        raw_requests = payload.get('requests') if isinstance(payload, dict) else None
+        if not isinstance(raw_requests, list) or not raw_requests:
+            return jsonify({'error': 'Expected {"requests": [...]} with at least one request'}), 400
+        if len(raw_requests) > API_BATCH_MAX_REQUESTS:
+            return jsonify({'error': f'At most {API_BATCH_MAX_REQUESTS} requests per batch'}), 400
+        sub_requests = [parse_sub_request(raw, i, blocked=API_BATCH_BLOCKED) for i, raw in enumerate(raw_requests)]
+        return jsonify({'responses': run_batch(app, sub_requests, api_batch_executor)})
+    except BatchRequestError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 def generate_planting_calendar(season, crops):
     """Generate planting calendar for recommended crops"""
     calendar = []
@@ -692,4 +1327,5 @@ Flask==2.3.0
 flask-cors==4.0.0
 requests==2.31.0
 Werkzeug==2.3.0
+numpy>=1.24
 """
\ No newline at end of file
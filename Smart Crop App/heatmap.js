@@ -1,5 +1,6 @@
 /* heatmap.js - enhanced dev frontend
-   - Calls backend endpoints: /api/heatmap-data, /api/alerts, /api/region-details, /api/trend-data
+   - Loads the dashboard with one /api/heatmap-bootstrap call (heatmap-data, alerts,
+     trend-data and region-details), falling back to the individual endpoints
    - Renders heatmap grid, recent alerts, region details and monthly trend chart
 */
 
@@ -8,21 +9,31 @@ const API_BASE = '/api';
 let heatmapData = [];
 let trendChart = null;
 
-async function loadHeatmap() {
+// Bootstrap sections from earlier responses ({name: {etag, data}}), reused when the server reports them unchanged
+const bootstrapSections = {};
+
+function currentFilters() {
+    return {
+        state: document.getElementById('stateFilter')?.value || 'all',
+        district: document.getElementById('districtFilter')?.value || 'all',
+        crop: document.getElementById('cropFilter')?.value || 'all',
+        season: document.getElementById('seasonFilter')?.value || ''
+    };
+}
+
+async function loadHeatmap(prefetched) {
     const container = document.getElementById('heatmapGrid');
     if (!container) return;
 
-    const state = document.getElementById('stateFilter')?.value || 'all';
-    const district = document.getElementById('districtFilter')?.value || 'all';
-    const crop = document.getElementById('cropFilter')?.value || 'all';
-    const season = document.getElementById('seasonFilter')?.value || '';
-
-    const params = new URLSearchParams({ state, district, crop, season });
+    const params = new URLSearchParams(currentFilters());
 
     try {
-        const res = await fetch(`${API_BASE}/heatmap-data?${params}`);
-        if (!res.ok) throw new Error('Failed to fetch heatmap-data');
-        const payload = await res.json();
+        let payload = prefetched;
+        if (!payload) {
+            const res = await fetch(`${API_BASE}/heatmap-data?${params}`);
+            if (!res.ok) throw new Error('Failed to fetch heatmap-data');
+            payload = await res.json();
+        }
         heatmapData = payload.data || [];
 
         if (heatmapData.length === 0) {
@@ -58,13 +69,16 @@ async function loadHeatmap() {
     }
 }
 
-async function loadAlerts(limit = 4) {
+async function loadAlerts(limit = 4, prefetched) {
     const container = document.getElementById('alertsContainer');
     if (!container) return;
     try {
-        const res = await fetch(`${API_BASE}/alerts?limit=${limit}`);
-        if (!res.ok) throw new Error('Failed to fetch alerts');
-        const payload = await res.json();
+        let payload = prefetched;
+        if (!payload) {
+            const res = await fetch(`${API_BASE}/alerts?limit=${limit}`);
+            if (!res.ok) throw new Error('Failed to fetch alerts');
+            payload = await res.json();
+        }
         const alerts = payload.alerts || [];
 
         if (alerts.length === 0) {
@@ -92,13 +106,16 @@ async function loadAlerts(limit = 4) {
     }
 }
 
-async function loadTrendChart() {
+async function loadTrendChart(prefetched) {
     try {
         const state = document.getElementById('stateFilter')?.value || 'All';
         const crop = document.getElementById('cropFilter')?.value || 'Rice';
-        const res = await fetch(`${API_BASE}/trend-data?state=${encodeURIComponent(state)}&crop=${encodeURIComponent(crop)}`);
-        if (!res.ok) throw new Error('Failed to fetch trend data');
-        const payload = await res.json();
+        let payload = prefetched;
+        if (!payload) {
+            const res = await fetch(`${API_BASE}/trend-data?state=${encodeURIComponent(state)}&crop=${encodeURIComponent(crop)}`);
+            if (!res.ok) throw new Error('Failed to fetch trend data');
+            payload = await res.json();
+        }
 
         const ctx = document.getElementById('trendChart');
         if (!ctx) return;
@@ -120,12 +137,45 @@ async function loadTrendChart() {
     }
 }
 
-function applyFilters() {
+function loadEachSection() {
     loadHeatmap();
     loadAlerts();
     loadTrendChart();
 }
 
+// One round-trip for the whole dashboard; sections we already hold are sent as
+// ?have=name:etag and come back as not_modified instead of in full
+async function loadDashboard(alertLimit = 4) {
+    const params = new URLSearchParams(currentFilters());
+    params.set('limit', String(alertLimit));
+    const have = Object.entries(bootstrapSections).map(([name, s]) => `${name}:${s.etag}`).join(',');
+    if (have) params.set('have', have);
+
+    try {
+        const res = await fetch(`${API_BASE}/heatmap-bootstrap?${params}`);
+        if (!res.ok) throw new Error('Failed to fetch dashboard bootstrap');
+        const { sections } = await res.json();
+
+        const data = {};
+        for (const [name, section] of Object.entries(sections || {})) {
+            if (section.error) continue;  // that loader falls back to its own endpoint
+            if (!section.not_modified) bootstrapSections[name] = { etag: section.etag, data: section.data };
+            data[name] = bootstrapSections[name]?.data;
+        }
+        loadHeatmap(data['heatmap-data']);
+        loadAlerts(alertLimit, data.alerts);
+        loadTrendChart(data['trend-data']);
+        if (data['region-details']) renderRegionDetails(data['region-details']);
+    } catch (err) {
+        console.error('loadDashboard error', err);
+        loadEachSection();
+    }
+}
+
+function applyFilters() {
+    loadDashboard();
+}
+
 function updateHeaderStats() {
     const activeOutbreaks = heatmapData.filter(z => (z.diseases || []).length > 0).length;
     const highRiskAreas = heatmapData.filter(z => (z.risk_level || '').toLowerCase() === 'high').length;
@@ -135,6 +185,32 @@ function updateHeaderStats() {
     if (hEl) hEl.textContent = String(highRiskAreas);
 }
 
+function renderRegionDetails(details) {
+    const regionDetails = document.getElementById('regionDetails');
+    if (!regionDetails) return;
+
+    regionDetails.innerHTML = `
+        <div class="detail-card">
+            <h4>📍 ${details.district}, ${details.state}</h4>
+            <p>Crop: <strong>${details.crop}</strong> • Season: ${details.season}</p>
+        </div>
+        <div class="detail-card">
+            <h4>⚠️ Risk Assessment</h4>
+            <p>Risk Level: <span class="risk-indicator ${details.risk_level.toLowerCase()}">${details.risk_level}</span></p>
+            <p>Risk Score: <strong>${details.risk_score}/100</strong></p>
+            <p>Last Updated: ${new Date(details.last_updated).toLocaleString()}</p>
+        </div>
+        <div class="detail-card">
+            <h4>🦠 Active Diseases</h4>
+            <ul>${(details.diseases || []).map(d => `<li>${d}</li>`).join('')}</ul>
+        </div>
+        <div class="detail-card">
+            <h4>💡 Recommendations</h4>
+            <ul>${(details.recommendations || []).map(r => `<li>${r}</li>`).join('')}</ul>
+        </div>
+    `;
+}
+
 // When clicking a heatmap zone, fetch region details from backend
 document.addEventListener('click', async function(e) {
     const zoneEl = e.target.closest('.heatmap-zone');
@@ -146,31 +222,7 @@ document.addEventListener('click', async function(e) {
     try {
         const res = await fetch(`${API_BASE}/region-details?state=${encodeURIComponent(state)}&district=${encodeURIComponent(district)}&crop=${encodeURIComponent(crop)}`);
         if (!res.ok) throw new Error('Failed to fetch region details');
-        const details = await res.json();
-
-        const regionDetails = document.getElementById('regionDetails');
-        if (!regionDetails) return;
-
-        regionDetails.innerHTML = `
-            <div class="detail-card">
-                <h4>📍 ${details.district}, ${details.state}</h4>
-                <p>Crop: <strong>${details.crop}</strong> • Season: ${details.season}</p>
-            </div>
-            <div class="detail-card">
-                <h4>⚠️ Risk Assessment</h4>
-                <p>Risk Level: <span class="risk-indicator ${details.risk_level.toLowerCase()}">${details.risk_level}</span></p>
-                <p>Risk Score: <strong>${details.risk_score}/100</strong></p>
-                <p>Last Updated: ${new Date(details.last_updated).toLocaleString()}</p>
-            </div>
-            <div class="detail-card">
-                <h4>🦠 Active Diseases</h4>
-                <ul>${(details.diseases || []).map(d => `<li>${d}</li>`).join('')}</ul>
-            </div>
-            <div class="detail-card">
-                <h4>💡 Recommendations</h4>
-                <ul>${(details.recommendations || []).map(r => `<li>${r}</li>`).join('')}</ul>
-            </div>
-        `;
+        renderRegionDetails(await res.json());
     } catch (err) {
         console.error('Error loading region details', err);
     }
@@ -1,10 +1,36 @@
 """Minimal heatmap data provider used by the dashboard backend.
 
-This module intentionally does NOT create a Flask app. It only exposes a
-function `get_heatmap_data()` which returns mock heatmap entries. This keeps
+This module intentionally does NOT create a Flask app. It only exposes
+`get_heatmap_data()`, which returns mock heatmap entries,
+`get_district_weather()`, which returns mock district weather used for
+risk scoring, and `get_trend_history()`, which returns mock daily risk
+history for the trend charts. This keeps
 imports safe (no side-effects) when other modules import `heatmap`.
 """
 
+# Approximate state centroids (lat, lon), used to place zones on the map when
+# an entry does not carry its own coordinates
+STATE_CENTROIDS = {
+    "Andhra Pradesh": (15.9, 79.7),
+    "Assam": (26.2, 92.9),
+    "Bihar": (25.1, 85.3),
+    "Delhi": (28.7, 77.1),
+    "Gujarat": (22.3, 71.2),
+    "Haryana": (29.1, 76.1),
+    "Karnataka": (15.3, 75.7),
+    "Kerala": (10.9, 76.3),
+    "Madhya Pradesh": (22.9, 78.7),
+    "Maharashtra": (19.7, 75.7),
+    "Odisha": (20.9, 85.1),
+    "Punjab": (31.1, 75.3),
+    "Rajasthan": (27.0, 74.2),
+    "Tamil Nadu": (11.1, 78.7),
+    "Telangana": (18.1, 79.0),
+    "Uttar Pradesh": (26.8, 80.9),
+    "West Bengal": (23.0, 87.9)
+}
+
+
 def get_heatmap_data():
     """Return a small list of mock heatmap items."""
     return [
@@ -14,6 +40,50 @@ def get_heatmap_data():
     ]
 
 
+def get_district_weather():
+    """Return mock per-district weather observations used to score disease risk.
+
+    temperature is in C, humidity in %, rainfall is mm over the last 7 days
+    and cropped_area is in acres. In production these come from the weather feed.
+    """
+    return [
+        {"state": "Punjab", "district": "Ludhiana", "lat": 30.90, "lon": 75.85, "temperature": 24, "humidity": 82, "rainfall": 35, "cropped_area": 120},
+        {"state": "Punjab", "district": "Amritsar", "lat": 31.63, "lon": 74.87, "temperature": 21, "humidity": 78, "rainfall": 20, "cropped_area": 95},
+        {"state": "Punjab", "district": "Patiala", "lat": 30.34, "lon": 76.39, "temperature": 26, "humidity": 70, "rainfall": 12, "cropped_area": 80},
+        {"state": "Uttar Pradesh", "district": "Lucknow", "lat": 26.85, "lon": 80.95, "temperature": 29, "humidity": 74, "rainfall": 18, "cropped_area": 110},
+        {"state": "Uttar Pradesh", "district": "Varanasi", "lat": 25.32, "lon": 82.97, "temperature": 31, "humidity": 68, "rainfall": 8, "cropped_area": 90},
+        {"state": "Uttar Pradesh", "district": "Agra", "lat": 27.18, "lon": 78.01, "temperature": 33, "humidity": 45, "rainfall": 0, "cropped_area": 70},
+        {"state": "Maharashtra", "district": "Pune", "lat": 18.52, "lon": 73.86, "temperature": 27, "humidity": 80, "rainfall": 42, "cropped_area": 100},
+        {"state": "Maharashtra", "district": "Nagpur", "lat": 21.15, "lon": 79.09, "temperature": 32, "humidity": 60, "rainfall": 10, "cropped_area": 85},
+        {"state": "Maharashtra", "district": "Nashik", "lat": 20.00, "lon": 73.79, "temperature": 26, "humidity": 85, "rainfall": 55, "cropped_area": 105}
+    ]
+
+
+# Seasonal risk profile per month (Jan..Dec) used to synthesize trend history
+TREND_PROFILES = {
+    "Rice": [30, 28, 35, 40, 55, 70, 85, 78, 60, 50, 35, 30],
+    "Wheat": [20, 18, 22, 30, 45, 50, 40, 35, 30, 25, 22, 20]
+}
+
+
+def get_trend_history(crops, days=3 * 365, today=None):
+    """Yield mock (state, crop, date, risk score) daily history for every state x crop.
+
+    In production this comes from recorded incidents and alerts.
+    """
+    from datetime import date, timedelta
+
+    today = today or date.today()
+    states = sorted({d["state"] for d in get_district_weather()})
+    for s, state in enumerate(states):
+        for c, crop in enumerate(crops):
+            profile = TREND_PROFILES.get(crop, [25 + (i % 6) * 5 for i in range(12)])
+            for offset in range(days, -1, -1):
+                day = today - timedelta(days=offset)
+                wobble = (day.toordinal() * 7 + s * 3 + c) % 9 - 4
+                yield state, crop, day, max(0, profile[day.month - 1] + 3 * s + wobble)
+
+
 if __name__ == '__main__':
     # Allow running this module directly for a quick smoke-test.
     # Prints JSON to stdout and exits with code 0.
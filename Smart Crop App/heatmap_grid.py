@@ -0,0 +1,196 @@
+"""Multi-resolution, pre-aggregated heatmap grid.
+
+At zoom z the map is a plain latitude/longitude (equirectangular) grid of
+2^z x 2^z cells, each 360/2^z degrees of longitude by 180/2^z of latitude;
+these are not Web Mercator tiles. Zones are binned at the finest zoom and
+rolled up level by level, keeping zone count, max/mean risk, affected area
+and centre per cell. `query()` returns only the cells inside a viewport; `update()`
+re-aggregates just the cells touched by changed zones.
+"""
+import math
+
+MIN_ZOOM = 2
+MAX_ZOOM = 10
+
+
+def tile_for(lat, lon, zoom):
+    """Return the (x, y) cell containing a coordinate at a zoom level"""
+    n = 1 << zoom
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((90.0 - lat) / 180.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_bbox(x, y, zoom):
+    """Return [min_lon, min_lat, max_lon, max_lat] of a cell"""
+    n = 1 << zoom
+    return [x / n * 360.0 - 180.0, 90.0 - (y + 1) / n * 180.0,
+            (x + 1) / n * 360.0 - 180.0, 90.0 - y / n * 180.0]
+
+
+def risk_level(score):
+    """Map a 0-100 risk score to the High/Medium/Low labels used by the UI"""
+    if score >= 70:
+        return 'High'
+    if score >= 40:
+        return 'Medium'
+    return 'Low'
+
+
+class HeatmapGrid:
+    """Pyramid of lat/lon grid cells holding risk aggregates, built from zones and patched incrementally"""
+
+    def __init__(self, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM):
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.levels = {z: {} for z in range(min_zoom, max_zoom + 1)}
+        self._zones = {}    # zone id -> (cell, risk, area, lat, lon) at the finest level
+        self._members = {}  # finest cell -> set of zone ids
+
+    def build(self, zones):
+        """Aggregate zones (dicts with lat, lon, risk_score, affected_area) into every level.
+
+        Zone ids are their positions in `zones`; update() uses the same ids.
+        """
+        self._zones, self._members = {}, {}
+        for zone_id, zone in enumerate(zones):
+            self._place(zone_id, zone)
+
+        levels = {self.max_zoom: {key: self._cell_from_members(key) for key in self._members}}
+        for zoom in range(self.max_zoom - 1, self.min_zoom - 1, -1):
+            parents = {}
+            for (x, y), child in levels[zoom + 1].items():
+                parent = parents.setdefault((x >> 1, y >> 1), self._empty())
+                self._add(parent, child['zones'], child['max_risk'], child['risk_sum'],
+                          child['affected_area'], child['lat_sum'], child['lon_sum'])
+            levels[zoom] = parents
+
+        self.levels = {zoom: {key: self._finish(zoom, key, cell) for key, cell in cells.items()}
+                       for zoom, cells in levels.items()}
+        return self
+
+    def update(self, changed):
+        """Re-aggregate only the cells touched by `changed` ({zone id: zone}) and their ancestors.
+
+        The new levels are built aside and swapped in at once, so a concurrent
+        query() never iterates a level while it changes.
+        """
+        levels = {zoom: dict(cells) for zoom, cells in self.levels.items()}
+        dirty = set()
+        for zone_id, zone in changed.items():
+            old = self._zones.pop(zone_id, None)
+            if old is not None:
+                dirty.add(old[0])
+                self._members[old[0]].discard(zone_id)
+            cell = self._place(zone_id, zone)
+            if cell is not None:
+                dirty.add(cell)
+
+        for zoom in range(self.max_zoom, self.min_zoom - 1, -1):
+            cells = levels[zoom]
+            for key in dirty:
+                if zoom == self.max_zoom:
+                    cell = self._cell_from_members(key)
+                else:
+                    cell = self._cell_from_children(levels[zoom + 1], key)
+                if cell['zones']:
+                    cells[key] = self._finish(zoom, key, cell)
+                else:
+                    cells.pop(key, None)
+                    if zoom == self.max_zoom:
+                        self._members.pop(key, None)
+            dirty = {(x >> 1, y >> 1) for x, y in dirty}
+        self.levels = levels
+        return self
+
+    def _place(self, zone_id, zone):
+        lat, lon = zone.get('lat'), zone.get('lon')
+        if lat is None or lon is None:
+            return None
+        cell = tile_for(lat, lon, self.max_zoom)
+        self._zones[zone_id] = (cell, zone.get('risk_score', 0), zone.get('affected_area', 0), lat, lon)
+        self._members.setdefault(cell, set()).add(zone_id)
+        return cell
+
+    def _cell_from_members(self, key):
+        cell = self._empty()
+        for zone_id in self._members.get(key, ()):
+            _, risk, area, lat, lon = self._zones[zone_id]
+            self._add(cell, 1, risk, risk, area, lat, lon)
+        return cell
+
+    def _cell_from_children(self, children, key):
+        cell = self._empty()
+        x, y = key
+        for child_key in ((2 * x, 2 * y), (2 * x + 1, 2 * y), (2 * x, 2 * y + 1), (2 * x + 1, 2 * y + 1)):
+            child = children.get(child_key)
+            if child is not None:
+                self._add(cell, child['zones'], child['max_risk'], child['risk_sum'],
+                          child['affected_area'], child['lat_sum'], child['lon_sum'])
+        return cell
+
+    @staticmethod
+    def _empty():
+        return {'zones': 0, 'max_risk': 0, 'risk_sum': 0, 'affected_area': 0, 'lat_sum': 0.0, 'lon_sum': 0.0}
+
+    @staticmethod
+    def _add(cell, zones, max_risk, risk_sum, area, lat_sum, lon_sum):
+        cell['zones'] += zones
+        cell['max_risk'] = max(cell['max_risk'], max_risk)
+        cell['risk_sum'] += risk_sum
+        cell['affected_area'] += area
+        cell['lat_sum'] += lat_sum
+        cell['lon_sum'] += lon_sum
+
+    @staticmethod
+    def _finish(zoom, key, cell):
+        """Turn running sums into the public cell record"""
+        count = cell['zones']
+        out = dict(cell)
+        out.update({
+            'id': f"{zoom}/{key[0]}/{key[1]}",
+            'bbox': tile_bbox(key[0], key[1], zoom),
+            'mean_risk': round(cell['risk_sum'] / count, 1),
+            'risk_level': risk_level(cell['max_risk']),
+            'lat': round(cell['lat_sum'] / count, 4),
+            'lon': round(cell['lon_sum'] / count, 4)
+        })
+        return out
+
+    def query(self, bbox, zoom):
+        """Return (zoom used, cells intersecting bbox) at the closest pre-built zoom.
+
+        `bbox` is (min_lon, min_lat, max_lon, max_lat).
+        """
+        zoom = min(max(int(zoom), self.min_zoom), self.max_zoom)
+        min_lon, min_lat, max_lon, max_lat = bbox
+        x0, y0 = tile_for(max_lat, min_lon, zoom)
+        x1, y1 = tile_for(min_lat, max_lon, zoom)
+        cells = self.levels.get(zoom, {})
+
+        # Probe the visible tiles directly unless the viewport covers more tiles
+        # than there are populated cells at this zoom
+        if (x1 - x0 + 1) * (y1 - y0 + 1) <= len(cells):
+            found = [cells[(x, y)] for x in range(x0, x1 + 1) for y in range(y0, y1 + 1) if (x, y) in cells]
+        else:
+            found = [c for (x, y), c in cells.items() if x0 <= x <= x1 and y0 <= y <= y1]
+        return zoom, [_public_cell(c) for c in found]
+
+
+def _public_cell(cell):
+    """Drop the running sums kept for roll-ups"""
+    return {k: v for k, v in cell.items() if k not in ('risk_sum', 'lat_sum', 'lon_sum')}
+
+
+def parse_bbox(raw):
+    """Parse 'min_lon,min_lat,max_lon,max_lat' (raises ValueError when malformed)"""
+    parts = [float(p) for p in (raw or '').split(',')]
+    if len(parts) != 4 or not all(math.isfinite(p) for p in parts):
+        raise ValueError('bbox must be min_lon,min_lat,max_lon,max_lat')
+    min_lon, min_lat, max_lon, max_lat = parts
+    if min_lon > max_lon or min_lat > max_lat:
+        raise ValueError('bbox min values must not exceed max values')
+    # Viewports may extend past the map edges; cells only exist inside them
+    lon = lambda v: min(max(v, -180.0), 180.0)
+    lat = lambda v: min(max(v, -90.0), 90.0)
+    return [lon(min_lon), lat(min_lat), lon(max_lon), lat(max_lat)]
@@ -0,0 +1,98 @@
+"""Incrementally maintained heatmap zones, grid and versions.
+
+`HeatmapLayer.update_districts()` re-scores only the districts whose weather
+inputs changed, replaces their zones and grid cells, and bumps the version of
+the affected states. The versions feed the heatmap endpoints' ETags.
+"""
+import threading
+
+# Inputs that affect a district's zones; anything else in an observation is ignored
+INPUT_FIELDS = ('temperature', 'humidity', 'rainfall', 'cropped_area', 'season', 'lat', 'lon')
+
+
+def district_key(observation):
+    return observation['state'], observation['district']
+
+
+class HeatmapLayer:
+    """Owns the zone store and grid built from district weather by a RiskEngine"""
+
+    def __init__(self, risk_engine, zone_store, grid):
+        self.risk_engine = risk_engine
+        self.zone_store = zone_store
+        self.grid = grid
+        self._inputs = {}        # (state, district) -> tuple of INPUT_FIELDS values
+        self._zone_ids = {}      # (state, district) -> zone ids in the store
+        self._versions = {}      # state -> version
+        self._version = 0        # bumped on any change
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _input_tuple(observation):
+        return tuple(observation.get(field) for field in INPUT_FIELDS)
+
+    def rebuild(self, districts):
+        """Score every district from scratch (startup / full data refresh)"""
+        with self._lock:
+            zones = self.risk_engine.zones(districts)
+            per_district = len(self.risk_engine.crops)
+            self._inputs, self._zone_ids = {}, {}
+            for i, observation in enumerate(districts):
+                key = district_key(observation)
+                self._inputs[key] = self._input_tuple(observation)
+                self._zone_ids[key] = list(range(i * per_district, (i + 1) * per_district))
+            self.zone_store.load(zones)
+            self.grid.build(zones)
+
+            self._version += 1
+            for state in {d['state'] for d in districts} | set(self._versions):
+                self._versions[state] = self._version
+        return len(zones)
+
+    def update_districts(self, observations):
+        """Apply new weather observations; returns the (state, district) keys that changed"""
+        with self._lock:
+            changed = []
+            for observation in observations:
+                if self._inputs.get(district_key(observation)) != self._input_tuple(observation):
+                    changed.append(observation)
+            if not changed:
+                return []
+
+            zones = self.risk_engine.zones(changed)
+            per_district = len(self.risk_engine.crops)
+            grid_changes, added, added_keys = {}, [], []
+            for i, observation in enumerate(changed):
+                key = district_key(observation)
+                new_zones = zones[i * per_district:(i + 1) * per_district]
+                if key in self._zone_ids:
+                    grid_changes.update(zip(self._zone_ids[key], new_zones))
+                else:
+                    added.extend(new_zones)
+                    added_keys.append(key)
+            # Readers are lock-free: the store and the grid each swap in the
+            # whole batch at once
+            new_ids = self.zone_store.apply(updated=grid_changes, added=added)
+            for i, key in enumerate(added_keys):
+                self._zone_ids[key] = new_ids[i * per_district:(i + 1) * per_district]
+            grid_changes.update(zip(new_ids, added))
+            self.grid.update(grid_changes)
+
+            # Only remember inputs once they were scored, so a failed update is retried
+            for observation in changed:
+                self._inputs[district_key(observation)] = self._input_tuple(observation)
+            self._version += 1
+            for observation in changed:
+                self._versions[observation['state']] = self._version
+            return [district_key(o) for o in changed]
+
+    def version(self, state=None):
+        """Version of one state's zones, or of the whole layer when state is None"""
+        if state is None:
+            return self._version
+        return self._versions.get(state, 0)
+
+    def versions(self):
+        """Return {state: version} for every known state"""
+        with self._lock:
+            return dict(self._versions)
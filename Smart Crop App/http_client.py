@@ -0,0 +1,112 @@
+"""Shared HTTP plumbing for upstream APIs (currently OpenWeatherMap).
+
+`make_session()` returns a pooled keep-alive `requests.Session`.
+`CircuitBreaker` fails calls fast with `CircuitOpenError` after repeated
+upstream failures, then lets one trial call through after a cool-down.
+"""
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def make_session(pool_connections=10, pool_maxsize=32):
+    """Create a requests.Session with a pooled keep-alive adapter for http and https"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the upstream while the circuit is open"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with closed / open / half-open states"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self._stats = {
+            'calls': 0,
+            'successes': 0,
+            'failures': 0,
+            'short_circuited': 0,
+            'times_opened': 0,
+            'half_open_trials': 0
+        }
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        # An open breaker becomes half-open once the cool-down has elapsed
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def call(self, func, *args, **kwargs):
+        """Call func through the breaker; raises CircuitOpenError while open"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.OPEN or (state == self.HALF_OPEN and self._trial_in_flight):
+                self._stats['short_circuited'] += 1
+                raise CircuitOpenError(f'{self.name} circuit is open')
+            if state == self.HALF_OPEN:
+                self._trial_in_flight = True
+                self._stats['half_open_trials'] += 1
+            self._stats['calls'] += 1
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self._record_failure()
+            raise
+        self._record_success()
+        return result
+
+    def _record_success(self):
+        with self._lock:
+            self._stats['successes'] += 1
+            self._consecutive_failures = 0
+            self._state = self.CLOSED
+            self._trial_in_flight = False
+
+    def _record_failure(self):
+        with self._lock:
+            self._stats['failures'] += 1
+            self._consecutive_failures += 1
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._stats['times_opened'] += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def stats(self):
+        """Return the current state plus call/failure/short-circuit counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['state'] = self._current_state()
+            stats['consecutive_failures'] = self._consecutive_failures
+            stats['failure_threshold'] = self.failure_threshold
+            stats['reset_timeout'] = self.reset_timeout
+            if self._state == self.OPEN:
+                stats['retry_in'] = round(max(0, self.reset_timeout - (time.monotonic() - self._opened_at)), 1)
+        return stats
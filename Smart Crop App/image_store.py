@@ -0,0 +1,155 @@
+"""Content-addressed storage for uploaded crop images.
+
+Files are named by the SHA-256 of their bytes under two levels of
+hash-prefix directories (``uploads/3f/a2/3fa2...e1.jpg``), so a repeated
+upload is stored once. `sweep()` removes files by age and total size,
+including files saved flat in the root before sharding and temp files
+left behind by interrupted saves.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+CHUNK_SIZE = 1024 * 1024
+EXTENSION_ALIASES = {'jpeg': 'jpg'}
+# A temp file this old belongs to no save in progress
+ORPHAN_TMP_SECONDS = 3600
+
+# mkstemp creates files 0600; stored files get the mode a plain open() would give them
+_umask = os.umask(0o022)
+os.umask(_umask)
+FILE_MODE = 0o666 & ~_umask
+
+
+class ImageStore:
+    """Sharded, deduplicating file store keyed by content hash"""
+
+    def __init__(self, root, max_bytes=None, max_age_days=None, sweep_interval=3600):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.sweep_interval = sweep_interval
+        self._tmp_dir = os.path.join(root, 'tmp')
+        os.makedirs(self._tmp_dir, exist_ok=True)
+        self._last_sweep = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats = {'stored': 0, 'deduplicated': 0, 'bytes_written': 0, 'swept_files': 0, 'swept_bytes': 0}
+
+    def path_for(self, digest, ext=''):
+        """Return the sharded path for a content hash"""
+        name = f"{digest}.{ext}" if ext else digest
+        return os.path.join(self.root, digest[:2], digest[2:4], name)
+
+    def save(self, stream, filename):
+        """Store a file object under its content hash and return the stored path"""
+        ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+        ext = EXTENSION_ALIASES.get(ext, ext)
+
+        # Hash while copying to a temp file in the same filesystem so the final
+        # move into place is an atomic rename
+        sha = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                    sha.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+
+            path = self.path_for(sha.hexdigest(), ext)
+            try:
+                os.utime(path)  # already stored: counts as fresh for retention
+            except FileNotFoundError:
+                # Not stored yet, or removed by a concurrent sweep
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.chmod(tmp_path, FILE_MODE)
+                os.replace(tmp_path, path)
+                with self._lock:
+                    self._stats['stored'] += 1
+                    self._stats['bytes_written'] += size
+            else:
+                os.remove(tmp_path)
+                with self._lock:
+                    self._stats['deduplicated'] += 1
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self.maybe_sweep()
+        return path
+
+    def maybe_sweep(self):
+        """Run sweep() if sweep_interval has passed since the last one"""
+        with self._lock:
+            if time.monotonic() - self._last_sweep < self.sweep_interval:
+                return
+            self._last_sweep = time.monotonic()
+        self.sweep()
+
+    def _iter_files(self):
+        """Yield (path, size, mtime) for every stored file, sharded or flat in the root"""
+        for shard in os.listdir(self.root):
+            shard_path = os.path.join(self.root, shard)
+            if os.path.isfile(shard_path):
+                st = os.stat(shard_path)
+                yield shard_path, st.st_size, st.st_mtime
+            if len(shard) != 2 or not os.path.isdir(shard_path):
+                continue
+            for sub in os.listdir(shard_path):
+                sub_path = os.path.join(shard_path, sub)
+                if not os.path.isdir(sub_path):
+                    continue
+                for entry in os.scandir(sub_path):
+                    if entry.is_file():
+                        st = entry.stat()
+                        yield entry.path, st.st_size, st.st_mtime
+
+    def _remove_orphans(self):
+        """Delete temp files no save is writing anymore; returns (files, bytes) removed"""
+        cutoff = time.time() - ORPHAN_TMP_SECONDS
+        removed = removed_bytes = 0
+        for entry in os.scandir(self._tmp_dir):
+            try:
+                st = entry.stat()
+                if not entry.is_file() or st.st_mtime >= cutoff:
+                    continue
+                os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+            removed += 1
+            removed_bytes += st.st_size
+        return removed, removed_bytes
+
+    def sweep(self):
+        """Delete orphaned temp files and expired files, then the oldest ones until under max_bytes"""
+        removed, removed_bytes = self._remove_orphans()
+        files = sorted(self._iter_files(), key=lambda f: f[2])
+        total = sum(size for _, size, _ in files)
+        cutoff = time.time() - self.max_age_days * 86400 if self.max_age_days else None
+
+        for path, size, mtime in files:
+            expired = cutoff is not None and mtime < cutoff
+            over_quota = self.max_bytes is not None and total > self.max_bytes
+            if not expired and not over_quota:
+                break  # files are oldest first, so nothing later qualifies
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            removed += 1
+            removed_bytes += size
+
+        with self._lock:
+            self._stats['swept_files'] += removed
+            self._stats['swept_bytes'] += removed_bytes
+        return {'removed_files': removed, 'removed_bytes': removed_bytes, 'total_bytes': total}
+
+    def stats(self):
+        """Return stored/deduplicated/swept counters"""
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,59 @@
+"""Pre-serialized JSON responses with strong ETags.
+
+`JsonPayload` serializes and hashes data once so routes can serve the same
+bytes and answer If-None-Match with 304. `version_etag()` and
+`conditional_json()` do the same for per-query responses without building
+the body on a 304.
+"""
+import hashlib
+import json
+
+from flask import Response, jsonify
+
+
+class JsonPayload:
+    """JSON body serialized once, with a content-derived strong ETag"""
+
+    def __init__(self, data):
+        self.data = data
+        self.body = json.dumps(data, default=str, separators=(',', ':')).encode('utf-8')
+        self.etag = hashlib.sha1(self.body).hexdigest()
+
+    def __len__(self):
+        return len(self.body)
+
+
+def payload_response(payload, request, max_age=0):
+    """Serve a JsonPayload, returning 304 when the client already has this ETag"""
+    response = Response(payload.body, mimetype='application/json')
+    response.set_etag(payload.etag)
+    # Without max_age clients keep the body but revalidate (cheap 304) before reuse
+    response.cache_control.public = True
+    if max_age:
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def version_etag(version, args=None):
+    """Strong ETag for a response derived from a data version and its query args"""
+    key = repr((version, sorted((args or {}).items())))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def conditional_json(request, etag, build):
+    """Answer 304 if the client already has etag, otherwise jsonify(build()) with that ETag.
+
+    build() is only called when a body is actually needed.
+    """
+    # Weak comparison: compressed responses carry the same ETag as W/"..."
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    response = jsonify(build())
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
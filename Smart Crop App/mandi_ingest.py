@@ -0,0 +1,266 @@
+"""Streaming bulk ingestion of Agmarknet-style mandi price CSV dumps.
+
+    python mandi_ingest.py dump1.csv [dump2.csv ...] --db mandi_prices.db
+
+Rows are normalized, validated and inserted in chunks with `INSERT OR IGNORE`,
+so overlapping dumps are counted as duplicates. Each chunk is committed with a
+byte-offset checkpoint, and an interrupted run resumes from it.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from datetime import datetime
+
+from mandi_store import PRICE_COLUMNS, connect
+
+DEFAULT_CHUNK_SIZE = 50000
+# A quoted field may span lines, but no record is allowed to grow past these:
+# an unbalanced quote would otherwise swallow the rest of the file
+MAX_RECORD_BYTES = 64 * 1024
+MAX_RECORD_LINES = 32
+DATE_FORMATS = ('%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%d-%b-%Y', '%d %b %Y', '%m/%d/%Y')
+
+# Normalized header -> store column
+COLUMN_ALIASES = {
+    'arrivaldate': 'date', 'pricedate': 'date', 'date': 'date', 'reporteddate': 'date',
+    'state': 'state', 'statename': 'state',
+    'district': 'district', 'districtname': 'district',
+    'market': 'mandi', 'marketname': 'mandi', 'mandi': 'mandi', 'mandiname': 'mandi',
+    'commodity': 'commodity', 'commodityname': 'commodity',
+    'variety': 'variety',
+    'minprice': 'min_price', 'minimumprice': 'min_price',
+    'maxprice': 'max_price', 'maximumprice': 'max_price',
+    'modalprice': 'modal_price'
+}
+REQUIRED_COLUMNS = ('date', 'state', 'mandi', 'commodity', 'min_price', 'max_price', 'modal_price')
+
+
+def normalize_header(name):
+    """'Min_x0020_Price' / 'Min Price (Rs./Quintal)' -> 'minprice'"""
+    name = name.lower().replace('_x0020_', ' ').split('(')[0]
+    return ''.join(ch for ch in name if ch.isalnum())
+
+
+def map_columns(header):
+    """Return {store column: csv index}; raises ValueError when required columns are missing"""
+    mapping = {}
+    for index, name in enumerate(header):
+        column = COLUMN_ALIASES.get(normalize_header(name))
+        if column and column not in mapping:
+            mapping[column] = index
+    missing = [c for c in REQUIRED_COLUMNS if c not in mapping]
+    if missing:
+        raise ValueError(f"CSV header is missing columns: {', '.join(missing)}")
+    return mapping
+
+
+def parse_date(raw):
+    raw = raw.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(raw, fmt).date().isoformat()
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognized date {raw!r}")
+
+
+def clean_text(raw):
+    return ' '.join(raw.split())
+
+
+def validate_row(values, mapping):
+    """Return a store tuple (PRICE_COLUMNS order) or raise ValueError with the reason"""
+    if values is None:
+        raise ValueError('unbalanced quotes')
+
+    def field(column):
+        index = mapping.get(column)
+        return clean_text(values[index]) if index is not None and index < len(values) else ''
+
+    row = {c: field(c) for c in ('state', 'district', 'mandi', 'commodity', 'variety')}
+    for column in ('state', 'mandi', 'commodity'):
+        if not row[column]:
+            raise ValueError(f"missing {column}")
+    try:
+        row['date'] = parse_date(field('date'))
+    except ValueError:
+        raise ValueError('bad date') from None
+    for column in ('min_price', 'max_price', 'modal_price'):
+        try:
+            row[column] = float(field(column).replace(',', ''))
+        except ValueError:
+            raise ValueError(f"bad {column}") from None
+        if row[column] < 0 or row[column] != row[column]:
+            raise ValueError(f"bad {column}")
+    if not row['min_price'] <= row['modal_price'] <= row['max_price']:
+        raise ValueError('prices out of order')
+    return tuple(row[c] for c in PRICE_COLUMNS)
+
+
+def iter_records(f):
+    """Yield (fields, end offset) for each CSV record read from a binary file.
+
+    A record whose quotes do not balance within MAX_RECORD_BYTES /
+    MAX_RECORD_LINES (or by the end of the file) is yielded as (None, end of
+    its first line), and reading resumes on the line after it.
+    """
+    while True:
+        start = f.tell()
+        line = f.readline()
+        if not line:
+            return
+        first_end = start + len(line)
+        pending, lines, quotes = line, 1, line.count(b'"')
+        # A quoted field may contain newlines: keep reading until quotes balance
+        while quotes % 2:
+            if len(pending) > MAX_RECORD_BYTES or lines >= MAX_RECORD_LINES:
+                break
+            line = f.readline()
+            if not line:
+                break
+            pending += line
+            lines += 1
+            quotes += line.count(b'"')
+        if quotes % 2:
+            f.seek(first_end)
+            yield None, first_end
+            continue
+        text = pending.decode('utf-8-sig' if start == 0 else 'utf-8', errors='replace')
+        fields = next(csv.reader([text]), [])
+        if fields:
+            yield fields, f.tell()
+
+
+def file_signature(path):
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+class Ingestor:
+    """Loads CSV files into the store chunk by chunk, checkpointing after each"""
+
+    INSERT = (f"INSERT OR IGNORE INTO mandi_prices ({', '.join(PRICE_COLUMNS)}) "
+              f"VALUES ({', '.join('?' for _ in PRICE_COLUMNS)})")
+
+    def __init__(self, conn, chunk_size=DEFAULT_CHUNK_SIZE, report=None):
+        self.conn = conn
+        self.chunk_size = chunk_size
+        self.report = report or (lambda progress: None)
+
+    def _checkpoint(self, source, signature):
+        row = self.conn.execute('SELECT * FROM ingest_checkpoints WHERE source = ?', (source,)).fetchone()
+        if row is None or row['signature'] != signature:
+            return {'offset': 0, 'rows_read': 0, 'inserted': 0, 'duplicates': 0, 'rejected': 0, 'completed': 0}
+        return dict(row)
+
+    def _save_checkpoint(self, source, signature, progress, completed=False):
+        self.conn.execute(
+            'INSERT OR REPLACE INTO ingest_checkpoints '
+            '(source, signature, offset, rows_read, inserted, duplicates, rejected, completed, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (source, signature, progress['offset'], progress['rows_read'], progress['inserted'],
+             progress['duplicates'], progress['rejected'], int(completed), datetime.now().isoformat())
+        )
+
+    def ingest(self, path):
+        """Load one CSV file (resuming from its checkpoint); returns the final progress dict"""
+        source = os.path.abspath(path)
+        signature = file_signature(path)
+        progress = self._checkpoint(source, signature)
+        progress.update({'source': source, 'bytes': os.path.getsize(path), 'reject_reasons': {}})
+        if progress['completed']:
+            progress['skipped'] = True
+            return progress
+
+        started = time.monotonic()
+        resumed_rows = progress['rows_read']
+        with open(path, 'rb') as f:
+            records = iter_records(f)
+            header, _ = next(records, ([], 0))
+            if not header:
+                raise ValueError(f"{path} has no readable header")
+            mapping = map_columns(header)
+            if progress['offset']:
+                f.seek(progress['offset'])
+
+            chunk = {}
+            for fields, offset in records:
+                progress['rows_read'] += 1
+                progress['offset'] = offset
+                try:
+                    row = validate_row(fields, mapping)
+                except ValueError as e:
+                    progress['rejected'] += 1
+                    reasons = progress['reject_reasons']
+                    reasons[str(e)] = reasons.get(str(e), 0) + 1
+                    continue
+                key = row[:2] + row[3:6]  # date, state, mandi, commodity, variety
+                if key in chunk:
+                    # First occurrence wins, as it does against rows already stored
+                    progress['duplicates'] += 1
+                    continue
+                chunk[key] = row
+                if len(chunk) >= self.chunk_size:
+                    self._flush(chunk, source, signature, progress, started, resumed_rows)
+                    chunk = {}
+            self._flush(chunk, source, signature, progress, started, resumed_rows, completed=True)
+        return progress
+
+    def _flush(self, chunk, source, signature, progress, started, resumed_rows, completed=False):
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(self.INSERT, chunk.values())
+            inserted = self.conn.total_changes - before
+            progress['inserted'] += inserted
+            progress['duplicates'] += len(chunk) - inserted
+            self._save_checkpoint(source, signature, progress, completed)
+        elapsed = max(time.monotonic() - started, 1e-9)
+        progress['elapsed'] = round(elapsed, 2)
+        progress['rows_per_sec'] = round((progress['rows_read'] - resumed_rows) / elapsed)
+        self.report(progress)
+
+
+def print_progress(progress):
+    percent = 100.0 * progress['offset'] / progress['bytes'] if progress['bytes'] else 100.0
+    print(
+        f"{os.path.basename(progress['source'])}: {percent:5.1f}%  rows={progress['rows_read']:,}  "
+        f"inserted={progress['inserted']:,}  duplicates={progress['duplicates']:,}  "
+        f"rejected={progress['rejected']:,}  {progress['rows_per_sec']:,} rows/s",
+        file=sys.stderr
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk-load Agmarknet-style mandi price CSV dumps')
+    parser.add_argument('files', nargs='+', help='CSV files to ingest')
+    parser.add_argument('--db', default='mandi_prices.db', help='SQLite database (default: mandi_prices.db)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='rows per transaction')
+    parser.add_argument('--restart', action='store_true', help='ignore existing checkpoints')
+    args = parser.parse_args(argv)
+
+    conn = connect(args.db)
+    if args.restart:
+        with conn:
+            conn.executemany('DELETE FROM ingest_checkpoints WHERE source = ?',
+                             [(os.path.abspath(p),) for p in args.files])
+    ingestor = Ingestor(conn, chunk_size=args.chunk_size, report=print_progress)
+    status = 0
+    for path in args.files:
+        try:
+            progress = ingestor.ingest(path)
+        except (OSError, ValueError) as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            status = 1
+            continue
+        if progress.get('skipped'):
+            print(f"{path}: already ingested, skipping (use --restart to load it again)", file=sys.stderr)
+        elif progress['reject_reasons']:
+            print(f"{path}: rejected rows by reason (this run): {progress['reject_reasons']}", file=sys.stderr)
+    conn.close()
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
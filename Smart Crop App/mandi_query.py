@@ -0,0 +1,352 @@
+"""In-memory query engine over the mandi price store.
+
+`MandiPriceIndex` loads `mandi_store.py` rows into date-ordered NumPy columns
+with state, mandi and commodity (prefix/substring) indexes, so
+`/api/market-prices` filters posting lists instead of scanning rows. The
+index is rebuilt in the background when the store's `data_version` changes.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from datetime import date
+
+import numpy as np
+
+from mandi_store import PRICE_COLUMNS, connect
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NGRAM = 3
+LOAD_BATCH_ROWS = 50000
+
+# sort key -> default order
+SORT_FIELDS = {'date': 'desc', 'price': 'desc', 'commodity': 'asc', 'mandi': 'asc', 'state': 'asc'}
+
+
+def ngrams(text):
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def format_price(value):
+    value = float(value)
+    return int(value) if value.is_integer() else round(value, 2)
+
+
+class Vocabulary:
+    """String <-> integer code table for one text column"""
+
+    def __init__(self):
+        self.names = []
+        self.codes = {}
+        self.by_lower = {}
+
+    def code(self, name):
+        code = self.codes.get(name)
+        if code is None:
+            code = self.codes[name] = len(self.names)
+            self.names.append(name)
+            self.by_lower.setdefault(name.lower(), []).append(code)
+        return code
+
+    def lookup(self, name):
+        """Codes of a name, compared case-insensitively"""
+        return self.by_lower.get(name.strip().lower(), [])
+
+    def ranks(self):
+        """Code -> position in case-insensitive name order, for sorting"""
+        order = sorted(range(len(self.names)), key=lambda c: self.names[c].lower())
+        ranks = np.empty(len(order), dtype=np.int32)
+        ranks[order] = np.arange(len(order), dtype=np.int32)
+        return ranks
+
+
+class CommodityIndex:
+    """Prefix and trigram lookup of commodity names"""
+
+    def __init__(self, vocabulary):
+        self.vocabulary = vocabulary
+        self.sorted_names = sorted(vocabulary.by_lower)
+        self.grams = {}
+        for name in self.sorted_names:
+            for gram in ngrams(name):
+                self.grams.setdefault(gram, set()).add(name)
+
+    def match(self, text):
+        """Codes of the commodities whose name contains text"""
+        text = ' '.join(text.lower().split())
+        names = set()
+        i = bisect_left(self.sorted_names, text)
+        while i < len(self.sorted_names) and self.sorted_names[i].startswith(text):
+            names.add(self.sorted_names[i])
+            i += 1
+        if len(text) < NGRAM:
+            # Too short for a trigram; the name list is small enough to scan
+            names.update(name for name in self.sorted_names if text in name)
+        else:
+            candidates = None
+            for gram in ngrams(text):
+                found = self.grams.get(gram, set())
+                candidates = found if candidates is None else candidates & found
+                if not candidates:
+                    break
+            # Trigrams can match out of order: confirm the substring
+            names.update(name for name in candidates or () if text in name)
+        return [code for name in names for code in self.vocabulary.by_lower[name]]
+
+
+class PostingIndex:
+    """state / mandi / commodity code -> sorted row ids, over a subset of rows"""
+
+    def __init__(self, ids, columns):
+        self.ids = ids
+        self.lists = {}
+        for field, codes in columns.items():
+            subset = codes[ids]
+            order = np.argsort(subset, kind='stable')
+            bounds = np.flatnonzero(np.diff(subset[order])) + 1
+            groups = np.split(ids[order], bounds) if len(ids) else []
+            self.lists[field] = {int(codes[group[0]]): group for group in groups}
+
+    def posting(self, field, codes):
+        lists = [self.lists[field][c] for c in codes if c in self.lists[field]]
+        if len(lists) == 1:
+            return lists[0]
+        return np.sort(np.concatenate(lists)) if lists else np.empty(0, dtype=np.int64)
+
+
+class PriceTable:
+    """Column-wise snapshot of all price rows, sorted by date"""
+
+    def __init__(self, rows):
+        self.version = 0     # set when a MandiPriceIndex installs the table
+        self.vocab = {field: Vocabulary() for field in ('state', 'district', 'mandi', 'commodity', 'variety')}
+        text_fields = [(PRICE_COLUMNS.index(f), v.code, []) for f, v in self.vocab.items()]
+        price_fields = [(PRICE_COLUMNS.index(f), []) for f in ('min_price', 'max_price', 'modal_price')]
+        day_index = PRICE_COLUMNS.index('date')
+        day_column = []
+        ordinals = {}
+        for row in rows:
+            day = ordinals.get(row[day_index])
+            if day is None:
+                day = ordinals[row[day_index]] = date.fromisoformat(row[day_index]).toordinal()
+            day_column.append(day)
+            for index, code, column in text_fields:
+                column.append(code(row[index]))
+            for index, column in price_fields:
+                column.append(row[index])
+        columns = {PRICE_COLUMNS[index]: column for index, _, column in text_fields}
+        columns.update({PRICE_COLUMNS[index]: column for index, column in price_fields})
+        columns['date'] = day_column
+
+        # Rows are read in storage order; sort them by date
+        dates = np.asarray(columns['date'], dtype=np.int32)
+        order = np.argsort(dates, kind='stable')
+        self.dates = dates[order]
+        self.codes = {f: np.asarray(columns[f], dtype=np.int32)[order] for f in self.vocab}
+        self.prices = {f: np.asarray(columns[f], dtype=np.float32)[order] for f in ('min_price', 'max_price', 'modal_price')}
+        self.ranks = {f: v.ranks() for f, v in self.vocab.items()}
+        self.commodities = CommodityIndex(self.vocab['commodity'])
+
+        # Latest row per (state, mandi, commodity, variety): the first occurrence of
+        # each combined key when walking the date-ordered rows backwards
+        key = np.zeros(len(self.dates), dtype=np.int64)
+        for f in ('state', 'mandi', 'commodity', 'variety'):
+            key = key * len(self.vocab[f].names) + self.codes[f]
+        _, last = np.unique(key[::-1], return_index=True)
+        latest = np.sort(len(key) - 1 - last)
+        indexed = {f: self.codes[f] for f in ('state', 'mandi', 'commodity')}
+        self.all = PostingIndex(np.arange(len(self.dates), dtype=np.int64), indexed)
+        self.latest = PostingIndex(latest.astype(np.int64), indexed)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def matching_ids(self, index, filters):
+        """Sorted row ids matching {'state'|'mandi': name, 'commodity': text}"""
+        candidates = {}
+        for field, value in filters.items():
+            if field == 'commodity':
+                candidates[field] = self.commodities.match(value)
+            else:
+                candidates[field] = self.vocab[field].lookup(value)
+        if not candidates:
+            return index.ids
+
+        # Walk the shortest posting list and mask it by the other filters
+        postings = {f: index.posting(f, codes) for f, codes in candidates.items()}
+        field = min(postings, key=lambda f: len(postings[f]))
+        ids = postings[field]
+        for other, codes in candidates.items():
+            if other != field and len(ids):
+                ids = ids[np.isin(self.codes[other][ids], codes)]
+        return ids
+
+    def sort(self, ids, key, order):
+        if key == 'date':
+            return ids[::-1] if order == 'desc' else ids
+        primary = self.prices['modal_price'][ids] if key == 'price' else self.ranks[key][self.codes[key][ids]]
+        if order == 'desc':
+            primary = -primary
+        # Most recent first among equal keys
+        return ids[np.lexsort((-self.dates[ids], primary))]
+
+    def record(self, row_id):
+        names = {f: self.vocab[f].names[self.codes[f][row_id]] for f in self.vocab}
+        updated = date.fromordinal(int(self.dates[row_id])).isoformat()
+        return {
+            'commodity': names['commodity'],
+            'variety': names['variety'],
+            'mandi': names['mandi'],
+            'district': names['district'],
+            'state': names['state'],
+            'price': format_price(self.prices['modal_price'][row_id]),
+            'min_price': format_price(self.prices['min_price'][row_id]),
+            'max_price': format_price(self.prices['max_price'][row_id]),
+            'unit': 'quintal',
+            'updated': updated
+        }
+
+
+class MandiPriceIndex:
+    """Indexed, reloadable view of the mandi price store"""
+
+    def __init__(self, db_path, fallback=(), check_interval=1.0):
+        self.db_path = db_path
+        self.fallback = list(fallback)      # rows served while the store is missing or empty
+        self.check_interval = check_interval
+        self.version = 0
+        self.loads = 0
+        self.load_seconds = 0.0
+        self._table = None
+        self._conn = None
+        self._data_version = None
+        self._checked_at = 0.0
+        self._building = False
+        self._lock = threading.Lock()          # guards the refresh state below
+        self._conn_lock = threading.Lock()     # guards the shared reader connection
+        self._install(self._build(self._read_version()))
+
+    def _read_version(self):
+        """Current PRAGMA data_version of the store (None when there is no store yet)"""
+        with self._conn_lock:
+            if self._conn is None:
+                if not os.path.exists(self.db_path):
+                    return None
+                self._conn = connect(self.db_path)
+            return self._conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def _rows(self):
+        if self._conn is not None:
+            with self._conn_lock:
+                empty = self._conn.execute('SELECT 1 FROM mandi_prices LIMIT 1').fetchone() is None
+            if not empty:
+                return self._iter_store()
+        return iter(self.fallback)
+
+    def _iter_store(self):
+        # A separate connection, so the reader connection is free while a rebuild runs
+        conn = connect(self.db_path)
+        try:
+            cursor = conn.execute(f"SELECT {', '.join(PRICE_COLUMNS)} FROM mandi_prices")
+            while True:
+                batch = cursor.fetchmany(LOAD_BATCH_ROWS)
+                if not batch:
+                    break
+                yield from batch
+        finally:
+            conn.close()
+
+    def _build(self, data_version):
+        started = time.monotonic()
+        table = PriceTable(self._rows())
+        self.load_seconds = round(time.monotonic() - started, 3)
+        return table, data_version
+
+    def _install(self, built):
+        table, self._data_version = built
+        self.loads += 1
+        self.version += 1
+        table.version = self.version
+        self._table = table
+
+    def _rebuild(self, data_version):
+        built = None
+        try:
+            built = self._build(data_version)
+        finally:
+            with self._lock:
+                if built is not None:
+                    self._install(built)
+                self._building = False
+
+    def refresh(self):
+        """Start a background rebuild if the store changed (checked at most once per check_interval)"""
+        with self._lock:
+            now = time.monotonic()
+            if self._building or now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            data_version = self._read_version()
+            if data_version == self._data_version:
+                return
+            self._building = True
+        threading.Thread(target=self._rebuild, args=(data_version,), daemon=True).start()
+
+    def table(self):
+        """Current table (its `version` identifies it); refreshes first"""
+        self.refresh()
+        return self._table
+
+    def query(self, filters=None, start=None, end=None, latest=True, sort='date', order=None,
+              cursor=None, limit=DEFAULT_PAGE_SIZE, table=None):
+        """Return (records, next_cursor, total).
+
+        `filters` holds state / mandi (exact, case-insensitive) and commodity
+        (substring or prefix); start/end are dates (inclusive). With `latest`
+        only the newest row of each (state, mandi, commodity, variety) is
+        considered, and the date range then applies to those rows. `cursor`
+        is the next_cursor of the previous page. Pass the `table` an ETag was
+        computed from to answer from exactly that version.
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"sort must be one of: {', '.join(SORT_FIELDS)}")
+        order = order or SORT_FIELDS[sort]
+        if order not in ('asc', 'desc'):
+            raise ValueError("order must be 'asc' or 'desc'")
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        try:
+            offset = int(cursor) if cursor not in (None, '') else 0
+        except (TypeError, ValueError):
+            offset = -1
+        if offset < 0:
+            raise ValueError('cursor must be a non-negative integer')
+
+        table = table or self.table()
+        ids = table.matching_ids(table.latest if latest else table.all, filters or {})
+        if start is not None or end is not None:
+            # ids are in date order, so the range is one contiguous slice
+            dates = table.dates[ids]
+            lo = np.searchsorted(dates, start.toordinal(), 'left') if start else 0
+            hi = np.searchsorted(dates, end.toordinal(), 'right') if end else len(ids)
+            ids = ids[lo:hi]
+        total = len(ids)
+        ids = table.sort(ids, sort, order)
+        page = ids[offset:offset + limit]
+        next_cursor = str(offset + limit) if offset + limit < total else None
+        return [table.record(i) for i in page.tolist()], next_cursor, total
+
+    def stats(self):
+        table = self._table
+        return {
+            'version': self.version,
+            'rows': len(table),
+            'latest_rows': len(table.latest.ids),
+            'states': len(table.vocab['state'].names),
+            'mandis': len(table.vocab['mandi'].names),
+            'commodities': len(table.vocab['commodity'].names),
+            'loads': self.loads,
+            'load_seconds': self.load_seconds,
+            'rebuilding': self._building,
+            'source': self.db_path if self._conn is not None else 'fallback'
+        }
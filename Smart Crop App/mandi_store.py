@@ -0,0 +1,51 @@
+"""SQLite store for mandi (market yard) commodity prices.
+
+One row per (date, state, mandi, commodity, variety) with min/max/modal price
+in Rs./quintal. The UNIQUE natural key keeps re-ingests idempotent;
+`ingest_checkpoints` records `mandi_ingest.py` progress per source file.
+"""
+import sqlite3
+
+PRICE_COLUMNS = ('date', 'state', 'district', 'mandi', 'commodity', 'variety', 'min_price', 'max_price', 'modal_price')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mandi_prices (
+    date        TEXT NOT NULL,
+    state       TEXT NOT NULL,
+    district    TEXT NOT NULL DEFAULT '',
+    mandi       TEXT NOT NULL,
+    commodity   TEXT NOT NULL,
+    variety     TEXT NOT NULL DEFAULT '',
+    min_price   REAL NOT NULL,
+    max_price   REAL NOT NULL,
+    modal_price REAL NOT NULL,
+    UNIQUE (date, state, mandi, commodity, variety)
+);
+CREATE INDEX IF NOT EXISTS idx_mandi_prices_commodity ON mandi_prices (commodity, date);
+CREATE INDEX IF NOT EXISTS idx_mandi_prices_state ON mandi_prices (state, date);
+CREATE INDEX IF NOT EXISTS idx_mandi_prices_mandi ON mandi_prices (mandi, date);
+CREATE INDEX IF NOT EXISTS idx_mandi_prices_date ON mandi_prices (date);
+
+CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+    source      TEXT PRIMARY KEY,
+    signature   TEXT NOT NULL,
+    offset      INTEGER NOT NULL,
+    rows_read   INTEGER NOT NULL,
+    inserted    INTEGER NOT NULL,
+    duplicates  INTEGER NOT NULL,
+    rejected    INTEGER NOT NULL,
+    completed   INTEGER NOT NULL DEFAULT 0,
+    updated_at  TEXT NOT NULL
+);
+"""
+
+
+def connect(path):
+    """Open (and create if needed) the price database"""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    # WAL lets the API keep reading while an ingest is writing
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
@@ -1,15 +1,21 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
-from datetime import datetime, timedelta
-import json
+from datetime import datetime, date, timedelta
 import random
 import os
+from compression import Compression
+from json_payload import JsonPayload, payload_response
+from price_store import PriceStore
+from price_history import PriceHistory, LEGACY_OFFSETS
 
 app = Flask(_name_)
 CORS(app)  # Enable CORS for frontend communication
+Compression(app)  # ETags, 304s and gzip/brotli for large responses
 
 # Database file to store prices (in production, use a proper database like PostgreSQL)
 DATA_FILE = 'market_prices.json'
+# Full daily price history (item x day, memory-mapped); the five legacy fields derive from it
+HISTORY_FILE = 'market_prices_history.npy'
 
 # Initialize sample data structure
 def initialize_data():
@@ -99,59 +105,118 @@ def generate_price_history(base_price):
         "year": year
     }
 
+# Kept in memory; persisted as an atomic snapshot (DATA_FILE) plus an append-only
+# log of changes, and re-read only when either file's mtime/size changes
+price_store = PriceStore(DATA_FILE, default=initialize_data)
+
+price_history = PriceHistory(HISTORY_FILE)
+
 def load_data():
-    """Load data from JSON file"""
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, 'r') as f:
-            return json.load(f)
-    return initialize_data()
+    """Return the market data from memory (shared, do not mutate)"""
+    return price_store.get()
+
+def seed_history(data):
+    """Backfill history for items it does not know yet from their five snapshot fields"""
+    missing = [i for i in data["items"] if i["name"] not in price_history]
+    if not missing:
+        return
+    today = datetime.fromisoformat(data["last_updated"]).date()
+    # Oldest first, so the history starts a year back
+    for field, offset in reversed(LEGACY_OFFSETS):
+        day = today - timedelta(days=offset)
+        if price_history.start is None or day.toordinal() >= price_history.start:
+            price_history.record(day, {i["name"]: i[field] for i in missing})
 
 def save_data(data):
-    """Save data to JSON file"""
-    with open(DATA_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
+    """Replace the whole dataset with an atomic snapshot and make it the in-memory version"""
+    price_store.commit(data)
+
+def compute_statistics(data):
+    """Gaining/losing/stable counts and average change, computed once per data version"""
+    items = data["items"]
+    gaining = sum(1 for i in items if i["current"] > i["yesterday"])
+    losing = sum(1 for i in items if i["current"] < i["yesterday"])
+    stable = sum(1 for i in items if i["current"] == i["yesterday"])
+    
+    avg_change = sum((i["current"] - i["yesterday"]) / i["yesterday"] * 100 
+                     for i in items) / len(items)
+    
+    return {
+        "total_items": len(items),
+        "gaining": gaining,
+        "losing": losing,
+        "stable": stable,
+        "average_change_percent": round(avg_change, 2),
+        "last_updated": data["last_updated"]
+    }
 
 def update_daily_prices():
     """Update prices daily with realistic market fluctuations"""
     data = load_data()
+    seed_history(data)
+    today = date.today()
+    todays_prices = {}
     
     for item in data["items"]:
-        # Shift historical prices
-        item["year"] = item["month"]
-        item["month"] = item["week"]
-        item["week"] = item["yesterday"]
-        item["yesterday"] = item["current"]
-        
         # Generate new current price with realistic variation
         change_percent = random.uniform(-0.05, 0.05)  # -5% to +5% daily change
-        item["current"] = round(item["current"] * (1 + change_percent))
+        current = round(item["current"] * (1 + change_percent))
         
         # Ensure prices don't go too low
-        if item["current"] < 10:
-            item["current"] = 10
+        todays_prices[item["name"]] = max(current, 10)
     
-    data["last_updated"] = datetime.now().isoformat()
-    save_data(data)
-    return data
+    # Today's prices go into the history; yesterday/week/month/year are read
+    # back from it instead of being shifted along
+    price_history.record(today, todays_prices)
+    changes = {}
+    for item in data["items"]:
+        fields = price_history.legacy_fields(item["name"], today)
+        if fields is None:
+            # No history for this item (yet): leave its snapshot fields as they are
+            continue
+        # Only fields that actually moved go into the log
+        changes[item["name"]] = {k: v for k, v in fields.items() if item[k] != v}
+    
+    return price_store.apply(changes, last_updated=datetime.now().isoformat())
+
+# Backfill once at startup, so read-only requests never write to the history
+seed_history(load_data())
 
 # API Routes
 
 @app.route('/api/prices', methods=['GET'])
 def get_prices():
-    """Get all market prices"""
-    data = load_data()
-    return jsonify(data)
+    """Get all market prices (serialized once per data version)"""
+    return payload_response(price_store.derived('payload', JsonPayload), request)
 
 @app.route('/api/prices/<item_name>', methods=['GET'])
 def get_item_price(item_name):
     """Get price for a specific item"""
-    data = load_data()
-    item = next((i for i in data["items"] if i["name"].lower() == item_name.lower()), None)
+    item = price_store.item(item_name)
     
     if item:
         return jsonify(item)
     return jsonify({"error": "Item not found"}), 404
 
+@app.route('/api/prices/<item_name>/history', methods=['GET'])
+def get_item_history(item_name):
+    """Get daily prices for an item, optionally between ?start= and ?end= (YYYY-MM-DD)"""
+    item = price_store.item(item_name)
+    if not item:
+        return jsonify({"error": "Item not found"}), 404
+    try:
+        start = date.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = date.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({"error": "start and end must be YYYY-MM-DD"}), 400
+    
+    first, prices = price_history.series(item["name"], start, end)
+    return jsonify({
+        "name": item["name"],
+        "start": first.isoformat() if first else None,
+        "prices": [None if p != p else round(float(p), 2) for p in prices.tolist()]
+    })
+
 @app.route('/api/update', methods=['POST'])
 def update_prices():
     """Manually trigger price update (for testing)"""
@@ -200,23 +265,7 @@ def search_items():
 @app.route('/api/statistics', methods=['GET'])
 def get_statistics():
     """Get market statistics"""
-    data = load_data()
-    
-    gaining = sum(1 for i in data["items"] if i["current"] > i["yesterday"])
-    losing = sum(1 for i in data["items"] if i["current"] < i["yesterday"])
-    stable = sum(1 for i in data["items"] if i["current"] == i["yesterday"])
-    
-    avg_change = sum((i["current"] - i["yesterday"]) / i["yesterday"] * 100 
-                     for i in data["items"]) / len(data["items"])
-    
-    return jsonify({
-        "total_items": len(data["items"]),
-        "gaining": gaining,
-        "losing": losing,
-        "stable": stable,
-        "average_change_percent": round(avg_change, 2),
-        "last_updated": data["last_updated"]
-    })
+    return jsonify(price_store.derived('statistics', compute_statistics))
 
 @app.route('/')
 def index():
@@ -227,6 +276,7 @@ def index():
         "endpoints": {
             "/api/prices": "Get all market prices",
             "/api/prices/<item_name>": "Get specific item price",
+            "/api/prices/<item_name>/history?start=&end=": "Get daily price history",
             "/api/update": "Manually update prices",
             "/api/filter?type=vegetables&change=gaining": "Filter items",
             "/api/search?q=tomato": "Search items",
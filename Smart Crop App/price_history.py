@@ -0,0 +1,204 @@
+"""Daily price history as a memory-mapped NumPy matrix.
+
+Prices are stored in a float32 `.npy` file (row per item, column per day,
+NaN = no price) opened with `numpy.memmap`, plus a `.meta.json` with the
+first day and item names. Each item's history is one contiguous run, so
+series() is a zero-copy slice. Writers hold an flock; growing copies the
+matrix into a new file and renames it over the old one, so mappings held
+elsewhere stay valid until they are swapped. `legacy_fields()` derives the
+values `price.py` has always served.
+"""
+import json
+import os
+import threading
+import time
+from datetime import date
+
+import numpy as np
+
+from price_store import atomic_write_json, file_lock
+
+DTYPE = np.float32
+# Preallocated capacity: about 11 years of days before the file first grows
+INITIAL_DAYS = 4096
+INITIAL_ITEMS = 256
+
+# price_on() first looks this far back before scanning the whole history
+PRICE_LOOKBACK_DAYS = 31
+
+# Legacy field -> days before the latest day
+LEGACY_OFFSETS = (('current', 0), ('yesterday', 1), ('week', 7), ('month', 30), ('year', 365))
+
+
+class PriceHistory:
+    """Item x day price matrix in a memory-mapped .npy file"""
+
+    def __init__(self, path, check_interval=1.0):
+        self.path = path
+        self.meta_path = os.path.splitext(path)[0] + '.meta.json'
+        self.lock_path = path + '.lock'
+        self.check_interval = check_interval
+        self.start = None       # ordinal of row 0
+        self.days = 0           # rows in use
+        self.items = []         # row -> item name
+        self._rows = {}         # item name -> row
+        self._matrix = None
+        self._signature = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh(force=True)
+
+    # -- loading ---------------------------------------------------------
+
+    def _meta_signature(self):
+        try:
+            st = os.stat(self.meta_path)
+            # The matrix inode changes whenever another process grew the file
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, inode
+
+    def _refresh(self, force=False):
+        """Re-open the mapping if another process changed the files"""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        if self._meta_signature() == self._signature:
+            return
+        with self._lock:
+            self._reload()
+
+    def _reload(self):
+        """Read the meta file and map the matrix again if it changed (call with _lock held)"""
+        signature = self._meta_signature()
+        if signature is None or signature == self._signature:
+            return
+        with open(self.meta_path, 'r') as f:
+            meta = json.load(f)
+        # Map first: lock-free readers must never see days or items the
+        # current matrix cannot hold
+        self._matrix = np.load(self.path, mmap_mode='r+')
+        self.start, self.days, self.items = meta['start'], meta['days'], meta['items']
+        self._rows = {name: i for i, name in enumerate(self.items)}
+        self._signature = signature
+
+    def _write_meta(self):
+        atomic_write_json(self.meta_path, {'start': self.start, 'days': self.days, 'items': self.items}, indent=None)
+        self._signature = self._meta_signature()
+
+    # -- growth (file lock held) -------------------------------------------
+
+    def _ensure_capacity(self, items, days):
+        """Grow the backing file (doubling) so it holds items x days"""
+        old = self._matrix
+        if old is not None and items <= old.shape[0] and days <= old.shape[1]:
+            return
+        new_items, new_days = old.shape if old is not None else (INITIAL_ITEMS, INITIAL_DAYS)
+        while new_items < items:
+            new_items *= 2
+        while new_days < days:
+            new_days *= 2
+
+        tmp = self.path + '.tmp'
+        matrix = np.lib.format.open_memmap(tmp, mode='w+', dtype=DTYPE, shape=(new_items, new_days))
+        matrix[:] = np.nan
+        if old is not None:
+            matrix[:old.shape[0], :old.shape[1]] = old
+        matrix.flush()
+        del matrix
+        os.replace(tmp, self.path)
+        # One assignment: readers hold either the old mapping or the new one
+        self._matrix = np.load(self.path, mmap_mode='r+')
+
+    def _row(self, name):
+        row = self._rows.get(name)
+        if row is None:
+            row = len(self.items)
+            self._ensure_capacity(row + 1, max(self.days, 1))
+            self.items.append(name)
+            self._rows[name] = row
+        return row
+
+    # -- writes ----------------------------------------------------------
+
+    def record(self, day, prices):
+        """Store {item name: price} for a day (appending rows up to it as needed)"""
+        ordinal = day.toordinal()
+        with self._lock, file_lock(self.lock_path):
+            # Another process may have written (or grown the file) since we looked
+            self._reload()
+            if self.start is None:
+                self.start = ordinal
+            if ordinal < self.start:
+                raise ValueError(f"history starts on {date.fromordinal(self.start)}; cannot record {day}")
+            day_index = ordinal - self.start
+            rows = [self._row(name) for name in prices]
+            self._ensure_capacity(len(self.items), day_index + 1)
+            self._matrix[rows, day_index] = list(prices.values())
+            self._matrix.flush()
+            if day_index >= self.days:
+                self.days = day_index + 1
+            self._write_meta()
+
+    # -- reads -----------------------------------------------------------
+
+    def __contains__(self, name):
+        self._refresh()
+        return name in self._rows
+
+    def last_day(self):
+        self._refresh()
+        return date.fromordinal(self.start + self.days - 1) if self.days else None
+
+    def series(self, name, start=None, end=None):
+        """Return (first date, prices view) for an item between start and end (inclusive)"""
+        self._refresh()
+        row = self._rows.get(name)
+        if row is None or not self.days:
+            return None, self._empty()
+        lo = 0 if start is None else max(start.toordinal() - self.start, 0)
+        hi = self.days if end is None else min(end.toordinal() - self.start + 1, self.days)
+        if hi <= lo:
+            return None, self._empty()
+        return date.fromordinal(self.start + lo), self._matrix[row, lo:hi]
+
+    @staticmethod
+    def _empty():
+        return np.empty(0, dtype=DTYPE)
+
+    def price_on(self, name, day):
+        """Last recorded price on or before day (falls back to the first price after it)"""
+        for start in (date.fromordinal(day.toordinal() - PRICE_LOOKBACK_DAYS), None):
+            _, before = self.series(name, start=start, end=day)
+            known = before[~np.isnan(before)]
+            if len(known):
+                return float(known[-1])
+        _, after = self.series(name, start=day)
+        known = after[~np.isnan(after)]
+        return float(known[0]) if len(known) else None
+
+    def legacy_fields(self, name, today=None):
+        """Return {'current', 'yesterday', 'week', 'month', 'year'} prices for an item"""
+        today = today or self.last_day()
+        if today is None:
+            return None
+        out = {}
+        for field, offset in LEGACY_OFFSETS:
+            price = self.price_on(name, date.fromordinal(today.toordinal() - offset))
+            if price is None:
+                return None
+            out[field] = round(price)
+        return out
+
+    def stats(self):
+        self._refresh()
+        shape = self._matrix.shape if self._matrix is not None else (0, 0)
+        return {
+            'items': len(self.items),
+            'days': self.days,
+            'start': date.fromordinal(self.start).isoformat() if self.start else None,
+            'capacity': list(shape),
+            'file_bytes': int(np.prod(shape)) * np.dtype(DTYPE).itemsize
+        }
@@ -0,0 +1,245 @@
+"""In-memory market prices, persisted as snapshot + append-only log.
+
+`PriceStore` keeps the parsed data in memory. Updates append the changed
+items to `market_prices.log` and are compacted into the `market_prices.json`
+snapshot periodically. Writers in several processes are serialized with an
+flock, and derived values are cached per data version via `derived()`.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process locking only
+    fcntl = None
+
+# Key in the snapshot holding the last log sequence number it includes
+SNAPSHOT_SEQ_KEY = 'log_seq'
+
+
+def atomic_write_json(path, data, indent=2):
+    """Write JSON to a temp file in the same directory, fsync it and rename it over path"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def apply_record(data, record):
+    """Return a new data dict with one log record applied (unchanged items are shared)"""
+    changes = record['items']
+    items = []
+    for item in data['items']:
+        fields = changes.get(item['name'])
+        items.append(dict(item, **fields) if fields else item)
+    known = {item['name'] for item in data['items']}
+    items.extend(dict(fields, name=name) for name, fields in changes.items() if name not in known)
+    out = dict(data, items=items)
+    if record.get('last_updated'):
+        out['last_updated'] = record['last_updated']
+    return out
+
+
+@contextmanager
+def file_lock(path, shared=False):
+    """Hold an flock on path (created if needed); a no-op without fcntl"""
+    if fcntl is None:
+        yield
+        return
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class PriceStore:
+    """In-memory price data backed by an atomic snapshot and an append-only log"""
+
+    def __init__(self, path, default=None, log_path=None, snapshot_every=100, check_interval=1.0):
+        self.path = path
+        self.log_path = log_path or os.path.splitext(path)[0] + '.log'
+        self.lock_path = path + '.lock'
+        self.default = default              # called to create the snapshot when missing
+        self.snapshot_every = snapshot_every
+        self.check_interval = check_interval
+        self.version = 0
+        self.loads = 0
+        self.snapshots = 0
+        self._seq = 0                       # last log record applied
+        self._log_records = 0               # records in the log since the snapshot
+        self._state = None                  # (data, derived values of that data)
+        self._signature = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _stat(self):
+        signature = []
+        for path in (self.path, self.log_path):
+            try:
+                st = os.stat(path)
+                signature.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def get(self):
+        """Return the current data, re-reading the files only if they changed on disk"""
+        return self._current()[0]
+
+    def _current(self):
+        state = self._state
+        now = time.monotonic()
+        if state is not None and now - self._checked_at < self.check_interval:
+            return state
+
+        signature = self._stat()
+        if signature[0] is None and self.default is not None:
+            # default() writes the snapshot through commit()
+            self.default()
+            return self._state
+        with self._lock:
+            self._checked_at = now
+            if signature != self._signature:
+                with self._file_lock(shared=True):
+                    self._load()
+                    self._signature = self._stat()
+            return self._state
+
+    def _file_lock(self, shared=False):
+        """Hold the cross-process lock on the store files"""
+        return file_lock(self.lock_path, shared)
+
+    def _catch_up(self):
+        """Reload if another process changed the files (call with the file lock held)"""
+        if self._state is None or self._stat() != self._signature:
+            self._load()
+
+    def _load(self):
+        """Read the snapshot and replay the log records written after it"""
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        seq = data.pop(SNAPSHOT_SEQ_KEY, 0)
+        records = 0
+        for record in self._read_log():
+            if record['seq'] > seq:
+                data = apply_record(data, record)
+                seq = record['seq']
+                records += 1
+        self.loads += 1
+        self._seq, self._log_records = seq, records
+        self._install(data)
+
+    def _read_log(self):
+        """Yield each complete log record"""
+        try:
+            f = open(self.log_path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Torn write at the tail, still unterminated
+                    return
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Torn write that a later append terminated
+                    continue
+
+    def apply(self, changes, last_updated=None):
+        """Log and apply {item name: {field: value}}; cost follows the number of changed items"""
+        self._current()
+        changes = {name: fields for name, fields in changes.items() if fields}
+        with self._lock, self._file_lock():
+            self._catch_up()
+            if not changes and not last_updated:
+                return self._state[0]
+            record = {'seq': self._seq + 1, 'last_updated': last_updated, 'items': changes}
+            line = (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')
+            with open(self.log_path, 'ab+') as f:
+                # A crash mid-append leaves an unterminated line: end it so the
+                # new record starts on its own line (replay skips the fragment)
+                if f.seek(0, os.SEEK_END):
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        line = b'\n' + line
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._seq += 1
+            self._log_records += 1
+            self._install(apply_record(self._state[0], record))
+            if self._log_records >= self.snapshot_every:
+                self._write_snapshot(self._state[0])
+            self._signature = self._stat()
+            self._checked_at = time.monotonic()
+            return self._state[0]
+
+    def commit(self, data):
+        """Replace the whole dataset: write it as a new snapshot and make it current"""
+        with self._lock, self._file_lock():
+            # Pick up the latest sequence number so the snapshot covers every logged record
+            if os.path.exists(self.path):
+                self._catch_up()
+            self._write_snapshot(data)
+            self._install(data)
+            self._signature = self._stat()
+            self._checked_at = time.monotonic()
+        return data
+
+    def compact(self):
+        """Fold the log into a new snapshot now"""
+        self._current()
+        with self._lock, self._file_lock():
+            self._catch_up()
+            self._write_snapshot(self._state[0])
+            self._signature = self._stat()
+
+    def _write_snapshot(self, data):
+        atomic_write_json(self.path, dict(data, **{SNAPSHOT_SEQ_KEY: self._seq}))
+        # Records up to _seq are in the snapshot now; if we crash before the
+        # truncate they are skipped on replay by their sequence numbers
+        open(self.log_path, 'w').close()
+        self._log_records = 0
+        self.snapshots += 1
+
+    def _install(self, data):
+        self._state = (data, {})
+        self.version += 1
+
+    def derived(self, key, compute):
+        """Return compute(data), computed once per data version"""
+        data, derived = self._current()
+        if key not in derived:
+            derived[key] = compute(data)
+        return derived[key]
+
+    def item(self, name):
+        """Look up an item by case-insensitive name"""
+        index = self.derived('by_name', lambda data: {i['name'].lower(): i for i in data['items']})
+        return index.get(name.lower())
+
+    def stats(self):
+        return {
+            'version': self.version,
+            'loads': self.loads,
+            'snapshots': self.snapshots,
+            'log_seq': self._seq,
+            'log_records': self._log_records,
+            'path': self.path,
+            'log_path': self.log_path
+        }
@@ -0,0 +1,72 @@
+"""Materialized per-region detail views.
+
+`MaterializedViews` keeps built views in a bounded LRU dict, each stamped with
+the input versions it was built from; a lookup with a changed stamp rebuilds
+that view. Unknown keys (build returned None) are cached too.
+"""
+import threading
+from collections import OrderedDict
+
+
+class MaterializedViews:
+    """Bounded LRU of built views, invalidated by comparing input-version stamps"""
+
+    def __init__(self, build, stamp, max_entries=4096):
+        self.build = build
+        self.stamp = stamp
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (stamp, view)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def get(self, key):
+        """Return the view for key, building it if missing or stale (None if build returns None)"""
+        stamp = self.stamp(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is None:
+                self.misses += 1
+            else:
+                self.stale += 1
+        return self._store(key, stamp)
+
+    def materialize(self, keys):
+        """Build views for keys now; returns how many were built"""
+        built = 0
+        for key in keys:
+            if self._store(key, self.stamp(key)) is not None:
+                built += 1
+        return built
+
+    def _store(self, key, stamp):
+        view = self.build(key)
+        with self._lock:
+            self._entries[key] = (stamp, view)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return view
+
+    def invalidate(self, key=None):
+        """Drop one view, or every view when key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale
+            }
@@ -0,0 +1,151 @@
+"""Vectorized disease-risk scoring for heatmap zones.
+
+Risk for every district x crop x disease is a NumPy broadcast of weather
+suitability, crop susceptibility and disease severity; a zone's score is its
+highest disease risk. Districts without coordinates are placed at their
+state's centroid. `load_disease_catalog()` reads `DISEASES` from
+`CSS/disease.py` without importing it (that module creates a Flask app).
+"""
+import ast
+
+import numpy as np
+
+from heatmap_grid import risk_level
+
+SEVERITY_WEIGHTS = {
+    'very high': 1.0,
+    'high': 0.85,
+    'moderate to high': 0.75,
+    'moderate': 0.6,
+    'low': 0.4
+}
+DEFAULT_SEVERITY = 0.6
+
+# Catalog entries that apply to every crop ("Various crops") get this weight
+GENERIC_SUSCEPTIBILITY = 0.5
+
+# Climate each disease favours: (optimal temperature C, temperature spread C,
+# humidity % above which infection starts, rainfall mm giving ~63% of the rain effect)
+CLIMATE_PROFILES = {
+    'early_blight': (27, 6, 70, 10),
+    'late_blight': (18, 5, 85, 15),
+    'powdery_mildew': (24, 7, 50, 40),
+    'bacterial_spot': (28, 6, 75, 10),
+    'septoria_leaf_spot': (24, 6, 80, 10),
+    'mosaic_virus': (27, 8, 40, 50),
+    'leaf_curl': (30, 6, 45, 50),
+    'black_rot': (27, 6, 80, 10),
+    'rust': (20, 6, 75, 15),
+    'anthracnose': (27, 6, 85, 10),
+    'downy_mildew': (18, 6, 85, 10),
+    'fusarium_wilt': (28, 5, 60, 30),
+    'cercospora_leaf_spot': (28, 6, 80, 15),
+    'verticillium_wilt': (22, 5, 60, 30),
+    'alternaria_leaf_spot': (25, 6, 75, 12)
+}
+DEFAULT_CLIMATE = (25, 7, 70, 15)
+
+# Diseases at or above this risk are listed on the zone
+DISEASE_LIST_THRESHOLD = 30
+MAX_LISTED_DISEASES = 3
+
+
+def load_disease_catalog(path):
+    """Return the DISEASES dict literal from a source file without executing it"""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, 'id', None) == 'DISEASES' for t in node.targets):
+            return ast.literal_eval(node.value)
+    return {}
+
+
+class RiskEngine:
+    """Precomputed disease/crop matrices; scores district weather in one batch"""
+
+    def __init__(self, catalog, crops, centroids=None):
+        self.crops = list(crops)
+        self.centroids = dict(centroids or {})   # state -> (lat, lon)
+        self.disease_ids = list(catalog)
+        self.disease_names = [catalog[d].get('name', d) for d in self.disease_ids]
+
+        crop_index = {c.lower(): i for i, c in enumerate(self.crops)}
+        self.susceptibility = np.zeros((len(self.crops), len(self.disease_ids)))
+        for k, disease_id in enumerate(self.disease_ids):
+            for plant in catalog[disease_id].get('plant', '').split(','):
+                plant = plant.strip().lower()
+                if plant == 'various crops':
+                    self.susceptibility[:, k] = np.maximum(self.susceptibility[:, k], GENERIC_SUSCEPTIBILITY)
+                elif plant in crop_index:
+                    self.susceptibility[crop_index[plant], k] = 1.0
+
+        self.severity = np.array([
+            SEVERITY_WEIGHTS.get(catalog[d].get('severity', '').lower(), DEFAULT_SEVERITY) for d in self.disease_ids
+        ])
+        climate = np.array([CLIMATE_PROFILES.get(d, DEFAULT_CLIMATE) for d in self.disease_ids], dtype=float).reshape(-1, 4)
+        self.t_opt, self.t_width, self.h_min, self.rain_scale = climate.T
+
+    def score(self, temperature, humidity, rainfall):
+        """Return risk as a (districts, crops, diseases) array of 0-100 scores"""
+        t = np.asarray(temperature, dtype=float)[:, None]
+        h = np.asarray(humidity, dtype=float)[:, None]
+        r = np.asarray(rainfall, dtype=float)[:, None]
+
+        temp_factor = np.exp(-((t - self.t_opt) / self.t_width) ** 2)
+        humidity_factor = np.clip((h - self.h_min) / (100 - self.h_min), 0, 1)
+        rain_factor = 1 - np.exp(-r / self.rain_scale)
+        weather = temp_factor * (0.65 * humidity_factor + 0.35 * rain_factor)  # (D, K)
+
+        return 100 * weather[:, None, :] * self.susceptibility[None, :, :] * self.severity
+
+    def zones(self, districts):
+        """Build heatmap zone records for every district x crop.
+
+        `districts` is a list of dicts with state, district, temperature,
+        humidity, rainfall and optionally lat, lon and cropped_area (acres).
+        A district without lat/lon gets its state's centroid (None if unknown).
+        """
+        if not districts or not self.crops:
+            return []
+        risk = self.score(
+            [d['temperature'] for d in districts],
+            [d['humidity'] for d in districts],
+            [d.get('rainfall', 0) for d in districts]
+        )
+        if risk.shape[2]:
+            zone_score = risk.max(axis=2)
+            # Top diseases per zone, highest risk first
+            top = np.argsort(-risk, axis=2, kind='stable')[:, :, :MAX_LISTED_DISEASES]
+        else:
+            zone_score = np.zeros(risk.shape[:2])
+            top = np.zeros(risk.shape[:2] + (0,), dtype=int)
+        listed = np.take_along_axis(risk, top, axis=2) >= DISEASE_LIST_THRESHOLD
+        scores = np.rint(zone_score).astype(int).tolist()
+        top_list, listed = top.tolist(), listed.tolist()
+
+        zones = []
+        for i, district in enumerate(districts):
+            area = district.get('cropped_area', 100)
+            lat, lon = district.get('lat'), district.get('lon')
+            if lat is None or lon is None:
+                lat, lon = self.centroids.get(district['state'], (None, None))
+            for c, crop in enumerate(self.crops):
+                score = scores[i][c]
+                diseases = [self.disease_names[k] for k, keep in zip(top_list[i][c], listed[i][c]) if keep]
+                zones.append({
+                    'state': district['state'],
+                    'district': district['district'],
+                    'crop': crop,
+                    'season': district.get('season'),
+                    'risk_level': risk_level(score),
+                    'risk_score': score,
+                    'diseases': diseases,
+                    'humidity': district['humidity'],
+                    'temperature': district['temperature'],
+                    'rainfall': district.get('rainfall', 0),
+                    'affected_area': round(area * score / 100),
+                    'description': f"{risk_level(score)} Risk - {diseases[0]}" if diseases else 'Low Risk - All Clear',
+                    'lat': lat,
+                    'lon': lon
+                })
+        return zones
@@ -2,9 +2,11 @@ from flask import Flask, render_template, request, jsonify
 from flask_cors import CORS
 import json
 from datetime import datetime
+from compression import Compression
 
 app = Flask(_name_)
 CORS(app)  # Enable CORS for frontend-backend communication
+Compression(app)  # ETags, 304s and gzip/brotli for large responses
 
 # Schemes database
 SCHEMES = [
@@ -0,0 +1,130 @@
+"""Fingerprinted, precompressed static assets served from memory.
+
+`StaticAssets.build()` reads the app's CSS/JS/image files once, publishes them
+under content-hashed names with gzip (and brotli) variants, and rewrites
+`url(...)`, `href=` and `src=` references to those names. Range requests are
+answered from the uncompressed bytes; unknown names fall back to the disk.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+
+from flask import request, send_from_directory, Response
+
+from compression import brotli, is_compressible
+
+ASSET_EXTENSIONS = ('.css', '.js', '.svg', '.png', '.jpg', '.jpeg', '.gif', '.webp', '.ico')
+PAGE_EXTENSIONS = ('.html',)
+FINGERPRINT_LENGTH = 10
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# href="style.css" / src='heatmap.js' (local, relative references only)
+_REFERENCE = re.compile(r'''(\b(?:href|src)\s*=\s*)(["'])([^"'#?:]+)\2''')
+# url(bg.png) / url("bg.png") in stylesheets (local, relative references only)
+_CSS_REFERENCE = re.compile(r'''(\burl\(\s*)(["']?)([^"'()#?:\s]+)\2(?=\s*\))''')
+STYLESHEET_EXTENSIONS = ('.css',)
+
+
+def fingerprinted_name(name, digest):
+    base, ext = os.path.splitext(name)
+    return f"{base}.{digest[:FINGERPRINT_LENGTH]}{ext}"
+
+
+class Asset:
+    """One file's bytes plus precompressed variants and caching metadata"""
+
+    def __init__(self, body, mimetype):
+        self.mimetype = mimetype
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.variants = {None: body}
+        if is_compressible(mimetype):
+            gz = gzip.compress(body, compresslevel=9)
+            if len(gz) < len(body):
+                self.variants['gzip'] = gz
+            if brotli is not None:
+                br = brotli.compress(body, quality=11)
+                if len(br) < len(body):
+                    self.variants['br'] = br
+
+    def encoding_for(self, accept_encodings):
+        """Smallest precompressed variant the client accepts"""
+        accepted = [e for e in self.variants if e is not None and accept_encodings[e] > 0]
+        return min(accepted, key=lambda e: len(self.variants[e]), default=None)
+
+
+class StaticAssets:
+    """In-memory store of the app's static files keyed by URL name"""
+
+    def __init__(self, root):
+        self.root = root
+        self.assets = {}        # URL name (plain or fingerprinted) -> Asset
+        self.fingerprints = {}  # plain name -> fingerprinted name
+        self._immutable = set()  # fingerprinted names
+
+    def build(self):
+        """Read, fingerprint and precompress every asset, then rewrite the pages"""
+        assets, fingerprints = {}, {}
+        names = sorted(n for n in os.listdir(self.root) if os.path.isfile(os.path.join(self.root, n)))
+        # Stylesheets go last: their url() references are rewritten before they are hashed
+        asset_names = sorted((n for n in names if n.lower().endswith(ASSET_EXTENSIONS)),
+                             key=lambda n: n.lower().endswith(STYLESHEET_EXTENSIONS))
+        for name in asset_names:
+            body = self._read(name)
+            if name.lower().endswith(STYLESHEET_EXTENSIONS):
+                css = body.decode('utf-8')
+                body = _CSS_REFERENCE.sub(lambda m: self._rewrite(m, fingerprints), css).encode('utf-8')
+            digest = hashlib.sha256(body).hexdigest()
+            mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+            fingerprints[name] = fingerprinted_name(name, digest)
+            # The plain name still works (old links, scripts) but must revalidate
+            assets[name] = assets[fingerprints[name]] = Asset(body, mimetype)
+
+        for name in names:
+            if name.lower().endswith(PAGE_EXTENSIONS):
+                html = self._read(name).decode('utf-8')
+                html = _REFERENCE.sub(lambda m: self._rewrite(m, fingerprints), html)
+                assets[name] = Asset(html.encode('utf-8'), 'text/html')
+
+        self.assets, self.fingerprints = assets, fingerprints
+        self._immutable = set(fingerprints.values())
+        return self
+
+    def _read(self, name):
+        with open(os.path.join(self.root, name), 'rb') as f:
+            return f.read()
+
+    @staticmethod
+    def _rewrite(match, fingerprints):
+        prefix, quote, url = match.groups()
+        path = url[2:] if url.startswith('./') else url
+        if path not in fingerprints:
+            return match.group(0)
+        return f"{prefix}{quote}{fingerprints[path]}{quote}"
+
+    def send(self, name):
+        """Serve an asset from memory for the current request, or fall back to the file"""
+        asset = self.assets.get(name)
+        if asset is None:
+            return send_from_directory(self.root, name)
+
+        # A byte range refers to the identity bytes, never to a compressed variant
+        encoding = None if request.range else asset.encoding_for(request.accept_encodings)
+        response = Response(asset.variants[encoding], mimetype=asset.mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if len(asset.variants) > 1:
+            response.vary.add('Accept-Encoding')
+        # Same ETag for every encoding, so it is weak once variants exist
+        response.set_etag(asset.etag, weak=len(asset.variants) > 1)
+        response.cache_control.public = True
+        if name in self._immutable:
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+        if encoding:
+            return response.make_conditional(request)
+        body = asset.variants[None]
+        return response.make_conditional(request, accept_ranges=True, complete_length=len(body))
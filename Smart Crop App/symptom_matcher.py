@@ -0,0 +1,83 @@
+"""Single-pass keyword matching for symptom descriptions.
+
+`SymptomMatcher` compiles the symptom vocabulary into an Aho-Corasick
+automaton and finds every keyword in one scan of the description, reporting
+symptoms in the order they first appear.
+"""
+from collections import deque
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton over a fixed set of keywords"""
+
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+        self._goto = [{}]     # state -> {char: next state}
+        self._fail = [0]      # state -> failure state
+        self._output = [[]]   # state -> keyword ids ending here (incl. via fail links)
+
+        for keyword_id, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in keyword:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = nxt
+            self._output[state].append(keyword_id)
+
+        # Breadth-first pass to fill failure links and merge outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def iter_matches(self, text):
+        """Yield (end_index, keyword_id) for every keyword occurrence in text"""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for keyword_id in output[state]:
+                yield i, keyword_id
+
+
+class SymptomMatcher:
+    """Map free-text descriptions to symptom keys such as 'leaf_spots'"""
+
+    def __init__(self, symptoms):
+        # Each symptom key is made of words ('brown_patches' -> brown, patches);
+        # any one of them appearing in the text counts as a hit for that key
+        self.symptoms = list(symptoms)
+        word_to_symptoms = {}
+        for symptom in self.symptoms:
+            for word in symptom.split('_'):
+                if word:
+                    word_to_symptoms.setdefault(word.lower(), []).append(symptom)
+        self._automaton = AhoCorasick(word_to_symptoms)
+        self._keyword_symptoms = [word_to_symptoms[w] for w in self._automaton.keywords]
+
+    def match(self, text):
+        """Return matched symptom keys ordered by their first hit in text"""
+        found = []
+        seen = set()
+        total = len(self.symptoms)
+        for _, keyword_id in self._automaton.iter_matches((text or '').lower()):
+            for symptom in self._keyword_symptoms[keyword_id]:
+                if symptom not in seen:
+                    seen.add(symptom)
+                    found.append(symptom)
+            if len(found) == total:
+                break
+        return found
@@ -0,0 +1,210 @@
+import io
+import json
+import sys
+import threading
+import time
+
+import pytest
+
+import crop_planner
+
+
+@pytest.fixture
+def client():
+    return crop_planner.app.test_client()
+
+
+def etag(response):
+    return response.headers['ETag'].strip('"')
+
+
+def test_weather_bundle_calls_stay_inside_the_deadline(monkeypatch):
+    calls = []
+
+    class Reply:
+        status_code = 200
+
+        def json(self):
+            return {'coord': {'lat': 30.9, 'lon': 75.8}, 'name': 'Ludhiana'}
+
+    def get(url, params=None, timeout=None):
+        calls.append((url, timeout))
+        time.sleep(timeout)
+        return Reply()
+
+    monkeypatch.setattr(crop_planner.weather_session, 'get', get)
+    crop_planner.weather_cache.invalidate()
+    started = time.monotonic()
+    crop_planner.fetch_weather_bundle('Deadline Test City', deadline=0.2)
+    assert time.monotonic() - started < 1
+    assert calls and all(url.startswith('https://') and timeout <= 0.2 for url, timeout in calls)
+
+
+def test_alerts_limit_is_bounded(client):
+    assert client.get('/api/alerts?limit=0').get_json()['alerts'] == []
+    assert len(client.get('/api/alerts?limit=3&fields=id').get_json()['alerts']) == 3
+    assert client.get('/api/alerts?limit=abc').status_code == 400
+
+
+def test_heatmap_grid_rejects_non_finite_bbox(client):
+    assert client.get('/api/heatmap-grid?bbox=0,0,inf,10').status_code == 400
+    assert client.get('/api/heatmap-grid?bbox=0,0,nan,10').status_code == 400
+    response = client.get('/api/heatmap-grid?bbox=-500,-100,500,100&zoom=2')
+    assert response.status_code == 200
+    assert response.get_json()['bbox'] == [-180.0, -90.0, 180.0, 90.0]
+
+
+def test_district_weather_rejects_non_numeric_observations(client):
+    body = [{'state': 'Punjab', 'district': 'Ludhiana', 'temperature': 'hot', 'humidity': 80}]
+    response = client.post('/api/district-weather', json=body)
+    assert response.status_code == 400
+    assert 'temperature' in response.get_json()['error']
+
+
+def test_region_details_without_a_region_returns_the_mocked_details(client):
+    response = client.get('/api/region-details?crop=Wheat')
+    assert response.status_code == 200
+    details = response.get_json()
+    assert (details['state'], details['district'], details['crop']) == ('Unknown', 'Unknown District', 'Wheat')
+
+
+def test_unknown_region_is_a_cached_404(client):
+    url = '/api/region-details?state=Nowhere&district=Nothing&crop=Rice'
+    assert client.get(url).status_code == 404
+    misses = crop_planner.region_views.stats()['misses']
+    assert client.get(url).status_code == 404
+    assert crop_planner.region_views.stats()['misses'] == misses
+
+
+def test_bootstrap_section_etags_match_standalone_endpoints(client):
+    filters = 'state=Punjab&district=all&crop=all&season='
+    sections = client.get(f'/api/heatmap-bootstrap?{filters}&limit=4').get_json()['sections']
+    assert 'region-details' not in sections
+    assert sections['heatmap-data']['etag'] == etag(client.get(f'/api/heatmap-data?{filters}'))
+    assert sections['alerts']['etag'] == etag(client.get('/api/alerts?limit=4'))
+    assert sections['trend-data']['etag'] == etag(client.get('/api/trend-data?state=Punjab&crop=all'))
+
+    have = ','.join(f"{name}:{s['etag']}" for name, s in sections.items())
+    again = client.get(f'/api/heatmap-bootstrap?{filters}&limit=4&have={have}').get_json()['sections']
+    assert all(s.get('not_modified') for s in again.values())
+
+
+def test_bootstrap_region_details_for_a_selected_zone(client):
+    zone = client.get('/api/heatmap-data?limit=1').get_json()['data'][0]
+    query = f"state={zone['state']}&district={zone['district']}&crop={zone['crop']}"
+    section = client.get(f'/api/heatmap-bootstrap?{query}').get_json()['sections']['region-details']
+    standalone = client.get(f'/api/region-details?{query}')
+    assert standalone.status_code == 200
+    assert section['etag'] == etag(standalone)
+    assert section['data']['risk_score'] == zone['risk_score']
+
+
+def test_range_requests_get_identity_bytes(client):
+    full = client.get('/heatmap.js')
+    response = client.get('/heatmap.js', headers={'Accept-Encoding': 'gzip', 'Range': 'bytes=0-9'})
+    assert response.status_code == 206
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == full.data[:10]
+
+
+def test_batch_rejects_unknown_output_format(client):
+    response = client.post('/api/analyze/batch?format=xml', data='{}\n', content_type='application/x-ndjson')
+    assert response.status_code == 400
+    assert 'format' in response.get_json()['error']
+
+
+def test_batch_csv_names_missing_header_columns(client):
+    body = 'region,season,ph\nPunjab,Kharif,7\n'
+    response = client.post('/api/analyze/batch', data=body, content_type='text/csv')
+    rows = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert rows == [{'row': 1, 'success': False, 'error': 'CSV header is missing columns: soil_type, water_availability'}]
+
+
+def test_batch_reports_missing_fields_per_row(client):
+    body = '{"region": "Punjab", "season": "Kharif", "soil_type": "Loamy"}\n'
+    response = client.post('/api/analyze/batch?format=csv', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 200
+    assert response.data.decode().splitlines()[1].endswith('missing water_availability')
+
+
+def test_analyze_returns_503_when_the_upload_queue_is_full(client, monkeypatch):
+    release = threading.Event()
+    queue = crop_planner.UploadQueue(lambda stream, name: release.wait(5), max_workers=1, max_pending=1,
+                                     max_wait=0.01, retry_after=3)
+    monkeypatch.setattr(crop_planner, 'upload_queue', queue)
+    form = {'region': 'Punjab', 'season': 'Kharif', 'soil_type': 'Loamy', 'water_availability': 'high'}
+    try:
+        first = client.post('/api/analyze', data=dict(form, image=(io.BytesIO(b'a'), 'a.jpg')))
+        assert first.status_code == 200
+        second = client.post('/api/analyze', data=dict(form, image=(io.BytesIO(b'b'), 'b.jpg')))
+        assert second.status_code == 503
+        assert second.headers['Retry-After'] == '3'
+    finally:
+        release.set()
+
+
+def test_district_without_coordinates_is_placed_at_its_state_centroid(client):
+    body = [{'state': 'Punjab', 'district': 'Centroid Test', 'temperature': 25, 'humidity': 75}]
+    assert client.post('/api/district-weather', json=body).status_code == 200
+    zone = client.get('/api/heatmap-data?district=Centroid%20Test&limit=1').get_json()['data'][0]
+    assert (zone['lat'], zone['lon']) == crop_planner.heatmap_module.STATE_CENTROIDS['Punjab']
+    lat, lon = zone['lat'], zone['lon']
+    cells = client.get(f'/api/heatmap-grid?bbox={lon - 0.01},{lat - 0.01},{lon + 0.01},{lat + 0.01}&zoom=10').get_json()['cells']
+    assert sum(c['zones'] for c in cells) >= len(crop_planner.HEATMAP_CROPS)
+
+
+def test_district_without_coordinates_or_known_state_is_rejected(client):
+    body = [{'state': 'Atlantis', 'district': 'Nowhere', 'temperature': 25, 'humidity': 75}]
+    response = client.post('/api/district-weather', json=body)
+    assert response.status_code == 400
+    assert 'lat and lon' in response.get_json()['error']
+
+
+def test_heatmap_reads_survive_concurrent_district_updates(client):
+    stop = threading.Event()
+    errors = []
+
+    def write():
+        i = 0
+        while not stop.is_set():
+            i += 1
+            body = [{'state': 'Punjab', 'district': f'Concurrency {i % 40}', 'temperature': 20 + i % 15,
+                     'humidity': 50 + i % 40, 'lat': 29 + (i % 7) * 0.5, 'lon': 73 + (i % 9) * 0.5}]
+            try:
+                crop_planner.heatmap_layer.update_districts(body)
+            except Exception as e:
+                errors.append(e)
+
+    writer = threading.Thread(target=write)
+    # Switch threads often so reads land in the middle of an update
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    writer.start()
+    try:
+        deadline = time.monotonic() + 1.5
+        while time.monotonic() < deadline:
+            for zoom in (4, 7, 10):
+                assert client.get(f'/api/heatmap-grid?bbox=60,0,100,40&zoom={zoom}').status_code == 200
+                for _ in range(20):
+                    crop_planner.heatmap_grid.query((60, 0, 100, 40), zoom)
+                    crop_planner.zone_store.query({'state': 'Punjab', 'crop': 'Rice'})
+            assert client.get('/api/heatmap-data?state=Punjab&limit=50').status_code == 200
+    finally:
+        stop.set()
+        writer.join()
+        sys.setswitchinterval(interval)
+    assert not errors
+
+
+def test_market_prices_reject_bad_cursors(client):
+    for cursor in ('-3', 'next'):
+        response = client.get(f'/api/market-prices?cursor={cursor}')
+        assert response.status_code == 400
+        assert 'cursor' in response.get_json()['error']
+
+
+def test_sample_market_prices_keep_their_sample_date(client):
+    if crop_planner.mandi_prices.stats()['source'] != 'fallback':
+        pytest.skip('a mandi price store is present')
+    prices = client.get('/api/market-prices').get_json()['prices']
+    assert prices and {p['updated'] for p in prices} == {crop_planner.MANDI_SAMPLE_DATE}
@@ -0,0 +1,67 @@
+import io
+import os
+import stat
+import time
+
+import image_store
+from image_store import ImageStore
+
+
+def age(path, days):
+    past = time.time() - days * 86400
+    os.utime(path, (past, past))
+
+
+def test_identical_uploads_are_stored_once(tmp_path):
+    store = ImageStore(str(tmp_path))
+    first = store.save(io.BytesIO(b'leaf'), 'a.JPEG')
+    second = store.save(io.BytesIO(b'leaf'), 'b.jpg')
+    assert first == second
+    assert first.endswith('.jpg')
+    assert os.path.relpath(first, tmp_path).count(os.sep) == 2
+    assert store.stats()['stored'] == 1
+    assert store.stats()['deduplicated'] == 1
+    assert os.listdir(os.path.join(tmp_path, 'tmp')) == []
+
+
+def test_stored_files_get_the_umask_mode(tmp_path):
+    path = ImageStore(str(tmp_path)).save(io.BytesIO(b'leaf'), 'a.jpg')
+    assert stat.S_IMODE(os.stat(path).st_mode) == image_store.FILE_MODE
+
+
+def test_file_swept_between_check_and_save_is_written_again(tmp_path):
+    store = ImageStore(str(tmp_path))
+    path = store.save(io.BytesIO(b'leaf'), 'a.jpg')
+    os.remove(path)
+    assert store.save(io.BytesIO(b'leaf'), 'a.jpg') == path
+    assert os.path.exists(path)
+
+
+def test_sweep_covers_flat_files_and_orphaned_temp_files(tmp_path):
+    store = ImageStore(str(tmp_path), max_age_days=30)
+    kept = store.save(io.BytesIO(b'new'), 'new.jpg')
+    expired = store.save(io.BytesIO(b'old'), 'old.jpg')
+    age(expired, 60)
+    legacy = tmp_path / 'legacy.jpg'
+    legacy.write_bytes(b'legacy')
+    age(legacy, 60)
+    orphan = tmp_path / 'tmp' / 'tmpabc'
+    orphan.write_bytes(b'partial')
+    age(orphan, 1)
+    in_progress = tmp_path / 'tmp' / 'tmpdef'
+    in_progress.write_bytes(b'writing')
+
+    result = store.sweep()
+    assert result['removed_files'] == 3
+    assert os.path.exists(kept) and in_progress.exists()
+    assert not os.path.exists(expired) and not legacy.exists() and not orphan.exists()
+
+
+def test_sweep_enforces_the_size_cap_oldest_first(tmp_path):
+    store = ImageStore(str(tmp_path), max_bytes=10)
+    legacy = tmp_path / 'legacy.jpg'
+    legacy.write_bytes(b'x' * 8)
+    age(legacy, 2)
+    newer = store.save(io.BytesIO(b'y' * 8), 'new.jpg')
+    assert store.sweep()['total_bytes'] == 8
+    assert not legacy.exists() and os.path.exists(newer)
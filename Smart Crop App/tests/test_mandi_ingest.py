@@ -0,0 +1,88 @@
+import io
+
+import pytest
+
+from mandi_ingest import Ingestor, iter_records, main, map_columns, validate_row
+from mandi_store import connect
+
+HEADER = 'State,District,Market,Commodity,Variety,Arrival_Date,Min_x0020_Price,Max_x0020_Price,Modal_x0020_Price\n'
+
+
+def row(day, market='Khanna', commodity='Wheat', prices='2000,2200,2100'):
+    return f'Punjab,Ludhiana,{market},{commodity},Other,{day:02d}/01/2024,{prices}\n'
+
+
+def write_dump(path, rows):
+    path.write_text(HEADER + ''.join(rows))
+    return str(path)
+
+
+class Interrupted(Exception):
+    pass
+
+
+def test_header_aliases_and_validation():
+    mapping = map_columns(HEADER.strip().split(','))
+    assert validate_row(['Punjab', 'Ludhiana', 'Khanna', 'Wheat', '', '05/01/2024', '2,000', '2200', '2100'], mapping) == (
+        '2024-01-05', 'Punjab', 'Ludhiana', 'Khanna', 'Wheat', '', 2000.0, 2200.0, 2100.0)
+    with pytest.raises(ValueError, match='prices out of order'):
+        validate_row(['Punjab', '', 'Khanna', 'Wheat', '', '05/01/2024', '2300', '2200', '2100'], mapping)
+    with pytest.raises(ValueError, match='missing columns'):
+        map_columns(['State', 'Market'])
+
+
+def test_unbalanced_quote_is_rejected_without_swallowing_the_file():
+    data = HEADER + 'Punjab,"Ludhiana,Khanna,Wheat\n' + row(1)
+    records = list(iter_records(io.BytesIO(data.encode())))
+    assert records[1][0] is None
+    assert records[2][0][2] == 'Khanna'
+    assert len(records) == 3
+
+
+def test_duplicates_are_counted_not_inserted(tmp_path):
+    conn = connect(str(tmp_path / 'mandi.db'))
+    path = write_dump(tmp_path / 'dump.csv', [row(1), row(2), row(1), row(3, prices='x,1,1')])
+    progress = Ingestor(conn).ingest(path)
+    assert (progress['inserted'], progress['duplicates'], progress['rejected']) == (2, 1, 1)
+    assert progress['reject_reasons'] == {'bad min_price': 1}
+
+    second = write_dump(tmp_path / 'overlap.csv', [row(2), row(4)])
+    progress = Ingestor(conn).ingest(second)
+    assert (progress['inserted'], progress['duplicates']) == (1, 1)
+    assert conn.execute('SELECT COUNT(*) FROM mandi_prices').fetchone()[0] == 3
+
+
+def test_interrupted_run_resumes_from_its_checkpoint(tmp_path):
+    conn = connect(str(tmp_path / 'mandi.db'))
+    path = write_dump(tmp_path / 'dump.csv', [row(day) for day in range(1, 8)])
+
+    def stop_after_first_chunk(progress):
+        raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        Ingestor(conn, chunk_size=3, report=stop_after_first_chunk).ingest(path)
+    assert conn.execute('SELECT COUNT(*) FROM mandi_prices').fetchone()[0] == 3
+
+    progress = Ingestor(conn, chunk_size=3).ingest(path)
+    assert progress['rows_read'] == 7
+    assert progress['inserted'] == 7
+    assert progress['duplicates'] == 0
+    assert Ingestor(conn).ingest(path)['skipped']
+
+
+def test_changed_file_is_read_again(tmp_path):
+    conn = connect(str(tmp_path / 'mandi.db'))
+    path = write_dump(tmp_path / 'dump.csv', [row(1)])
+    Ingestor(conn).ingest(path)
+    write_dump(tmp_path / 'dump.csv', [row(1), row(2)])
+    progress = Ingestor(conn).ingest(path)
+    assert (progress['rows_read'], progress['inserted'], progress['duplicates']) == (2, 1, 1)
+
+
+def test_command_line(tmp_path, capsys):
+    path = write_dump(tmp_path / 'dump.csv', [row(1)])
+    db = str(tmp_path / 'mandi.db')
+    assert main([path, '--db', db]) == 0
+    assert main([path, '--db', db]) == 0
+    assert 'already ingested' in capsys.readouterr().err
+    assert main([str(tmp_path / 'missing.csv'), '--db', db]) == 1
@@ -0,0 +1,71 @@
+from datetime import date
+
+import pytest
+
+from mandi_query import MandiPriceIndex
+
+ROWS = [
+    ('2024-01-01', 'Punjab', 'Ludhiana', 'Khanna', 'Wheat', 'Other', 2000.0, 2200.0, 2100.0),
+    ('2024-01-02', 'Punjab', 'Ludhiana', 'Khanna', 'Wheat', 'Other', 2050.0, 2250.0, 2150.0),
+    ('2024-01-02', 'Punjab', 'Ludhiana', 'Khanna', 'Paddy(Dhan)', 'Common', 1900.0, 2000.0, 1950.0),
+    ('2024-01-03', 'Maharashtra', 'Nashik', 'Lasalgaon', 'Onion', 'Red', 1500.0, 1900.0, 1700.5),
+    ('2024-01-01', 'Maharashtra', 'Pune', 'Pune', 'Wheat', 'Lokwan', 2600.0, 3000.0, 2800.0),
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    # No store on disk yet, so the fallback rows are served
+    return MandiPriceIndex(str(tmp_path / 'missing.db'), fallback=ROWS)
+
+
+def names(records):
+    return [(r['commodity'], r['mandi'], r['updated']) for r in records]
+
+
+def test_latest_rows_by_default(index):
+    records, _, total = index.query({'commodity': 'wheat'})
+    assert total == 2
+    assert names(records) == [('Wheat', 'Khanna', '2024-01-02'), ('Wheat', 'Pune', '2024-01-01')]
+
+
+def test_all_rows_with_date_range(index):
+    records, _, total = index.query({'state': 'PUNJAB'}, latest=False, start=date(2024, 1, 2), end=date(2024, 1, 2))
+    assert total == 2
+    assert {r['commodity'] for r in records} == {'Wheat', 'Paddy(Dhan)'}
+
+
+def test_commodity_prefix_and_substring(index):
+    assert [r['commodity'] for r in index.query({'commodity': 'pad'})[0]] == ['Paddy(Dhan)']
+    assert [r['commodity'] for r in index.query({'commodity': 'dhan'})[0]] == ['Paddy(Dhan)']
+    assert index.query({'commodity': 'rice'})[2] == 0
+
+
+def test_filters_combine(index):
+    records, _, total = index.query({'state': 'Maharashtra', 'mandi': 'pune'})
+    assert total == 1
+    assert records[0]['price'] == 2800
+
+
+def test_sort_and_cursor(index):
+    prices, cursor = [], None
+    while True:
+        records, cursor, total = index.query(sort='price', order='asc', limit=3, cursor=cursor)
+        prices.extend(r['price'] for r in records)
+        if cursor is None:
+            break
+    assert total == 4
+    assert prices == sorted(prices) == [1700.5, 1950, 2150, 2800]
+
+
+def test_invalid_sort(index):
+    with pytest.raises(ValueError):
+        index.query(sort='colour')
+    with pytest.raises(ValueError):
+        index.query(order='sideways')
+
+
+@pytest.mark.parametrize('cursor', ['-1', 'abc', '1.5'])
+def test_invalid_cursor(index, cursor):
+    with pytest.raises(ValueError, match='cursor'):
+        index.query(cursor=cursor)
@@ -0,0 +1,59 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+import price_history
+from price_history import PriceHistory
+
+DAY = date(2024, 1, 1)
+
+
+@pytest.fixture(autouse=True)
+def small_capacity(monkeypatch):
+    # Tiny initial file so a handful of records exercises growth
+    monkeypatch.setattr(price_history, 'INITIAL_DAYS', 4)
+    monkeypatch.setattr(price_history, 'INITIAL_ITEMS', 2)
+
+
+def test_growth_keeps_every_price(tmp_path):
+    history = PriceHistory(str(tmp_path / 'history.npy'), check_interval=0)
+    for i in range(10):
+        history.record(DAY + timedelta(days=i), {f'item{j}': 100 * j + i for j in range(i // 3 + 1)})
+    assert history.stats()['capacity'] == [4, 16]
+    first, prices = history.series('item0')
+    assert first == DAY and list(prices) == list(range(10))
+    first, prices = history.series('item2', start=DAY + timedelta(days=8))
+    assert first == DAY + timedelta(days=8) and list(prices) == [208, 209]
+    # An item's history is one contiguous run of the mapped file
+    assert prices.flags['C_CONTIGUOUS'] and np.shares_memory(prices, history._matrix)
+
+
+def test_other_readers_keep_a_valid_mapping_across_growth(tmp_path):
+    path = str(tmp_path / 'history.npy')
+    writer = PriceHistory(path, check_interval=0)
+    writer.record(DAY, {'Rice': 20})
+    reader = PriceHistory(path, check_interval=3600)
+    _, before = reader.series('Rice')
+
+    for i in range(1, 6):
+        writer.record(DAY + timedelta(days=i), {'Rice': 20 + i, 'Wheat': 30, 'Maize': 40})
+    # The old mapping still reads the old prices, not a relaid-out file
+    assert list(before) == [20]
+    assert 'Wheat' not in reader
+
+    reader.check_interval = 0
+    assert list(reader.series('Rice')[1]) == [20, 21, 22, 23, 24, 25]
+    assert reader.legacy_fields('Maize')['current'] == 40
+
+
+def test_writers_in_other_processes_follow_the_grown_file(tmp_path):
+    path = str(tmp_path / 'history.npy')
+    first = PriceHistory(path, check_interval=0)
+    second = PriceHistory(path, check_interval=0)
+    first.record(DAY, {'Rice': 20})
+    second.record(DAY + timedelta(days=1), {'Rice': 21})
+    first.record(DAY + timedelta(days=9), {'Rice': 29, 'Wheat': 30, 'Maize': 40})
+    second.record(DAY + timedelta(days=10), {'Rice': 30})
+    _, prices = PriceHistory(path).series('Rice')
+    assert [p for p in prices if not np.isnan(p)] == [20, 21, 29, 30]
@@ -0,0 +1,65 @@
+import json
+
+from price_store import PriceStore
+
+
+def make_store(tmp_path, **kwargs):
+    path = str(tmp_path / 'prices.json')
+    store = PriceStore(path, check_interval=0, **kwargs)
+    store.commit({'items': [{'name': 'Rice', 'current': 20}], 'last_updated': 'day 0'})
+    return store, path
+
+
+def test_updates_are_replayed_from_the_log(tmp_path):
+    store, path = make_store(tmp_path)
+    store.apply({'Rice': {'current': 21}}, last_updated='day 1')
+    store.apply({'Wheat': {'current': 30}})
+
+    with open(path) as f:
+        assert json.load(f)['items'] == [{'name': 'Rice', 'current': 20}]
+    reloaded = PriceStore(path, check_interval=0).get()
+    assert reloaded['items'] == [{'name': 'Rice', 'current': 21}, {'name': 'Wheat', 'current': 30}]
+    assert reloaded['last_updated'] == 'day 1'
+
+
+def test_compaction_folds_the_log_into_the_snapshot(tmp_path):
+    store, path = make_store(tmp_path, snapshot_every=2)
+    store.apply({'Rice': {'current': 21}})
+    store.apply({'Rice': {'current': 22}})
+    with open(store.log_path) as f:
+        assert f.read() == ''
+    assert PriceStore(path, check_interval=0).item('rice')['current'] == 22
+
+
+def test_torn_tail_is_ignored_and_terminated(tmp_path):
+    store, path = make_store(tmp_path)
+    store.apply({'Rice': {'current': 21}})
+    with open(store.log_path, 'a') as f:
+        f.write('{"seq": 2, "ite')
+
+    other = PriceStore(path, check_interval=0)
+    assert other.item('Rice')['current'] == 21
+    other.apply({'Rice': {'current': 23}})
+    assert PriceStore(path, check_interval=0).item('Rice')['current'] == 23
+
+
+def test_changes_by_another_instance_are_picked_up(tmp_path):
+    store, path = make_store(tmp_path)
+    other = PriceStore(path, check_interval=0)
+    assert other.item('Rice')['current'] == 20
+    store.apply({'Rice': {'current': 25}})
+    assert other.item('Rice')['current'] == 25
+    # Sequence numbers continue from the other writer's records
+    other.apply({'Rice': {'current': 26}})
+    assert PriceStore(path, check_interval=0).item('Rice')['current'] == 26
+
+
+def test_derived_values_are_cached_per_version(tmp_path):
+    store, _ = make_store(tmp_path)
+    calls = []
+    compute = lambda data: calls.append(1) or len(data['items'])
+    assert store.derived('count', compute) == 1
+    assert store.derived('count', compute) == 1
+    store.apply({'Wheat': {'current': 30}})
+    assert store.derived('count', compute) == 2
+    assert len(calls) == 2
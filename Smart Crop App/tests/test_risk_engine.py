@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+from risk_engine import RiskEngine, load_disease_catalog
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'CSS', 'disease.py')
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return RiskEngine(load_disease_catalog(CATALOG_PATH), ['Rice', 'Wheat'], centroids={'Punjab': (31.1, 75.3)})
+
+
+def district(**fields):
+    return dict({'state': 'Punjab', 'district': 'Ludhiana', 'temperature': 24, 'humidity': 82, 'rainfall': 35}, **fields)
+
+
+def test_one_zone_per_district_and_crop(engine):
+    zones = engine.zones([district(lat=30.9, lon=75.85), district(district='Patiala', humidity=40, rainfall=0)])
+    assert [(z['district'], z['crop']) for z in zones] == [
+        ('Ludhiana', 'Rice'), ('Ludhiana', 'Wheat'), ('Patiala', 'Rice'), ('Patiala', 'Wheat')]
+    assert all(0 <= z['risk_score'] <= 100 for z in zones)
+    # Humid, rainy weather scores at least as high as dry weather for the same crop
+    assert zones[0]['risk_score'] >= zones[2]['risk_score']
+
+
+def test_district_without_coordinates_gets_its_state_centroid(engine):
+    placed, fallback = engine.zones([district(lat=30.9, lon=75.85), district(district='Moga')])[::2]
+    assert (placed['lat'], placed['lon']) == (30.9, 75.85)
+    assert (fallback['lat'], fallback['lon']) == (31.1, 75.3)
+    unknown = engine.zones([district(state='Atlantis')])[0]
+    assert (unknown['lat'], unknown['lon']) == (None, None)
@@ -0,0 +1,66 @@
+from datetime import date, timedelta
+
+import pytest
+
+from trend_store import ALL, TrendStore, bucket_end, bucket_key, bucket_start, lttb
+
+
+def test_bucket_keys_round_trip():
+    day = date(2024, 2, 14)  # a Wednesday
+    assert bucket_start(bucket_key(day, 'weekly'), 'weekly') == date(2024, 2, 12)
+    assert bucket_start(bucket_key(day, 'monthly'), 'monthly') == date(2024, 2, 1)
+    assert bucket_end(bucket_key(day, 'monthly'), 'monthly') == date(2024, 3, 1).toordinal()
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    xs = list(range(100))
+    ys = [0.0] * 100
+    ys[37] = 50.0
+    keep = lttb(xs, ys, 10)
+    assert len(keep) == 10
+    assert keep[0] == 0 and keep[-1] == 99
+    assert keep == sorted(keep)
+    assert 37 in keep
+
+
+def test_lttb_small_inputs():
+    assert lttb([1, 2, 3], [1, 2, 3], 5) == [0, 1, 2]
+    assert lttb(list(range(10)), [0] * 10, 2) == [0, 9]
+
+
+def test_extend_rolls_up_states_and_all():
+    store = TrendStore()
+    start = date(2024, 1, 1)
+    store.extend([('Punjab', 'Rice', start + timedelta(days=i), 10) for i in range(31)])
+    store.extend([('Bihar', 'Rice', start, 40)])
+    monthly = store.query('Punjab', 'Rice', resolution='monthly', agg='count')
+    assert monthly['data'] == [31]
+    assert store.query(ALL, 'Rice', start=start, end=start, resolution='daily', agg='mean')['data'] == [25.0]
+
+
+def test_set_replaces_the_day_instead_of_adding():
+    store = TrendStore()
+    day = date(2024, 3, 5)
+    for value in (10, 20, 30):
+        store.set([('Punjab', 'Rice', day, value)])
+    daily = store.query('Punjab', 'Rice', resolution='daily', agg='count')
+    assert daily['data'] == [1]
+    assert store.query(ALL, 'Rice', resolution='weekly', agg='sum')['data'] == [30.0]
+
+
+def test_query_downsamples_to_points():
+    store = TrendStore()
+    start = date(2020, 1, 1)
+    store.extend([('Punjab', 'Rice', start + timedelta(days=i), i % 7) for i in range(1500)])
+    trend = store.query('Punjab', 'Rice', resolution='daily', points=50)
+    assert len(trend['data']) == len(trend['labels']) == 50
+    assert trend['labels'][0] == start.isoformat()
+
+
+def test_query_validates_arguments():
+    store = TrendStore()
+    with pytest.raises(ValueError):
+        store.query('Punjab', 'Rice', resolution='hourly')
+    with pytest.raises(ValueError):
+        store.query('Punjab', 'Rice', agg='median')
+    assert store.query('Nowhere', 'Rice') == {'labels': [], 'data': [], 'resolution': None}
@@ -0,0 +1,64 @@
+import io
+import threading
+import time
+
+import pytest
+
+from upload_queue import QueueFullError, UploadQueue
+
+
+class BlockingSave:
+    def __init__(self):
+        self.release = threading.Event()
+        self.saved = []
+
+    def __call__(self, stream, filename):
+        self.release.wait(5)
+        self.saved.append(filename)
+        return f'uploads/{filename}'
+
+
+def wait_for(predicate):
+    for _ in range(200):
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_upload_is_saved_in_the_background():
+    save = BlockingSave()
+    queue = UploadQueue(save, max_workers=1)
+    job = queue.submit(io.BytesIO(b'img'), 'leaf.jpg')
+    assert job['status'] == 'queued'
+    save.release.set()
+    assert wait_for(lambda: queue.status(job['id'])['status'] == 'saved')
+    assert queue.status(job['id'])['path'] == 'uploads/leaf.jpg'
+
+
+def test_full_queue_rejects_after_a_bounded_wait():
+    save = BlockingSave()
+    queue = UploadQueue(save, max_workers=1, max_pending=2, max_wait=0.05, retry_after=7)
+    queue.submit(io.BytesIO(b'a'), 'a.jpg')
+    queue.submit(io.BytesIO(b'b'), 'b.jpg')
+
+    started = time.monotonic()
+    with pytest.raises(QueueFullError) as excinfo:
+        queue.submit(io.BytesIO(b'c'), 'c.jpg')
+    assert time.monotonic() - started < 1
+    assert excinfo.value.retry_after == 7
+    # The request thread did not save anything itself
+    assert save.saved == []
+    assert queue.stats()['rejected'] == 1
+
+    save.release.set()
+    assert wait_for(lambda: queue.stats()['pending'] == 0)
+    assert queue.submit(io.BytesIO(b'c'), 'c.jpg')['status'] == 'queued'
+
+
+def test_waiting_upload_takes_a_freed_slot():
+    save = BlockingSave()
+    queue = UploadQueue(save, max_workers=1, max_pending=1, max_wait=5)
+    queue.submit(io.BytesIO(b'a'), 'a.jpg')
+    threading.Timer(0.05, save.release.set).start()
+    assert queue.submit(io.BytesIO(b'b'), 'b.jpg')['status'] == 'queued'
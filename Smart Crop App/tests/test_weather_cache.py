@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+
+import weather_cache
+from weather_cache import SingleFlight, WeatherCache, normalize_city
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(weather_cache.time, 'monotonic', clock)
+    return clock
+
+
+def test_normalize_city():
+    assert normalize_city(' Ludhiana ') == normalize_city('ludhiana,IN') == 'ludhiana'
+
+
+def test_fresh_entry_is_served_from_cache(clock):
+    cache = WeatherCache({'current': 60}, stale_ttl=0)
+    calls = []
+    assert cache.get_or_load('current', 'Pune', lambda: calls.append(1) or 'a') == 'a'
+    clock.now += 59
+    assert cache.get_or_load('current', ' pune ', lambda: calls.append(1) or 'b') == 'a'
+    assert len(calls) == 1
+    assert cache.stats()['hits'] == 1
+
+
+def test_stale_entry_is_served_while_refreshing(clock):
+    cache = WeatherCache({'current': 60}, stale_ttl=600)
+    cache.get_or_load('current', 'Pune', lambda: 'old')
+    clock.now += 120
+    refreshed = threading.Event()
+
+    def loader():
+        refreshed.set()
+        return 'new'
+
+    assert cache.get_or_load('current', 'Pune', loader) == 'old'
+    assert refreshed.wait(5)
+    for _ in range(100):
+        if cache.stats()['refreshes']:
+            break
+        threading.Event().wait(0.01)
+    assert cache.get_or_load('current', 'Pune', lambda: 'unused') == 'new'
+
+
+def test_expired_entry_is_reloaded(clock):
+    cache = WeatherCache({'current': 60}, stale_ttl=60)
+    cache.get_or_load('current', 'Pune', lambda: 'old')
+    clock.now += 121
+    assert cache.get_or_load('current', 'Pune', lambda: 'new') == 'new'
+    assert cache.stats()['misses'] == 2
+
+
+def test_failed_load_is_not_cached(clock):
+    cache = WeatherCache({'current': 60})
+
+    def fail():
+        raise RuntimeError('upstream down')
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load('current', 'Pune', fail)
+    assert cache.get_or_load('current', 'Pune', lambda: 'ok') == 'ok'
+
+
+def test_lru_eviction(clock):
+    cache = WeatherCache({'current': 60}, max_entries=2)
+    for city in ('a', 'b', 'c'):
+        cache.get_or_load('current', city, lambda: city)
+    assert cache.peek('current', 'a') is None
+    assert cache.peek('current', 'c') == 'c'
+    assert cache.stats()['evictions'] == 1
+
+
+def test_single_flight_runs_concurrent_calls_once():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return 42
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('k', slow))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for _ in range(100):
+        if flight.stats()['deduplicated'] == 4:
+            break
+        threading.Event().wait(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+    assert results == [42] * 5
+    assert len(calls) == 1
@@ -0,0 +1,79 @@
+from zone_store import MAX_PAGE_SIZE, RecordStore, parse_fields, parse_filters
+
+
+def make_store():
+    records = [
+        {'state': 'Punjab', 'crop': 'Rice', 'season': 'Kharif', 'risk': 10},
+        {'state': 'Punjab', 'crop': 'Wheat', 'season': 'Rabi', 'risk': 20},
+        {'state': 'Bihar', 'crop': 'Rice', 'season': None, 'risk': 30},
+        {'state': 'Punjab', 'crop': 'Rice', 'season': None, 'risk': 40},
+        {'state': 'Punjab', 'crop': 'Rice', 'season': 'Kharif', 'risk': 50},
+    ]
+    return RecordStore(records, indexed_fields=('state', 'crop', 'season'), wildcard_fields=('season',))
+
+
+def test_filters_use_every_field():
+    records, _, total = make_store().query({'state': 'Punjab', 'crop': 'Rice'})
+    assert total == 3
+    assert [r['risk'] for r in records] == [10, 40, 50]
+
+
+def test_wildcard_field_matches_records_without_it():
+    records, _, total = make_store().query({'crop': 'Rice', 'season': 'Kharif'})
+    assert [r['risk'] for r in records] == [10, 30, 40, 50]
+    assert total == 4
+
+
+def test_cursor_pages_cover_every_record_once():
+    store = make_store()
+    seen, cursor = [], None
+    while True:
+        records, cursor, total = store.query({'state': 'Punjab'}, cursor=cursor, limit=2, fields=['risk'])
+        seen.extend(r['risk'] for r in records)
+        if cursor is None:
+            break
+    assert seen == [10, 20, 40, 50]
+    assert total == 4
+
+
+def test_limit_is_clamped():
+    store = make_store()
+    assert store.query(limit=0)[0] == []
+    assert store.query(limit=-5)[0] == []
+    assert len(store.query(limit=MAX_PAGE_SIZE + 1)[0]) == 5
+
+
+def test_update_moves_record_between_index_lists():
+    store = make_store()
+    store.update(0, {'state': 'Bihar', 'crop': 'Rice', 'season': 'Kharif', 'risk': 11})
+    assert [r['risk'] for r in store.query({'state': 'Bihar'})[0]] == [11, 30]
+    assert [r['risk'] for r in store.query({'state': 'Punjab'})[0]] == [20, 40, 50]
+
+
+def test_apply_leaves_the_previous_snapshot_untouched():
+    store = make_store()
+    records, indexes = store.records, store.indexes
+    new_ids = store.apply(updated={0: {'state': 'Bihar', 'crop': 'Rice', 'risk': 11}},
+                          added=[{'state': 'Punjab', 'crop': 'Rice', 'risk': 60}])
+    assert new_ids == [5]
+    assert records[0]['state'] == 'Punjab' and len(records) == 5
+    assert indexes['state']['Punjab'] == [0, 1, 3, 4]
+    assert [r['risk'] for r in store.query({'state': 'Punjab', 'crop': 'Rice'})[0]] == [40, 50, 60]
+
+
+def test_parse_helpers():
+    args = {'state': 'all', 'crop': 'Rice', 'season': '', 'fields': 'risk, state,'}
+    assert parse_filters(args, ('state', 'crop', 'season')) == {'crop': 'Rice'}
+    assert parse_fields(args) == ['risk', 'state']
+    assert parse_fields({}) is None
+
+
+def test_selective_filter_is_walked_when_combined_with_a_wildcard():
+    records = [{'district': f'D{i % 50}', 'season': None if i % 3 == 0 else ('Kharif', 'Rabi')[i % 2]}
+               for i in range(1000)]
+    store = RecordStore(records, indexed_fields=('district', 'season'), wildcard_fields=('season',))
+    expected = [i for i, r in enumerate(records) if r['district'] == 'D7' and r['season'] in (None, 'Rabi')]
+    assert store.matching_ids({'district': 'D7', 'season': 'Rabi'}) == expected
+    wildcard = store.matching_ids({'season': 'Kharif'})
+    assert wildcard == sorted(wildcard)
+    assert len(wildcard) == sum(1 for r in records if r['season'] in (None, 'Kharif'))
@@ -0,0 +1,273 @@
+"""Disease-risk time series with precomputed rollups.
+
+Observations per state x crop (and an "All" series per crop) are folded into
+daily, weekly and monthly buckets of sum/count/max. `set()` replaces a day's
+value and re-aggregates only its buckets. Queries pick the finest rollup with
+at most `MAX_SOURCE_POINTS` buckets and downsample it with LTTB.
+"""
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+ALL = 'All'
+RESOLUTIONS = ('daily', 'weekly', 'monthly')
+AGGREGATES = ('mean', 'max', 'sum', 'count')
+
+# Most buckets a query reads before downsampling; bounds the cost of one chart
+MAX_SOURCE_POINTS = 2000
+MAX_POINTS = 1000
+
+
+def bucket_key(day, resolution):
+    """Return the sortable bucket key of a date (a day ordinal or a month index)"""
+    if resolution == 'daily':
+        return day.toordinal()
+    if resolution == 'weekly':
+        return day.toordinal() - day.weekday()
+    return day.year * 12 + day.month - 1
+
+
+def bucket_start(key, resolution):
+    """Return the first date of a bucket"""
+    if resolution == 'monthly':
+        return date(key // 12, key % 12 + 1, 1)
+    return date.fromordinal(key)
+
+
+def bucket_end(key, resolution):
+    """Return the day ordinal just after a bucket"""
+    if resolution == 'daily':
+        return key + 1
+    if resolution == 'weekly':
+        return key + 7
+    return bucket_start(key + 1, resolution).toordinal()
+
+
+def bucket_label(key, resolution, with_year=True):
+    if resolution == 'monthly':
+        # Month names alone (as the dashboard always showed) when they cannot repeat
+        return bucket_start(key, resolution).strftime('%b %Y' if with_year else '%b')
+    return bucket_start(key, resolution).isoformat()
+
+
+class Rollup:
+    """Sorted buckets of (sum, count, max) for one series at one resolution"""
+
+    def __init__(self):
+        self.keys = []
+        self.sums = []
+        self.counts = []
+        self.maxes = []
+
+    def add(self, key, value):
+        # Appends in time order hit the fast path; backfilled days are inserted
+        if self.keys and self.keys[-1] == key:
+            i = len(self.keys) - 1
+        elif not self.keys or self.keys[-1] < key:
+            self.keys.append(key)
+            self.sums.append(0.0)
+            self.counts.append(0)
+            self.maxes.append(value)
+            i = len(self.keys) - 1
+        else:
+            i = bisect_left(self.keys, key)
+            if i == len(self.keys) or self.keys[i] != key:
+                self.keys.insert(i, key)
+                self.sums.insert(i, 0.0)
+                self.counts.insert(i, 0)
+                self.maxes.insert(i, value)
+        self.sums[i] += value
+        self.counts[i] += 1
+        self.maxes[i] = max(self.maxes[i], value)
+
+    def put(self, key, values):
+        """Replace one bucket with the aggregate of values (removing it when empty)"""
+        i = bisect_left(self.keys, key)
+        exists = i < len(self.keys) and self.keys[i] == key
+        if not values:
+            if exists:
+                for column in (self.keys, self.sums, self.counts, self.maxes):
+                    del column[i]
+            return
+        if not exists:
+            for column, value in ((self.keys, key), (self.sums, 0.0), (self.counts, 0), (self.maxes, 0.0)):
+                column.insert(i, value)
+        self.sums[i], self.counts[i], self.maxes[i] = float(sum(values)), len(values), max(values)
+
+    def span(self, start_key, end_key):
+        """Return the (lo, hi) slice of buckets with start_key <= key <= end_key"""
+        return bisect_left(self.keys, start_key), bisect_right(self.keys, end_key)
+
+    def values(self, lo, hi, agg):
+        if agg == 'sum':
+            return self.sums[lo:hi]
+        if agg == 'count':
+            return self.counts[lo:hi]
+        if agg == 'max':
+            return self.maxes[lo:hi]
+        return [s / c for s, c in zip(self.sums[lo:hi], self.counts[lo:hi])]
+
+
+def lttb(xs, ys, threshold):
+    """Largest-Triangle-Three-Buckets downsampling; returns the indexes to keep"""
+    n = len(xs)
+    if threshold >= n:
+        return list(range(n))
+    if threshold < 3:
+        return [0, n - 1][:threshold]
+    keep = [0]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Average point of the next bucket is the third vertex of the triangle
+        next_lo = int((i + 1) * every) + 1
+        next_hi = min(int((i + 2) * every) + 1, n)
+        avg_x = sum(xs[next_lo:next_hi]) / (next_hi - next_lo)
+        avg_y = sum(ys[next_lo:next_hi]) / (next_hi - next_lo)
+
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        ax, ay = xs[a], ys[a]
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        keep.append(best)
+        a = best
+    keep.append(n - 1)
+    return keep
+
+
+class TrendStore:
+    """Per (state, crop) time series with daily/weekly/monthly rollups"""
+
+    def __init__(self):
+        self._series = {}   # (state, crop) -> {resolution: Rollup}
+        self._days = {}     # (state, crop) -> {day ordinal: [values]}, states only (not "All")
+        self._states = {}   # crop -> states with data
+        self.version = 0    # bumped on every change, used for ETags
+        self._lock = threading.Lock()
+
+    def _rollups(self, state, crop):
+        rollups = self._series.get((state, crop))
+        if rollups is None:
+            rollups = self._series[(state, crop)] = {r: Rollup() for r in RESOLUTIONS}
+        return rollups
+
+    def append(self, state, crop, day, value):
+        """Record one observation; it is folded into every rollup of the state and of "All" """
+        self.extend([(state, crop, day, value)])
+
+    def extend(self, observations):
+        """Record many (state, crop, day, value) observations under one lock"""
+        with self._lock:
+            for state, crop, day, value in observations:
+                value = float(value)
+                self._raw(state, crop).setdefault(day.toordinal(), []).append(value)
+                keys = {r: bucket_key(day, r) for r in RESOLUTIONS}
+                for series_state in {state, ALL}:
+                    rollups = self._rollups(series_state, crop)
+                    for resolution in RESOLUTIONS:
+                        rollups[resolution].add(keys[resolution], value)
+            self.version += 1
+
+    def set(self, observations):
+        """Make each (state, crop, day, value) the only value of that state and crop on that day"""
+        with self._lock:
+            for state, crop, day, value in observations:
+                self._raw(state, crop)[day.toordinal()] = [float(value)]
+                for resolution in RESOLUTIONS:
+                    key = bucket_key(day, resolution)
+                    days = range(bucket_start(key, resolution).toordinal(), bucket_end(key, resolution))
+                    for series_state in {state, ALL}:
+                        states = self._states[crop] if series_state == ALL else (state,)
+                        values = [v for s in states for d in days for v in self._days[(s, crop)].get(d, ())]
+                        self._rollups(series_state, crop)[resolution].put(key, values)
+            self.version += 1
+
+    def _raw(self, state, crop):
+        days = self._days.get((state, crop))
+        if days is None:
+            days = self._days[(state, crop)] = {}
+            self._states.setdefault(crop, set()).add(state)
+        return days
+
+    def series(self):
+        """Return the (state, crop) pairs that have data"""
+        with self._lock:
+            return sorted(self._series)
+
+    @staticmethod
+    def _pick_resolution(spans, points):
+        """Coarsest rollup that still has `points` buckets, else the finest one under MAX_SOURCE_POINTS"""
+        if len(spans) == 1:
+            return next(iter(spans))
+        if points is not None:
+            for resolution in reversed(RESOLUTIONS):
+                lo, hi = spans[resolution]
+                if points <= hi - lo <= MAX_SOURCE_POINTS:
+                    return resolution
+        for resolution in RESOLUTIONS:
+            lo, hi = spans[resolution]
+            if hi - lo <= MAX_SOURCE_POINTS:
+                return resolution
+        return RESOLUTIONS[-1]
+
+    def query(self, state, crop, start=None, end=None, resolution='auto', points=None, agg='mean'):
+        """Return {'labels', 'data', 'resolution'} for one series over [start, end].
+
+        resolution 'auto' prefers the coarsest rollup with at least `points`
+        buckets in range, otherwise the finest with at most MAX_SOURCE_POINTS;
+        `points` then downsamples the result with LTTB.
+        """
+        if resolution != 'auto' and resolution not in RESOLUTIONS:
+            raise ValueError(f"resolution must be auto or one of {', '.join(RESOLUTIONS)}")
+        if agg not in AGGREGATES:
+            raise ValueError(f"agg must be one of {', '.join(AGGREGATES)}")
+        if points is not None:
+            points = max(1, min(int(points), MAX_POINTS))
+
+        with self._lock:
+            rollups = self._series.get((state, crop))
+            if rollups is None:
+                return {'labels': [], 'data': [], 'resolution': None if resolution == 'auto' else resolution}
+
+            spans = {}
+            for candidate in (RESOLUTIONS if resolution == 'auto' else (resolution,)):
+                start_key = bucket_key(start, candidate) if start else float('-inf')
+                end_key = bucket_key(end, candidate) if end else float('inf')
+                spans[candidate] = rollups[candidate].span(start_key, end_key)
+            candidate = self._pick_resolution(spans, points)
+            rollup = rollups[candidate]
+            lo, hi = spans[candidate]
+            # An explicit fine resolution over a long range still reads at most
+            # MAX_SOURCE_POINTS buckets: the most recent ones
+            lo = max(lo, hi - MAX_SOURCE_POINTS)
+            keys = rollup.keys[lo:hi]
+            values = rollup.values(lo, hi, agg)
+
+        if points is not None and len(keys) > points:
+            keep = lttb(keys, values, points)
+            keys = [keys[i] for i in keep]
+            values = [values[i] for i in keep]
+        with_year = candidate == 'monthly' and len(keys) > 1 and keys[-1] - keys[0] >= 12
+        return {
+            'labels': [bucket_label(k, candidate, with_year) for k in keys],
+            'data': [round(v, 2) for v in values],
+            'resolution': candidate
+        }
+
+
+def parse_date(raw):
+    """Parse an ISO date query argument (None when missing)"""
+    if not raw:
+        return None
+    return date.fromisoformat(raw)
+
+
+def months_ago(day, months):
+    """First day of the month `months` before day's month"""
+    index = day.year * 12 + day.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
@@ -0,0 +1,103 @@
+"""Background saving of uploaded images.
+
+`UploadQueue` saves files on a small thread pool and returns an upload id to
+poll. Once `max_pending` uploads are queued, `submit()` waits up to
+`max_wait` seconds for a slot and then raises `QueueFullError`; the request
+thread never writes the file itself.
+"""
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+class QueueFullError(Exception):
+    """Raised by submit() when no slot frees up within max_wait seconds"""
+
+    def __init__(self, retry_after):
+        super().__init__('Upload queue is full, retry later')
+        self.retry_after = retry_after
+
+
+class UploadQueue:
+    """Bounded worker pool that saves upload streams and tracks their status"""
+
+    def __init__(self, save_func, max_workers=4, max_pending=64, max_tracked=10000, max_wait=1.0, retry_after=5):
+        # save_func(stream, filename) -> path where the file was stored
+        self.save_func = save_func
+        self.max_pending = max_pending
+        self.max_tracked = max_tracked
+        self.max_wait = max_wait
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='upload')
+        self._jobs = OrderedDict()  # upload id -> status dict
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+        self._stats = {'queued': 0, 'saved': 0, 'failed': 0, 'rejected': 0}
+
+    def submit(self, stream, filename):
+        """Queue a file object for saving and return its status dict (includes 'id').
+
+        Raises QueueFullError when the backlog stays at max_pending for max_wait seconds.
+        """
+        upload_id = uuid.uuid4().hex
+        job = {
+            'id': upload_id,
+            'filename': filename,
+            'status': 'queued',
+            'path': None,
+            'error': None,
+            'submitted': datetime.now().isoformat()
+        }
+        with self._lock:
+            if not self._slot_freed.wait_for(lambda: self._pending < self.max_pending, timeout=self.max_wait):
+                self._stats['rejected'] += 1
+                raise QueueFullError(self.retry_after)
+            self._pending += 1
+            self._stats['queued'] += 1
+            self._jobs[upload_id] = job
+            while len(self._jobs) > self.max_tracked:
+                self._jobs.popitem(last=False)
+            snapshot = dict(job)
+
+        self._executor.submit(self._run, job, stream)
+        return snapshot
+
+    def _run(self, job, stream):
+        try:
+            self._save(job, stream)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._slot_freed.notify()
+
+    def _save(self, job, stream):
+        with self._lock:
+            job['status'] = 'saving'
+        try:
+            path = self.save_func(stream, job['filename'])
+        except Exception as e:
+            with self._lock:
+                job.update(status='failed', error=str(e))
+                self._stats['failed'] += 1
+        else:
+            with self._lock:
+                job.update(status='saved', path=path, saved=datetime.now().isoformat())
+                self._stats['saved'] += 1
+        finally:
+            stream.close()
+
+    def status(self, upload_id):
+        """Return a copy of the status dict for an upload id, or None if unknown"""
+        with self._lock:
+            job = self._jobs.get(upload_id)
+            return dict(job) if job is not None else None
+
+    def stats(self):
+        """Return queued/saved/failed/rejected counters and the current backlog"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = self._pending
+        return stats
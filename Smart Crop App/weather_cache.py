@@ -0,0 +1,196 @@
+"""In-process cache for OpenWeatherMap lookups.
+
+Entries are keyed by (kind, normalized city) with a TTL per kind and LRU
+eviction. Expired entries are served stale while they refresh in the
+background, and concurrent misses share one upstream call (`SingleFlight`).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_city(city):
+    """Normalize a city/district name into a cache key"""
+    key = ' '.join((city or '').split()).lower()
+    # "Ludhiana,IN" and "Ludhiana" refer to the same place for our purposes
+    if key.endswith(',in'):
+        key = key[:-3].rstrip()
+    return key
+
+
+class _Call:
+    """One in-flight call shared by every caller of the same key"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one execution"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {'executed': 0, 'deduplicated': 0}
+
+    def do(self, key, func):
+        """Run func() for key, or wait for the call already running for key"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self._stats['deduplicated'] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._stats['executed'] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        """Return executed/deduplicated counters and the number of calls in flight"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        return stats
+
+
+class WeatherCache:
+    """Thread-safe LRU cache with per-kind TTLs and stale-while-revalidate"""
+
+    def __init__(self, ttls, stale_ttl=3600, max_entries=1024, default_ttl=600):
+        self.ttls = dict(ttls)
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()  # (kind, key) -> (value, stored_at)
+        self._refreshing = set()
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'refresh_errors': 0,
+            'evictions': 0
+        }
+
+    def get_or_load(self, kind, city, loader):
+        """Return the cached payload for (kind, city), calling loader() on a miss.
+
+        Exceptions raised by loader() on a miss propagate to the caller and
+        nothing is cached, so failed upstream calls are never served later.
+        """
+        key = (kind, normalize_city(city))
+        ttl = self.ttls.get(kind, self.default_ttl)
+        refresh = False
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                age = time.monotonic() - stored_at
+                if age < ttl:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return value
+                if age < ttl + self.stale_ttl:
+                    # Serve the stale value and refresh it once in the background
+                    self._entries.move_to_end(key)
+                    self._stats['stale_hits'] += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        refresh = True
+                else:
+                    # Too old to serve at all
+                    del self._entries[key]
+                    entry = None
+            if entry is None:
+                self._stats['misses'] += 1
+
+        if entry is not None:
+            if refresh:
+                threading.Thread(target=self._refresh, args=(key, loader), daemon=True).start()
+            return value
+
+        return self._flight.do(key, lambda: self._load(key, loader))
+
+    def _load(self, key, loader):
+        value = loader()
+        self._store(key, value)
+        return value
+
+    def peek(self, kind, city):
+        """Return a cached value that is still servable, without loading or counting"""
+        key = (kind, normalize_city(city))
+        ttl = self.ttls.get(kind, self.default_ttl)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[1] >= ttl + self.stale_ttl:
+            return None
+        return entry[0]
+
+    def put(self, kind, city, value):
+        """Store a value directly (e.g. data derived from another payload)"""
+        self._store((kind, normalize_city(city)), value)
+
+    def _refresh(self, key, loader):
+        """Reload one entry in the background, keeping the stale value on failure"""
+        try:
+            self._flight.do(key, lambda: self._load(key, loader))
+        except Exception:
+            with self._lock:
+                self._stats['refresh_errors'] += 1
+        else:
+            with self._lock:
+                self._stats['refreshes'] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, kind=None, city=None):
+        """Drop matching entries (all entries when called without arguments)"""
+        city_key = normalize_city(city) if city is not None else None
+        with self._lock:
+            for key in list(self._entries):
+                if kind is not None and key[0] != kind:
+                    continue
+                if city_key is not None and key[1] != city_key:
+                    continue
+                del self._entries[key]
+
+    def stats(self):
+        """Return hit/miss/refresh counters plus the current size"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+            stats['max_entries'] = self.max_entries
+            stats['ttls'] = dict(self.ttls)
+        stats['single_flight'] = self._flight.stats()
+        return stats
@@ -0,0 +1,168 @@
+"""In-memory indexed store for heatmap zones and alerts.
+
+`RecordStore` keeps field value -> sorted id indexes for the filterable
+fields and supports cursor pagination and field projection. Fields in
+`wildcard_fields` match any value when a record does not set them.
+Writes build a new snapshot and swap it in, so readers never see a
+half-applied change.
+"""
+from bisect import bisect_left, bisect_right, insort
+
+MAX_PAGE_SIZE = 1000
+
+
+class RecordStore:
+    """Read-optimized list of dict records with per-field secondary indexes"""
+
+    def __init__(self, records=(), indexed_fields=(), wildcard_fields=()):
+        self.indexed_fields = tuple(indexed_fields)
+        self.wildcard_fields = set(wildcard_fields)
+        self.load(records)
+
+    @property
+    def records(self):
+        return self._snapshot[0]
+
+    @property
+    def indexes(self):
+        return self._snapshot[1]
+
+    def load(self, records):
+        """Replace all records and rebuild the indexes"""
+        records = list(records)
+        indexes = {field: {} for field in self.indexed_fields}
+        for record_id, record in enumerate(records):
+            for field in self.indexed_fields:
+                # Ids are appended in order, so every posting list stays sorted
+                indexes[field].setdefault(record.get(field), []).append(record_id)
+        self._snapshot = (records, indexes)
+
+    def add(self, record):
+        """Append one record and index it; returns its id"""
+        return self.apply(added=[record])[0]
+
+    def update(self, record_id, record):
+        """Replace one record, moving it between index lists if needed"""
+        self.apply(updated={record_id: record})
+
+    def apply(self, updated=None, added=()):
+        """Replace records by id and append new ones in one swap; returns the new ids.
+
+        Only the posting lists that change are copied. Writers must be
+        serialized by the caller; readers need no lock.
+        """
+        records, indexes = self._snapshot
+        records = list(records)
+        indexes = {field: dict(values) for field, values in indexes.items()}
+        copied = set()
+
+        def posting(field, value):
+            if (field, value) not in copied:
+                copied.add((field, value))
+                indexes[field][value] = list(indexes[field].get(value, ()))
+            return indexes[field][value]
+
+        for record_id, record in (updated or {}).items():
+            old = records[record_id]
+            for field in self.indexed_fields:
+                old_value, new_value = old.get(field), record.get(field)
+                if old_value == new_value:
+                    continue
+                ids = posting(field, old_value)
+                del ids[bisect_left(ids, record_id)]
+                if not ids:
+                    del indexes[field][old_value]
+                    copied.discard((field, old_value))
+                insort(posting(field, new_value), record_id)
+            records[record_id] = record
+
+        new_ids = []
+        for record in added:
+            record_id = len(records)
+            records.append(record)
+            new_ids.append(record_id)
+            for field in self.indexed_fields:
+                posting(field, record.get(field)).append(record_id)
+
+        self._snapshot = (records, indexes)
+        return new_ids
+
+    def __len__(self):
+        return len(self.records)
+
+    def _posting_lists(self, indexes, field, value):
+        """Sorted id lists matching field == value (plus the unset records of a wildcard field)"""
+        lists = [indexes[field].get(value, [])]
+        if field in self.wildcard_fields and value is not None:
+            lists.append(indexes[field].get(None, []))
+        return [ids for ids in lists if ids]
+
+    def matching_ids(self, filters, snapshot=None):
+        """Return the sorted ids of records matching every (field, value) filter"""
+        records, indexes = snapshot or self._snapshot
+        filters = {f: v for f, v in (filters or {}).items() if f in indexes}
+        if not filters:
+            return range(len(records))
+
+        # Walk only the shortest posting list and check the other filters on
+        # the records themselves, so cost follows the most selective filter.
+        # Sizes are summed, not merged, so a wildcard filter costs nothing
+        # unless it is the one walked
+        postings = {f: self._posting_lists(indexes, f, v) for f, v in filters.items()}
+        field = min(postings, key=lambda f: sum(len(ids) for ids in postings[f]))
+        lists = postings[field]
+        if len(lists) > 1:
+            # Two sorted runs: timsort merges them in linear time
+            candidates = sorted(lists[0] + lists[1])
+        else:
+            candidates = lists[0] if lists else []
+        rest = [(f, v) for f, v in filters.items() if f != field]
+        if not rest:
+            return candidates
+        return [i for i in candidates if all(self._matches(records[i], f, v) for f, v in rest)]
+
+    def _matches(self, record, field, value):
+        actual = record.get(field)
+        return actual == value or (actual is None and field in self.wildcard_fields)
+
+    def query(self, filters=None, cursor=None, limit=None, fields=None):
+        """Return (records, next_cursor, total) for one page of matching records.
+
+        `cursor` is the value returned as next_cursor by the previous page;
+        `fields` limits each returned record to those keys.
+        """
+        # One snapshot for the whole page, so a concurrent write cannot tear it
+        snapshot = self._snapshot
+        records = snapshot[0]
+        ids = self.matching_ids(filters, snapshot)
+        total = len(ids)
+
+        start = 0
+        if cursor not in (None, ''):
+            start = bisect_right(ids, int(cursor))
+        if limit is None:
+            page = ids[start:]
+            next_cursor = None
+        else:
+            limit = max(0, min(int(limit), MAX_PAGE_SIZE))
+            page = ids[start:start + limit]
+            next_cursor = str(page[-1]) if page and start + limit < total else None
+
+        if fields:
+            out = [{k: records[i][k] for k in fields if k in records[i]} for i in page]
+        else:
+            out = [records[i] for i in page]
+        return out, next_cursor, total
+
+
+def parse_filters(args, fields, ignore=('', 'all', 'All')):
+    """Pick filter values for `fields` from request args, skipping 'all'/empty"""
+    return {f: args.get(f) for f in fields if args.get(f) not in (None,) + tuple(ignore)}
+
+
+def parse_fields(args):
+    """Parse a comma-separated ?fields= projection into a list (None = all fields)"""
+    raw = args.get('fields')
+    if not raw:
+        return None
+    return [f.strip() for f in raw.split(',') if f.strip()]